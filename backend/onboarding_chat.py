@@ -1,32 +1,95 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+_module_import_started = time.perf_counter()
+
+from contextlib import aclosing, asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any
+from typing import AsyncIterator, Dict, Hashable, Iterator, List, Literal, Optional, Any, Tuple
 from dotenv import load_dotenv
+import os
+import sys
+import threading
 import numpy as np
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_community.docstore.base import AddableMixin, Docstore
 from langchain.docstore.document import Document
 from langchain.schema import BaseRetriever
+from langchain_core.prompts import format_document
+
+# Embeddings, FAISS, RetrievalQA and the Gemini client are imported lazily in
+# get_retriever and get_rag_pipeline so the app can bind its port before they load.
 
 # --- Database Import ---
 from course_database import COURSE_DATABASE
 
+# --- Shared Retrieval Modules (backend/python) ---
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "python"))
+from ann_index import VectorIndexConfig, apply_index_config, describe_index
+from background_jobs import BackgroundJobs
+from catalog import CompiledCatalog, course_document_text, normalize_category, normalize_level
+from catalog_source import CatalogChanges, catalog_source_from_env
+from catalog_stream import CatalogIngest, process_memory_mb
+from catalog_sync import CatalogSync, ReadWriteLock, apply_to_catalog, apply_to_vector_store, load_catalog
+from course_json import RawJSONResponse, course_encoder, encode_json, recommendations_json
+from embedding_backends import embedding_key, load_embeddings
+from embedding_batcher import batched_embeddings_from_env
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+from index_cache import IndexArtifactCache, documents_fingerprint
+from metrics import ServiceMetrics
+from readiness import EngineRegistry
+from request_profiling import RequestProfiler
+from semantic_cache import CachedAnswer, SemanticAnswerCache
+from structured_logging import endpoint_logger, get_logger, logging_setup
+from tfidf_index import TfidfIndex, sparse_rows, top_k
+from vector_search import FilteredVectorSearch
+
 # --- TF-IDF Fallback Imports ---
 try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import linear_kernel
+    import sklearn
 except ImportError:
-    TfidfVectorizer = None
-    linear_kernel = None
+    sklearn = None
 
 load_dotenv()
 
+# JSON log records, written to stdout by a background thread (see structured_logging.py)
+logger = get_logger("rag")
+recommendations_log = endpoint_logger(logger, "courserecommendations")
+stream_log = endpoint_logger(logger, "courserecommendations/stream")
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+index_cache = IndexArtifactCache()
+
+# Repeated queries skip the MiniLM forward pass in the FAISS retriever
+embedding_cache = EmbeddingCache.from_env()
+
+# LLM answers reused for semantically close queries (see semantic_cache.py). Lookups
+# need query embeddings, so the cache only works with the FAISS retriever.
+answer_cache = SemanticAnswerCache.from_env()
+_answer_embeddings = None
+
+# CATALOG_DATABASE_URL: index published courses from the Prisma Course table and apply
+# later changes to the live retriever instead of COURSE_DATABASE.
+# CATALOG_NDJSON_PATH: stream the initial catalog from an NDJSON export (see catalog_stream.py)
+catalog_source = catalog_source_from_env()
+catalog_sync = CatalogSync.from_env(catalog_source) if catalog_source is not None else None
+catalog_load_report = None
+# Built with the retriever; also holds each course's pre-encoded response JSON
+compiled_catalog: Optional[CompiledCatalog] = None
+
+# LLM summaries requested with summary="background", polled by id.
+# SUMMARY_JOBS_WORKERS / SUMMARY_JOBS_MAX_JOBS / SUMMARY_JOBS_TTL_SECONDS size the pool and result store
+summary_jobs = BackgroundJobs.from_env("SUMMARY_JOBS", name="summary-job")
+
 # --- Pydantic Models ---
 class RAGRequest(BaseModel):
     query: str
     level: Optional[str] = None
+    category: Optional[str] = None
+    # "none": retrieval only, no LLM call; "inline": wait for the Gemini summary;
+    # "background": return the courses at once with a summary_id to poll
+    summary: Literal["none", "inline", "background"] = "none"
 
 class Course(BaseModel):
     id: str
@@ -43,110 +106,583 @@ class Course(BaseModel):
 class RAGResponse(BaseModel):
     courses: List[Course]
     warning: Optional[str] = None
+    summary: Optional[str] = None
+    summary_id: Optional[str] = None
+
+class SummaryResponse(BaseModel):
+    id: str
+    status: Literal["pending", "running", "done", "failed"]
+    summary: Optional[str] = None
+    error: Optional[str] = None
+
+def course_document(course: dict) -> Document:
+    return Document(page_content=course_document_text(course), metadata=course)
+
+def course_fragment(course: dict) -> bytes:
+    """Pre-encoded JSON of a retrieved course, encoded on the spot if it has since left the catalog"""
+    position = compiled_catalog.positions.get(course["id"])
+    if position is None:
+        return compiled_catalog.encoder(course)
+    return compiled_catalog.json_fragments[position]
+
+def catalog_documents(catalog: CompiledCatalog) -> Iterator[Document]:
+    """Documents for every catalog position, built one at a time"""
+    for i in range(catalog.size):
+        yield course_document(catalog.record(i))
+
+# --- FAISS Retriever ---
+class CatalogDocstore(Docstore, AddableMixin):
+    """
+    FAISS docstore that resolves course ids through the compiled catalog, so the
+    store keeps no second copy of every course. Catalog sync updates the catalog
+    itself; add/delete only have to keep FAISS's bookkeeping happy.
+    """
+
+    def __init__(self, catalog: Optional[CompiledCatalog]):
+        self.catalog = catalog
+
+    def search(self, search: str):
+        position = self.catalog.positions.get(search)
+        if position is None:
+            return f"ID {search} not found."
+        return course_document(self.catalog.record(position))
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        pass
+
+    def delete(self, ids: List) -> None:
+        pass
+
+    def __getstate__(self):
+        # The catalog is rebuilt at startup and re-attached after an index cache load
+        return {"catalog": None}
+
+def build_course_vector_store(catalog: CompiledCatalog, embeddings, chunk_size: int):
+    """
+    Embed the catalog `chunk_size` courses at a time into a flat L2 FAISS index keyed by course id;
+    apply_index_config converts it to IVF/HNSW when configured.
+    """
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+    vector_store = None
+    for start in range(0, catalog.size, chunk_size):
+        positions = [i for i in range(start, min(start + chunk_size, catalog.size)) if catalog.is_live(i)]
+        texts = [course_document_text(catalog.record(i)) for i in positions]
+        if not texts:
+            continue
+        vectors = embeddings.embed_documents(texts)
+        if vector_store is None:
+            index = dependable_faiss_import().IndexFlatL2(len(vectors[0]))
+            vector_store = FAISS(embeddings, index, CatalogDocstore(catalog), {})
+        vector_store.add_embeddings(list(zip(texts, vectors)), ids=[catalog.ids[i] for i in positions])
+    if vector_store is None:
+        raise ValueError("The course catalog is empty")
+    return vector_store
+
+class CourseVectorRetriever(BaseRetriever):
+    """
+    Similarity search over the course FAISS store, safe against live catalog updates.
+    The query is embedded outside the lock; only the index lookup holds the read side.
+    Level/category filters are applied inside the search (see vector_search.py).
+    """
+    vector_store: Any
+    lock: Any
+    searcher: Any
+    k: int = 3
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _search(self, embedding: List[float], bitmap: Optional[int]) -> List[Document]:
+        with metrics.stage("faiss_search"), self.lock.read():
+            docstore = self.vector_store.docstore
+            return [docstore.search(course_id) for course_id in self.searcher.search(embedding, self.k, bitmap)]
+
+    def filtered_search(self, query: str, bitmap: Optional[int] = None) -> List[Document]:
+        """Top k documents among the catalog positions in `bitmap` (all courses when None)"""
+        with metrics.stage("embedding"):
+            embedding = self.vector_store.embeddings.embed_query(query)
+        return self._search(embedding, bitmap)
+
+    async def afiltered_search(self, query: str, bitmap: Optional[int] = None) -> List[Document]:
+        with metrics.stage("embedding"):
+            embedding = await self.vector_store.embeddings.aembed_query(query)
+        return self._search(embedding, bitmap)
+
+    def _get_relevant_documents(self, query: str, **kwargs) -> List[Document]:
+        return self.filtered_search(query)
+
+    async def _aget_relevant_documents(self, query: str, **kwargs) -> List[Document]:
+        return await self.afiltered_search(query)
 
 # --- Corrected TF-IDF Retriever Fallback ---
 class SimpleTfidfRetriever(BaseRetriever):
-    docs: List[Document]
+    # Row i of the index is catalog position i; removed courses keep their
+    # row until the next full build and are skipped at search time
+    catalog: Any
     k: int
-    corpus: List[str]
-    vectorizer: Any
-    doc_vectors: Any
+    index: Any
 
     class Config:
         arbitrary_types_allowed = True
 
-    def __init__(self, documents: List[Document], k: int = 3, **kwargs):
-        if TfidfVectorizer is None or linear_kernel is None:
-            raise RuntimeError("scikit-learn is required for TF-IDF fallback. Install it with: pip install scikit-learn")
-        
-        corpus = [d.page_content for d in documents]
-        vectorizer = TfidfVectorizer(stop_words="english").fit(corpus)
-        doc_vectors = vectorizer.transform(corpus)
-        
-        super().__init__(
-            docs=documents, 
-            k=k, 
-            corpus=corpus, 
-            vectorizer=vectorizer, 
-            doc_vectors=doc_vectors, 
-            **kwargs
-        )
+    def __init__(self, catalog: CompiledCatalog, k: int = 3, index: Optional[TfidfIndex] = None, **kwargs):
+        if index is None:
+            index = TfidfIndex.from_env()
+            index.add(doc.page_content for doc in catalog_documents(catalog))
+        super().__init__(catalog=catalog, k=k, index=index, **kwargs)
 
-    def _get_relevant_documents(self, query: str, **kwargs) -> List[Document]:
-        if not self.docs or linear_kernel is None:
-            return []
+    def _top_documents(self, positions: np.ndarray, similarities: np.ndarray, bitmap: Optional[int]) -> List[Document]:
+        """Top k documents from one query's sparse scores: the positions it matched and their similarities"""
+        if bitmap is not None:
+            allowed = np.fromiter(self.catalog.members(bitmap), dtype=positions.dtype)
+            keep = np.isin(positions, allowed)
+            positions, similarities = positions[keep], similarities[keep]
+        # Enough candidates that k survive even if every removed course scores higher
+        removed = self.catalog.size - self.catalog.live_count
+        results = []
+        for i in top_k(similarities, self.k + removed):
+            if similarities[i] <= 0 or len(results) == self.k:
+                break
+            position = int(positions[i])
+            if self.catalog.is_live(position):
+                results.append(course_document(self.catalog.record(position)))
+        return results
+
+    def batch_search(self, queries: List[str], bitmap: Optional[int] = None) -> List[List[Document]]:
+        """Top k documents for each query, all scored in one sparse product per index block"""
+        if not queries or not self.catalog.live_count:
+            return [[] for _ in queries]
         try:
-            query_vector = self.vectorizer.transform([query])
-            similarities = linear_kernel(query_vector, self.doc_vectors).flatten()
-            top_indices = np.argsort(similarities)[::-1][:self.k]
-            return [self.docs[i] for i in top_indices if similarities[i] > 0]
-        except Exception:
-            return []
+            with metrics.stage("tfidf_search"):
+                scores = self.index.scores(queries)
+                return [self._top_documents(positions, row, bitmap) for positions, row in sparse_rows(scores)]
+        except Exception as e:
+            logger.warning("TF-IDF search failed", extra={"error": str(e)})
+            return [[] for _ in queries]
+
+    def filtered_search(self, query: str, bitmap: Optional[int] = None) -> List[Document]:
+        """Top k documents among the catalog positions in `bitmap` (all courses when None)"""
+        return self.batch_search([query], bitmap)[0]
+
+    async def afiltered_search(self, query: str, bitmap: Optional[int] = None) -> List[Document]:
+        # Scoring is CPU-bound; keep it off the event loop
+        return await run_in_threadpool(self.filtered_search, query, bitmap)
+
+    async def abatch_search(self, queries: List[str], bitmap: Optional[int] = None) -> List[List[Document]]:
+        return await run_in_threadpool(self.batch_search, queries, bitmap)
+
+    def _get_relevant_documents(self, query: str, **kwargs) -> List[Document]:
+        return self.filtered_search(query)
 
     async def _aget_relevant_documents(self, query: str, **kwargs) -> List[Document]:
-        return self._get_relevant_documents(query, **kwargs)
+        return await self.afiltered_search(query)
+
+    def apply_catalog_changes(self, changes: CatalogChanges):
+        """
+        Apply changes to the catalog and append index rows for the positions it added
+        (with the fitted vocabulary, terms new to it are ignored until the next build).
+        """
+        apply_to_catalog(self.catalog, changes)
+        rows = self.index.rows
+        if rows < self.catalog.size:
+            self.index.add(course_document_text(self.catalog.record(i)) for i in range(rows, self.catalog.size))
+        self.catalog.version += 1
+
+def load_tfidf_retriever(catalog: CompiledCatalog, k: int = 3) -> SimpleTfidfRetriever:
+    """Build the TF-IDF retriever, reusing a cached index when the corpus and vectorizer settings are unchanged"""
+    index = TfidfIndex.from_env()
+    # Pickled estimators are only safe to reload with the scikit-learn version that wrote them
+    fingerprint = documents_fingerprint(
+        catalog_documents(catalog), "tfidf", index.key, getattr(sklearn, "__version__", "")
+    )
+    cached = index_cache.load_pickle("courses-tfidf", fingerprint)
+    if isinstance(cached, TfidfIndex):
+        return SimpleTfidfRetriever(catalog, k=k, index=cached)
+
+    retriever = SimpleTfidfRetriever(catalog, k=k)
+    index_cache.save_pickle("courses-tfidf", fingerprint, retriever.index)
+    return retriever
+
+# --- Engine Readiness ---
+# The service is ready once a retriever (FAISS, or TF-IDF as fallback) is built;
+# the LLM chain only serves summaries and streamed answers, so it does not gate readiness
+engines = EngineRegistry()
+engines.register("retriever", required=True)
+engines.register("faiss")
+engines.register("tfidf")
+engines.register("llm")
+
+# WARMUP_MODE: "background" (default) builds the retriever and then the LLM chain in a
+# thread after startup; "lazy" keeps the old behaviour of building them on first use.
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+
+def warm_rag_pipeline():
+    try:
+        get_retriever()
+        engines.record_timing("boot_to_ready", time.perf_counter() - engines.started_at)
+        get_rag_pipeline()
+    except Exception as e:
+        logger.warning("RAG pipeline warmup failed", extra={"error": str(e)})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_MODE == "background":
+        threading.Thread(target=warm_rag_pipeline, name="rag-warmup", daemon=True).start()
+    yield
+    if catalog_sync is not None:
+        catalog_sync.stop()
+    summary_jobs.shutdown()
 
 # --- FastAPI App ---
-app = FastAPI(title="Filtered Course Recommender")
+app = FastAPI(title="Filtered Course Recommender", lifespan=lifespan)
+# Per-stage and per-endpoint latency, fallback counters and index sizes, served at /metrics
+metrics = ServiceMetrics()
+metrics.install(app)
+# PROFILING_ENABLED=1: profile single requests sent with an X-Profile header (see request_profiling.py)
+profiler = RequestProfiler.from_env()
+profiler.install(app)
+_retriever = None
+_retriever_lock = threading.Lock()
 _rag_pipeline = None
+_rag_pipeline_lock = threading.Lock()
+
+def get_retriever():
+    global _retriever, _answer_embeddings, catalog_load_report, compiled_catalog
+    if _retriever is not None:
+        return _retriever
+
+    # Warmup and early requests may race here; build the retriever once
+    with _retriever_lock:
+        if _retriever is not None:
+            return _retriever
+
+        with engines.loading("retriever"):
+            # Courses are streamed into the columnar catalog; the indexes read it chunk by chunk
+            ingest = CatalogIngest.from_env()
+            catalog = CompiledCatalog(encoder=course_encoder(Course))
+            catalog_load_report = load_catalog([catalog.extend], catalog_source, COURSE_DATABASE, ingest)
+            compiled_catalog = catalog
+            retriever, apply_catalog_changes = build_retriever(catalog, ingest.chunk_size)
+
+        # Changes committed after the initial load are applied to the live retriever from here on
+        if catalog_sync is not None:
+            catalog_sync.subscribe(apply_catalog_changes)
+            catalog_sync.start()
+        if isinstance(retriever, CourseVectorRetriever):
+            _answer_embeddings = retriever.vector_store.embeddings
+        _retriever = retriever
+        return _retriever
+
+def build_retriever(catalog: CompiledCatalog, chunk_size: int):
+    """The FAISS retriever, or the TF-IDF one if embeddings are unavailable, with its catalog change applier"""
+    try:
+        with engines.loading("faiss"):
+            with engines.timed("import_embedding_stack"):
+                from langchain_community.vectorstores import FAISS
+
+            with engines.timed("load_embedding_model"):
+                # Cache hits skip the model; concurrent misses are micro-batched into one forward pass
+                embeddings = CachedEmbeddings(
+                    batched_embeddings_from_env(load_embeddings(EMBEDDING_MODEL_NAME)),
+                    embedding_cache,
+                )
+            
+            # Reuse the persisted index when neither the catalog, the model nor the index type changed.
+            # Docstore ids are course ids, so catalog sync can delete and re-add courses.
+            with engines.timed("build_course_index"):
+                index_config = VectorIndexConfig.from_env()
+                fingerprint = documents_fingerprint(
+                    catalog_documents(catalog), embedding_key(EMBEDDING_MODEL_NAME), "catalog-docstore",
+                    index_config.key(catalog.live_count),
+                )
+                # Without catalog sync the index is never modified and can be memory-mapped (INDEX_MMAP=1)
+                vector_store = index_cache.load_faiss("courses", fingerprint, embeddings, read_only=catalog_sync is None)
+                if vector_store is not None:
+                    vector_store.docstore.catalog = catalog
+                    apply_index_config(vector_store, index_config)
+                else:
+                    vector_store = apply_index_config(build_course_vector_store(catalog, embeddings, chunk_size), index_config)
+                    index_cache.save_faiss("courses", fingerprint, vector_store)
+
+            with engines.timed("warmup_embedding"):
+                embeddings.embed_query("warmup")
+            vector_lock = ReadWriteLock()
+            searcher = FilteredVectorSearch(vector_store, catalog)
+            retriever = CourseVectorRetriever(vector_store=vector_store, lock=vector_lock, searcher=searcher, k=3)
+            return retriever, lambda changes: apply_to_vector_store(vector_store, vector_lock, changes, catalog)
+    except Exception as e:
+        logger.warning("Embeddings/FAISS failed; using the TF-IDF fallback retriever", extra={"error": str(e)})
+        with engines.loading("tfidf"):
+            retriever = load_tfidf_retriever(catalog, k=3)
+            return retriever, retriever.apply_catalog_changes
 
 def get_rag_pipeline():
+    """RetrievalQA chain over the shared retriever; only summaries and streamed answers need it"""
     global _rag_pipeline
     if _rag_pipeline is not None:
         return _rag_pipeline
 
-    documents = []
-    for course in COURSE_DATABASE:
-        content = (
-            f"Title: {course['title']}. Description: {course['description']}. "
-            f"Level: {course['level']}. Category: {course['category']}."
-        )
-        documents.append(Document(page_content=content, metadata=course))
+    retriever = get_retriever()
+    with _rag_pipeline_lock:
+        if _rag_pipeline is not None:
+            return _rag_pipeline
 
-    try:
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vector_store = FAISS.from_documents(documents, embeddings)
-        retriever = vector_store.as_retriever(search_kwargs={"k": 3})
-    except Exception as e:
-        print(f"Embeddings/FAISS failed ({e}). Using TF-IDF fallback retriever.")
-        retriever = SimpleTfidfRetriever(documents, k=3)
-
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest")
-    _rag_pipeline = RetrievalQA.from_chain_type(
-        llm=llm,
-        chain_type="stuff",
-        retriever=retriever,
-        return_source_documents=True
+        with engines.loading("llm"):
+            with engines.timed("import_llm_stack"):
+                from langchain.chains import RetrievalQA
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+            llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash-latest")
+            _rag_pipeline = RetrievalQA.from_chain_type(
+                llm=llm,
+                chain_type="stuff",
+                retriever=retriever,
+                return_source_documents=True
+            )
+        return _rag_pipeline
+
+@app.get("/health/live")
+def liveness_check():
+    """The process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness_check():
+    """Ready once a retriever is built; reports every engine and startup timings"""
+    ready = engines.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "starting",
+            **engines.snapshot(),
+            "embedding_cache": embedding_cache.stats(),
+            "catalog_load": catalog_load_report,
+            "catalog_sync": catalog_sync.stats() if catalog_sync else None,
+            "summary_jobs": summary_jobs.stats(),
+            "logging": logging_setup().stats(),
+            "profiling": profiler.stats(),
+            "process": {"pid": os.getpid(), **(process_memory_mb() or {})},
+            "answer_cache": answer_cache.stats(),
+            "vector_search": _retriever.searcher.stats() if isinstance(_retriever, CourseVectorRetriever) else None,
+            "vector_index": describe_index(_retriever.vector_store.index) if isinstance(_retriever, CourseVectorRetriever) else None,
+            "tfidf_index": _retriever.index.stats() if isinstance(_retriever, SimpleTfidfRetriever) else None,
+        },
     )
-    return _rag_pipeline
+
+def retrieval_filter(level: Optional[str], category: Optional[str]) -> Tuple[Optional[int], Hashable, Optional[str]]:
+    """
+    Catalog bitmap for the request's filters and the answer-cache scope they form.
+    Filters no course matches are dropped with a warning, as before.
+    """
+    if not (level or category):
+        return None, None, None
+    bitmap = compiled_catalog.filter_bitmap(level=level, category=category)
+    if bitmap:
+        return bitmap, (normalize_level(level), normalize_category(category)), None
+    metrics.fallback("unfiltered_search")
+    if level:
+        return None, None, f"We couldn't find any courses matching the level '{level}'. Showing the most relevant results instead."
+    return None, None, f"We couldn't find any courses in the category '{category}'. Showing the most relevant results instead."
+
+def answer_messages(rag_pipeline, query: str, documents: List[Document]):
+    """The RetrievalQA "stuff" prompt over already-retrieved documents"""
+    combine = rag_pipeline.combine_documents_chain
+    context = combine.document_separator.join(format_document(doc, combine.document_prompt) for doc in documents)
+    return combine.llm_chain.prompt.format_messages(**{combine.document_variable_name: context, "question": query})
+
+def lookup_answer(query: str, scope: Hashable = None) -> Tuple[Optional[CachedAnswer], Optional[List[float]]]:
+    """A cached answer for a semantically close query, and the query embedding to store a new one under"""
+    if _answer_embeddings is None:
+        return None, None
+    with metrics.stage("embedding"):
+        embedding = _answer_embeddings.embed_query(query)
+    with metrics.stage("answer_cache"):
+        cached = answer_cache.get(embedding, compiled_catalog.version, scope)
+    # An answer (and its sources) from another filter scope would leak courses the filters exclude
+    if cached is not None and cached.scope != scope:
+        cached = None
+    return cached, embedding
+
+def cached_sources(cached: CachedAnswer) -> List[Document]:
+    """The documents a cached answer was generated from"""
+    positions = [compiled_catalog.positions.get(course_id) for course_id in cached.source_ids]
+    return [course_document(compiled_catalog.record(i)) for i in positions if i is not None]
+
+def remember_answer(embedding: Optional[List[float]], answer: str, documents: List[Document], llm_seconds: float, version: int, scope: Hashable = None):
+    if embedding is not None:
+        answer_cache.put(embedding, answer, [doc.metadata["id"] for doc in documents], llm_seconds, version, scope)
+
+def summarize(query: str, documents: List[Document], embedding: Optional[List[float]] = None, scope: Hashable = None) -> str:
+    """Gemini's answer for the query over the retrieved courses, cached under the query embedding"""
+    rag_pipeline = get_rag_pipeline()
+    # Read before generating, so an answer that straddles a catalog change is not cached as current
+    version = compiled_catalog.version
+    started = time.perf_counter()
+    with metrics.stage("llm"):
+        answer = rag_pipeline.combine_documents_chain.llm_chain.llm.invoke(answer_messages(rag_pipeline, query, documents)).text()
+    remember_answer(embedding, answer, documents, time.perf_counter() - started, version, scope)
+    return answer
 
 @app.post("/courserecommendations", response_model=RAGResponse)
+@profiler.endpoint
 def get_recommendations_endpoint(request: RAGRequest):
+    """
+    Courses straight from the retriever. The LLM only runs when asked for:
+    summary="inline" waits for it, summary="background" returns a summary_id
+    to poll at /courserecommendations/summary/{summary_id}.
+    """
     try:
-        rag_pipeline = get_rag_pipeline()
+        retriever = get_retriever()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"RAG initialization failed: {e}")
+    if isinstance(retriever, SimpleTfidfRetriever):
+        metrics.fallback("tfidf_retriever")
+
+    # Level/category filters are applied inside retrieval, so the top k all match them
+    bitmap, scope, warning_message = retrieval_filter(request.level, request.category)
 
-    result = rag_pipeline.invoke({"query": request.query})
+    # A cached answer comes with the sources it was generated from
+    cached, embedding = lookup_answer(request.query, scope) if request.summary != "none" else (None, None)
+    documents = cached_sources(cached) if cached is not None else retriever.filtered_search(request.query, bitmap)
     
-    if not result.get("source_documents"):
+    if not documents:
         raise HTTPException(status_code=404, detail="No courses found for your query.")
 
-    retrieved_courses = [doc.metadata for doc in result["source_documents"]]
-    final_courses = retrieved_courses
-    warning_message = None
-    
-    if request.level:
-        filtered_courses = [
-            course for course in retrieved_courses 
-            if str(course.get('level', '')).lower() == request.level.lower()
-        ]
-        
-        if filtered_courses:
-            final_courses = filtered_courses
+    final_courses = [doc.metadata for doc in documents]
+    recommendations_log.info("Recommended courses", extra={
+        "query": request.query,
+        "level_filter": request.level,
+        "category_filter": request.category,
+        "courses": [course["title"] for course in final_courses[:3]],
+        "answer_cache_hit": cached is not None,
+    })
+
+    summary = summary_id = None
+    if request.summary == "inline":
+        try:
+            summary = cached.answer if cached is not None else summarize(request.query, documents, embedding, scope)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"LLM summary failed: {e}")
+    elif request.summary == "background":
+        if cached is not None:
+            summary_id = summary_jobs.submit(lambda: cached.answer)
         else:
-            warning_message = f"We couldn't find any courses matching the level '{request.level}'. Showing the most relevant results instead."
+            summary_id = summary_jobs.submit(summarize, request.query, documents, embedding, scope)
 
-    courses_to_return = [Course(**course_data) for course_data in final_courses[:3]]
-    
-    return RAGResponse(courses=courses_to_return, warning=warning_message)
\ No newline at end of file
+    # Courses were validated at catalog load; join their pre-encoded JSON
+    with metrics.stage("serialization"):
+        body = recommendations_json(
+            [course_fragment(course) for course in final_courses[:3]],
+            warning_message,
+            {"summary": summary, "summary_id": summary_id},
+        )
+    return RawJSONResponse(body)
+
+@app.get("/courserecommendations/summary/{summary_id}", response_model=SummaryResponse)
+def get_summary_endpoint(summary_id: str):
+    """Status of a background summary; 404 once it has expired or if the id is unknown"""
+    job = summary_jobs.get(summary_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired summary id.")
+    return SummaryResponse(id=job["id"], status=job["status"], summary=job["result"], error=job["error"])
+
+# --- Streaming ---
+def sse_event(event: str, data: bytes) -> bytes:
+    """One Server-Sent Events frame; `data` is single-line JSON"""
+    return b"event: " + event.encode("utf-8") + b"\ndata: " + data + b"\n\n"
+
+async def stream_answer(rag_pipeline, query: str, documents: List[Document]) -> AsyncIterator[str]:
+    """
+    Run the RetrievalQA "stuff" prompt over already-retrieved documents and yield
+    the LLM's text as it arrives. Closing the generator closes the upstream stream.
+    """
+    llm = rag_pipeline.combine_documents_chain.llm_chain.llm
+    async with aclosing(llm.astream(answer_messages(rag_pipeline, query, documents))) as chunks:
+        async for chunk in chunks:
+            text = chunk.text()
+            if text:
+                yield text
+
+@app.post("/courserecommendations/stream", response_class=StreamingResponse)
+async def stream_recommendations_endpoint(request: RAGRequest, http_request: Request):
+    """
+    Server-Sent Events variant of /courserecommendations. Sends a `courses` event
+    (the RAGResponse body) as soon as retrieval finishes, then a `token` event per
+    LLM chunk and a final `done`. A client disconnect cancels the LLM call.
+    The `summary` field of the request is ignored: the answer is the stream.
+    """
+    try:
+        retriever = await run_in_threadpool(get_retriever)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"RAG initialization failed: {e}")
+    if isinstance(retriever, SimpleTfidfRetriever):
+        metrics.fallback("tfidf_retriever")
+
+    bitmap, scope, warning_message = retrieval_filter(request.level, request.category)
+    cached, embedding = await run_in_threadpool(lookup_answer, request.query, scope)
+    documents = cached_sources(cached) if cached is not None else await retriever.afiltered_search(request.query, bitmap)
+    if not documents:
+        raise HTTPException(status_code=404, detail="No courses found for your query.")
+
+    final_courses = [doc.metadata for doc in documents]
+    with metrics.stage("serialization"):
+        courses_event = sse_event("courses", recommendations_json(
+            [course_fragment(course) for course in final_courses[:3]],
+            warning_message,
+            {"summary": None, "summary_id": None},
+        ))
+
+    async def events():
+        yield courses_event
+        if cached is not None:
+            yield sse_event("token", encode_json({"text": cached.answer}))
+            yield sse_event("done", b"{}")
+            return
+        try:
+            # Built after the courses are out, so a cold LLM stack does not delay them
+            rag_pipeline = await run_in_threadpool(get_rag_pipeline)
+            version = compiled_catalog.version
+            started = time.perf_counter()
+            answer = []
+            # Starlette cancels this generator when the client goes away, which
+            # aborts the in-flight LLM request; the check also stops between chunks
+            async with aclosing(stream_answer(rag_pipeline, request.query, documents)) as tokens:
+                async for token in tokens:
+                    if await http_request.is_disconnected():
+                        stream_log.info("Client disconnected; stopped streaming the LLM answer")
+                        return
+                    if not answer:
+                        metrics.stages.observe(time.perf_counter() - started, stage="llm_first_token")
+                    answer.append(token)
+                    yield sse_event("token", encode_json({"text": token}))
+            metrics.stages.observe(time.perf_counter() - started, stage="llm")
+            # Only complete answers are cached
+            remember_answer(embedding, "".join(answer), documents, time.perf_counter() - started, version, scope)
+        except Exception as e:
+            # The courses are already delivered; report the failure in-band
+            stream_log.warning("Error while streaming the LLM answer", extra={"error": str(e)})
+            yield sse_event("error", encode_json({"detail": f"LLM generation failed: {e}"}))
+            return
+        yield sse_event("done", b"{}")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Catalog and index sizes, read on each scrape
+metrics.gauge("ugrama_catalog_courses", "Live courses in the catalog.", lambda: compiled_catalog.live_count if compiled_catalog else None)
+metrics.gauge("ugrama_catalog_version", "Catalog version; bumps on every applied change batch.",
+              lambda: compiled_catalog.version if compiled_catalog else None)
+metrics.gauge("ugrama_course_index_vectors", "Vectors in the course FAISS index.",
+              lambda: _retriever.vector_store.index.ntotal if isinstance(_retriever, CourseVectorRetriever) else None)
+metrics.gauge("ugrama_tfidf_index_rows", "Rows in the TF-IDF fallback index.",
+              lambda: _retriever.index.rows if isinstance(_retriever, SimpleTfidfRetriever) else None)
+metrics.gauge("ugrama_answer_cache_entries", "Answers held by the semantic answer cache.", lambda: answer_cache.stats().get("entries"))
+metrics.track_engines(engines)
+
+engines.record_timing("module_import", time.perf_counter() - _module_import_started)
@@ -0,0 +1,194 @@
+import math
+import os
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+# Vectors sampled to train IVF centroids; FAISS wants at least 39 per list
+IVF_TRAINING_POINTS_PER_LIST = 256
+IVF_MIN_POINTS_PER_LIST = 39
+
+
+def _faiss():
+    from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+    return dependable_faiss_import()
+
+
+class VectorIndexConfig:
+    """
+    Which FAISS index type backs a LangChain FAISS store, and its parameters.
+
+    "flat" is exact brute force. "ivf" clusters the vectors into `nlist`
+    inverted lists (trained on the catalog embeddings) and scans `nprobe` of
+    them per query. "hnsw" searches a graph with `hnsw_m` links per node and a
+    candidate list of `ef_search`. Stores with fewer than `min_vectors`
+    vectors always stay flat: exact search is cheap there and IVF training
+    needs enough points. The index type is chosen when the store is built, so
+    a catalog that grows past `min_vectors` switches on the next rebuild.
+    """
+
+    def __init__(
+        self,
+        index_type: str = "flat",
+        min_vectors: int = 10_000,
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        hnsw_m: int = 32,
+        ef_construction: int = 80,
+        ef_search: int = 64,
+    ):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown vector index type {index_type!r}; expected one of {INDEX_TYPES}")
+        self.index_type = index_type
+        self.min_vectors = min_vectors
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+
+    @classmethod
+    def from_env(cls) -> "VectorIndexConfig":
+        """
+        VECTOR_INDEX ("flat", "ivf" or "hnsw") and VECTOR_INDEX_MIN_VECTORS pick the
+        index; IVF_NLIST, IVF_NPROBE, HNSW_M, HNSW_EF_CONSTRUCTION and HNSW_EF_SEARCH tune it.
+        """
+        nlist = os.getenv("IVF_NLIST")
+        return cls(
+            index_type=os.getenv("VECTOR_INDEX", "flat"),
+            min_vectors=int(os.getenv("VECTOR_INDEX_MIN_VECTORS", "10000")),
+            nlist=int(nlist) if nlist else None,
+            nprobe=int(os.getenv("IVF_NPROBE", "16")),
+            hnsw_m=int(os.getenv("HNSW_M", "32")),
+            ef_construction=int(os.getenv("HNSW_EF_CONSTRUCTION", "80")),
+            ef_search=int(os.getenv("HNSW_EF_SEARCH", "64")),
+        )
+
+    def index_type_for(self, count: int) -> str:
+        return "flat" if count < self.min_vectors else self.index_type
+
+    def nlist_for(self, count: int) -> int:
+        """IVF_NLIST, or ~4 sqrt(n) lists capped so each gets enough training points"""
+        nlist = self.nlist or int(4 * math.sqrt(count))
+        return max(1, min(nlist, count // IVF_MIN_POINTS_PER_LIST))
+
+    def key(self, count: int) -> str:
+        """Build parameters for `count` vectors, for cache fingerprints; search parameters are applied at load"""
+        index_type = self.index_type_for(count)
+        if index_type == "ivf":
+            return f"ivf-{self.nlist_for(count)}"
+        if index_type == "hnsw":
+            return f"hnsw-{self.hnsw_m}-{self.ef_construction}"
+        return "flat"
+
+    def build(self, vectors: np.ndarray, metric: Optional[int] = None):
+        """A trained, filled index of the configured type over `vectors` (rows in FAISS id order)"""
+        faiss = _faiss()
+        metric = faiss.METRIC_L2 if metric is None else metric
+        count, dimension = vectors.shape
+        index_type = self.index_type_for(count)
+        if index_type == "ivf":
+            nlist = self.nlist_for(count)
+            index = faiss.IndexIVFFlat(faiss.IndexFlat(dimension, metric), dimension, nlist, metric)
+            sample = min(count, nlist * IVF_TRAINING_POINTS_PER_LIST)
+            training = vectors[np.random.default_rng(0).choice(count, sample, replace=False)] if sample < count else vectors
+            index.train(training)
+        elif index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dimension, self.hnsw_m, metric)
+            index.hnsw.efConstruction = self.ef_construction
+        else:
+            index = faiss.IndexFlat(dimension, metric)
+        index.add(vectors)
+        self.configure(index)
+        return index
+
+    def configure(self, index):
+        """Apply the search-time parameters (nprobe, efSearch) to a built or loaded index"""
+        faiss = _faiss()
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = min(self.nprobe, index.nlist)
+        elif isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.ef_search
+
+
+def apply_index_config(vector_store, config: VectorIndexConfig):
+    """
+    Convert a freshly built flat store to the configured index type, or apply
+    the search parameters to one loaded from the index cache.
+    """
+    faiss = _faiss()
+    index = vector_store.index
+    if isinstance(index, faiss.IndexFlat) and config.index_type_for(index.ntotal) != "flat":
+        # Row order is kept, so index_to_docstore_id stays valid
+        vector_store.index = config.build(index.reconstruct_n(0, index.ntotal), index.metric_type)
+    else:
+        config.configure(index)
+    return vector_store
+
+
+def describe_index(index) -> dict:
+    faiss = _faiss()
+    description = {"type": "flat", "vectors": index.ntotal}
+    if isinstance(index, faiss.IndexIVF):
+        description.update(type="ivf", nlist=index.nlist, nprobe=index.nprobe)
+    elif isinstance(index, faiss.IndexHNSW):
+        description.update(type="hnsw", m=index.hnsw.nb_neighbors(1), ef_search=index.hnsw.efSearch)
+    return description
+
+
+def prepare_deletion(vector_store, ids: List[str]) -> Callable[[], None]:
+    """
+    Stage `vector_store.delete(ids)` for any index type; calling the returned
+    function applies it. HNSW graphs cannot drop nodes, so for them the
+    remaining vectors are added to a new graph here, and the commit only swaps
+    it in. Callers can therefore build it before taking the store's write lock,
+    provided nothing else writes to the store in between.
+    """
+    faiss = _faiss()
+    index = vector_store.index
+    if not isinstance(index, faiss.IndexHNSW):
+        return lambda: vector_store.delete(ids)
+
+    mapping = vector_store.index_to_docstore_id
+    missing = set(ids).difference(mapping.values())
+    if missing:
+        raise ValueError(f"Some specified ids do not exist in the current store. Ids not found: {missing}")
+    dropped = set(ids)
+    kept = np.fromiter((i for i in range(index.ntotal) if mapping[i] not in dropped), dtype=np.int64)
+    rebuilt = faiss.IndexHNSWFlat(index.d, index.hnsw.nb_neighbors(1), index.metric_type)
+    rebuilt.hnsw.efConstruction = index.hnsw.efConstruction
+    rebuilt.hnsw.efSearch = index.hnsw.efSearch
+    if len(kept):
+        rebuilt.add(index.reconstruct_batch(kept))
+    # Same renumbering as FAISS.delete: survivors keep their order, packed from 0
+    remaining = {i: mapping[int(old)] for i, old in enumerate(kept)}
+
+    def commit():
+        vector_store.index = rebuilt
+        vector_store.index_to_docstore_id = remaining
+        vector_store.docstore.delete(ids)
+
+    return commit
+
+
+def delete_vectors(vector_store, ids: List[str]):
+    """`vector_store.delete(ids)` for any index type; see prepare_deletion"""
+    prepare_deletion(vector_store, ids)()
+
+
+def selector_search(index, query: np.ndarray, k: int, faiss_ids: Sequence[int]):
+    """
+    Exact k-NN among `faiss_ids` only. IVF scans every list for them and HNSW
+    searches its flat vector storage; a graph walk restricted to a small
+    subset would miss most of it.
+    """
+    faiss = _faiss()
+    selector = faiss.IDSelectorBatch(np.asarray(faiss_ids, dtype=np.int64))
+    if isinstance(index, faiss.IndexIVF):
+        return index.search(query, k, params=faiss.SearchParametersIVF(sel=selector, nprobe=index.nlist))
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+    return index.search(query, k, params=faiss.SearchParameters(sel=selector))
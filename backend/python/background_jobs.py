@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class BackgroundJobs:
+    """
+    Runs callables on a small thread pool and keeps their results for polling by id.
+
+    At most `max_jobs` jobs are retained (oldest dropped first), and finished
+    jobs expire `ttl_seconds` after completion, so clients that never poll do
+    not grow memory without bound.
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 1000, ttl_seconds: float = 600.0, name: str = "background-job"):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls, prefix: str, **kwargs) -> "BackgroundJobs":
+        """<prefix>_WORKERS, <prefix>_MAX_JOBS and <prefix>_TTL_SECONDS override the defaults"""
+        return cls(
+            max_workers=int(os.getenv(f"{prefix}_WORKERS", "2")),
+            max_jobs=int(os.getenv(f"{prefix}_MAX_JOBS", "1000")),
+            ttl_seconds=float(os.getenv(f"{prefix}_TTL_SECONDS", "600")),
+            **kwargs,
+        )
+
+    def submit(self, fn: Callable[..., Any], *args) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._jobs[job_id] = {"id": job_id, "status": PENDING, "result": None, "error": None, "finished_at": None}
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+                self.evicted += 1
+            self.submitted += 1
+        self._executor.submit(self._run, job_id, fn, args)
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable[..., Any], args: tuple):
+        self._update(job_id, status=RUNNING)
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self._update(job_id, status=FAILED, error=str(e), finished_at=time.monotonic())
+            with self._lock:
+                self.failed += 1
+            return
+        self._update(job_id, status=DONE, result=result, finished_at=time.monotonic())
+        with self._lock:
+            self.completed += 1
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            # Evicted while running: the result has nowhere to go
+            if job is not None:
+                job.update(fields)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """The job's status, result and error, or None if it is unknown or expired"""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if key != "finished_at"}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "jobs": len(self._jobs),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "evicted": self.evicted,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
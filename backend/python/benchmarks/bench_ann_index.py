@@ -0,0 +1,101 @@
+"""
+Recall vs. latency of the vector index types in ann_index.py, measured
+against the exact flat index, to pick VECTOR_INDEX / IVF_NPROBE /
+HNSW_EF_SEARCH with evidence.
+
+Run from backend/python:
+    python -m benchmarks.bench_ann_index [--courses 100000] [--dim 384] [--queries 500]
+    python -m benchmarks.bench_ann_index --vectors embeddings.npy [--query-vectors queries.npy]
+
+Without --vectors the catalog is synthetic: unit vectors scattered around
+random topic centroids, which is kinder to IVF/HNSW than uniform noise but
+still harder than real course embeddings. Pass real embeddings (e.g. the
+course index's vectors saved with np.save) for numbers to act on.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from ann_index import VectorIndexConfig
+
+NPROBES = (1, 4, 16, 64)
+EF_SEARCHES = (16, 32, 64, 128)
+
+
+def clustered_vectors(rng: np.random.Generator, count: int, dim: int, topics: int, noise: float = 1.4) -> np.ndarray:
+    """Unit vectors around `topics` unit centroids; `noise` is the expected norm of each offset"""
+    centroids = rng.standard_normal((topics, dim), dtype=np.float32)
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+    offsets = rng.standard_normal((count, dim), dtype=np.float32) * (noise / np.sqrt(dim))
+    vectors = centroids[rng.integers(0, topics, count)] + offsets
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray, k: int):
+    latencies = []
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        _, found[i:i + 1] = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - started)
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    return recall, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--vectors", help=".npy file of catalog embeddings (rows = courses)")
+    parser.add_argument("--query-vectors", help=".npy file of query embeddings; default: perturbed catalog rows")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    if args.vectors:
+        vectors = np.load(args.vectors).astype(np.float32)
+    else:
+        vectors = clustered_vectors(rng, args.courses, args.dim, args.topics)
+    if args.query_vectors:
+        queries = np.load(args.query_vectors).astype(np.float32)[:args.queries]
+    else:
+        picks = vectors[rng.integers(0, len(vectors), args.queries)]
+        queries = picks + 0.05 * rng.standard_normal(picks.shape, dtype=np.float32)
+    count, dim = vectors.shape
+
+    rows = []
+    started = time.perf_counter()
+    flat = VectorIndexConfig("flat").build(vectors)
+    flat_build = time.perf_counter() - started
+    _, truth = flat.search(queries, args.k)
+    rows.append(("flat", "-", flat_build, *measure(flat, queries, truth, args.k)))
+
+    ivf_config = VectorIndexConfig("ivf", min_vectors=0)
+    started = time.perf_counter()
+    ivf = ivf_config.build(vectors)
+    ivf_build = time.perf_counter() - started
+    for nprobe in NPROBES:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+        rows.append((f"ivf nlist={ivf.nlist}", f"nprobe={ivf.nprobe}", ivf_build, *measure(ivf, queries, truth, args.k)))
+
+    started = time.perf_counter()
+    hnsw = VectorIndexConfig("hnsw", min_vectors=0, hnsw_m=args.hnsw_m).build(vectors)
+    hnsw_build = time.perf_counter() - started
+    for ef_search in EF_SEARCHES:
+        hnsw.hnsw.efSearch = ef_search
+        rows.append((f"hnsw M={args.hnsw_m}", f"efSearch={ef_search}", hnsw_build, *measure(hnsw, queries, truth, args.k)))
+
+    print(f"{count} vectors, dim {dim}, {len(queries)} queries, recall@{args.k} vs. flat")
+    print(f"{'index':>16} {'search':>13} {'build s':>8} {'recall':>7} {'p50 ms':>7} {'p95 ms':>7}")
+    for name, search, build, recall, p50, p95 in rows:
+        print(f"{name:>16} {search:>13} {build:>8.1f} {recall:>7.3f} {p50:>7.3f} {p95:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
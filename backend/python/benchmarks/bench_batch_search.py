@@ -0,0 +1,51 @@
+"""
+Throughput of per-query search vs. batched sparse-matrix search.
+
+Run from backend/python:
+    python -m benchmarks.bench_batch_search [--sizes 1000 10000 100000] [--queries 1000]
+"""
+import argparse
+import time
+
+from search_index import CourseSearchIndex, RANKING_MODES
+from benchmarks.synthetic_catalog import synthetic_catalog, synthetic_queries
+
+
+def run(size: int, query_count: int, mode: str) -> dict:
+    index = CourseSearchIndex(synthetic_catalog(size))
+    queries = synthetic_queries(query_count)
+
+    start = time.perf_counter()
+    single = [index.search(query, limit=3, mode=mode) for query in queries]
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = index.search_batch(queries, limit=3, mode=mode)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "courses": size,
+        "mode": mode,
+        "single_qps": query_count / single_seconds,
+        "batch_qps": query_count / batch_seconds,
+        "speedup": single_seconds / batch_seconds,
+        "identical": single == batched,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--modes", nargs="+", default=list(RANKING_MODES), choices=RANKING_MODES)
+    args = parser.parse_args()
+
+    print(f"{'courses':>9} {'mode':>7} {'single q/s':>11} {'batch q/s':>11} {'speedup':>8} identical")
+    for size in args.sizes:
+        for mode in args.modes:
+            r = run(size, args.queries, mode)
+            print(f"{r['courses']:>9} {r['mode']:>7} {r['single_qps']:>11.0f} {r['batch_qps']:>11.0f} {r['speedup']:>7.1f}x {r['identical']}")
+
+
+if __name__ == "__main__":
+    main()
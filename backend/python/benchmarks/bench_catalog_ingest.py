@@ -0,0 +1,81 @@
+"""
+Load time and peak RSS of building the keyword indexes from an NDJSON catalog,
+materialized as one list of dicts vs. streamed in validated chunks.
+
+Run from backend/python:
+    python -m benchmarks.bench_catalog_ingest [--sizes 100000 1000000] [--chunk-size 1000]
+
+Each load runs in a fresh subprocess so peak RSS is measured per strategy.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from catalog import CompiledCatalog
+from catalog_stream import CatalogIngest, iter_ndjson_lines, peak_rss_mb, validate_course
+from search_index import CourseSearchIndex
+from benchmarks.synthetic_catalog import iter_synthetic_courses
+
+STRATEGIES = ("list", "stream")
+
+
+def write_ndjson(path: str, size: int):
+    with open(path, "w", encoding="utf-8") as f:
+        for course in iter_synthetic_courses(size):
+            f.write(json.dumps(course))
+            f.write("\n")
+
+
+def load(strategy: str, path: str, chunk_size: int) -> dict:
+    """Build CompiledCatalog + CourseSearchIndex from `path`; runs inside the worker process"""
+    started = time.perf_counter()
+    ingest = CatalogIngest(chunk_size=chunk_size)
+    catalog, index = CompiledCatalog(), CourseSearchIndex()
+    if strategy == "list":
+        # The whole catalog parsed up front and handed over as one chunk
+        courses = [validate_course(json.loads(line)) for _, line in iter_ndjson_lines(path)]
+        report = ingest.run([courses], [catalog.extend, index.extend])
+    else:
+        report = ingest.run(ingest.ndjson_chunks(path), [catalog.extend, index.extend])
+    index.finalize()
+    report["seconds"] = time.perf_counter() - started
+    report["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return report
+
+
+def run_worker(strategy: str, path: str, chunk_size: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_catalog_ingest", "--worker", strategy, path, "--chunk-size", str(chunk_size)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--worker", nargs=2, metavar=("STRATEGY", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        strategy, path = args.worker
+        print(json.dumps(load(strategy, path, args.chunk_size)))
+        return
+
+    print(f"{'courses':>9} {'strategy':>8} {'seconds':>8} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = os.path.join(directory, f"catalog-{size}.ndjson")
+            write_ndjson(path, size)
+            for strategy in STRATEGIES:
+                r = run_worker(strategy, path, args.chunk_size)
+                print(f"{r['courses']:>9} {strategy:>8} {r['seconds']:>8.2f} {r['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Throughput and latency of per-call query embedding vs. the micro-batching scheduler.
+
+Run from backend/python:
+    python -m benchmarks.bench_embedding_batcher [--model simulated|minilm] [--concurrency 1 8 32]
+
+The simulated model charges a fixed per-call cost plus a smaller per-item
+cost and serializes calls on one lock, like a single CPU inference engine.
+Use --model minilm to measure the real sentence-transformers model.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from embedding_batcher import MicroBatchingEmbeddings
+from benchmarks.synthetic_catalog import synthetic_queries
+
+
+class SimulatedEmbeddings(Embeddings):
+    """Stand-in model: fixed_ms per forward pass + per_item_ms per input, one pass at a time"""
+
+    def __init__(self, fixed_ms: float = 4.0, per_item_ms: float = 0.25, dimensions: int = 384):
+        self.fixed = fixed_ms / 1000.0
+        self.per_item = per_item_ms / 1000.0
+        self.dimensions = dimensions
+        self._device = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._device:
+            time.sleep(self.fixed + self.per_item * len(texts))
+        return [[float(len(text) % 7)] * self.dimensions for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def load_model(name: str) -> Embeddings:
+    if name == "minilm":
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    return SimulatedEmbeddings()
+
+
+def drive(embeddings: Embeddings, queries: List[str], concurrency: int) -> dict:
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def call(query: str):
+        start = time.perf_counter()
+        embeddings.embed_query(query)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, queries))
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "throughput": len(queries) / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=["simulated", "minilm"], default="simulated")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    base = load_model(args.model)
+    batched = MicroBatchingEmbeddings(base, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    # Distinct queries: this measures the model path, not the embedding cache
+    queries = [f"{query} #{i}" for i, query in enumerate(synthetic_queries(args.queries))]
+
+    print(f"{'concurrency':>11} {'mode':>8} {'q/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for concurrency in args.concurrency:
+        for mode, embeddings in (("batch=1", base), ("batched", batched)):
+            r = drive(embeddings, queries, concurrency)
+            print(f"{concurrency:>11} {mode:>8} {r['throughput']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+    print(f"scheduler: {batched.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Recall@k and latency of filtered top-k vector search at different filter
+selectivities: searching k and filtering afterwards (what the services did)
+vs. FilteredVectorSearch's adaptive over-fetch / IDSelector search.
+
+Run from backend/python:
+    python -m benchmarks.bench_filtered_search [--courses 100000] [--dim 384] [--queries 200]
+
+Vectors are random unit vectors in a flat inner-product index; filters are
+random subsets of the catalog. Ground truth is an exact search over the
+matching vectors only.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from catalog import CompiledCatalog
+from vector_search import FilteredVectorSearch
+from benchmarks.synthetic_catalog import iter_synthetic_courses
+
+SELECTIVITIES = (0.5, 0.1, 0.02, 0.005, 0.001)
+
+
+def build_store(courses: int, dim: int, seed: int):
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    catalog = CompiledCatalog(iter_synthetic_courses(courses, seed=seed))
+    vectors = np.random.default_rng(seed).standard_normal((courses, dim), dtype=np.float32)
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatIP(dim)
+    index.add(vectors)
+    store = FAISS(
+        embedding_function=None,
+        index=index,
+        docstore=InMemoryDocstore({}),
+        index_to_docstore_id=dict(enumerate(catalog.ids)),
+    )
+    return catalog, store
+
+
+def random_bitmap(rng: np.random.Generator, courses: int, selectivity: float) -> int:
+    mask = rng.random(courses) < selectivity
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def post_filter(store, catalog: CompiledCatalog, query: np.ndarray, k: int, bitmap: int):
+    _, found = store.index.search(query[None, :], k)
+    members = catalog.members(bitmap)
+    return [catalog.ids[i] for i in found[0] if i in members]
+
+
+def percentile_ms(samples, q: float) -> float:
+    return float(np.percentile(samples, q)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    catalog, store = build_store(args.courses, args.dim, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"{args.courses} courses, dim {args.dim}, k={args.k}, {args.queries} queries per row")
+    print(f"{'selectivity':>11} {'strategy':>10} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for selectivity in SELECTIVITIES:
+        bitmap = random_bitmap(rng, args.courses, selectivity)
+        searcher = FilteredVectorSearch(store, catalog)
+        # Exact filtered top k to score both strategies against
+        truth = [searcher._selector_search(query[None, :], args.k, bitmap) for query in queries]
+        catalog.members(bitmap)
+
+        strategies = {
+            "postfilter": lambda query: post_filter(store, catalog, query, args.k, bitmap),
+            "filtered": lambda query: searcher.search(query, args.k, bitmap),
+        }
+        for name, search in strategies.items():
+            latencies, found = [], 0
+            for query, expected in zip(queries, truth):
+                started = time.perf_counter()
+                result = search(query)
+                latencies.append(time.perf_counter() - started)
+                found += len(set(result) & set(expected))
+            recall = found / max(sum(len(expected) for expected in truth), 1)
+            print(f"{selectivity:>11.3f} {name:>10} {recall:>9.3f} {percentile_ms(latencies, 50):>8.2f} {percentile_ms(latencies, 95):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
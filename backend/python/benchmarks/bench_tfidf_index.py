@@ -0,0 +1,79 @@
+"""
+TF-IDF retrieval at catalog scale: full argsort vs. argpartition top-k,
+one query at a time vs. one batched sparse product, and the cost of adding
+courses to a fitted vocabulary (refit) vs. appending them, both in one add
+and as --add separate one-course adds like catalog sync makes.
+
+Run from backend/python:
+    python -m benchmarks.bench_tfidf_index [--courses 100000] [--queries 256] [--batch-size 32]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from catalog import course_document_text
+from tfidf_index import TfidfIndex, top_k
+from benchmarks.synthetic_catalog import iter_synthetic_courses
+
+QUERIES = [
+    "learn react frontend development", "python data science for beginners", "solidity smart contracts",
+    "nft digital art marketing", "defi finance fundamentals", "figma ux design prototype",
+]
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def argsort_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    return np.argsort(scores)[::-1][:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--courses", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--add", type=int, default=1000, help="courses added after the initial build")
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = [course_document_text(course) for course in iter_synthetic_courses(args.courses + args.add)]
+    base, added = texts[:args.courses], texts[args.courses:]
+    queries = [QUERIES[i % len(QUERIES)] + f" {i}" for i in range(args.queries)]
+
+    print(f"{args.courses} courses, {args.queries} queries, k={args.k}")
+    for mode in ("tfidf", "hashing"):
+        index = TfidfIndex(mode=mode)
+        build = timed(index.add, base)
+
+        # Adding courses: the fitted vocabulary has to be refit to pick up new terms; appending keeps it
+        if mode == "tfidf":
+            refit = timed(lambda: TfidfIndex(mode=mode).add(base + added))
+            print(f"\n[{mode}] build {build:.2f}s, refit with {args.add} more courses {refit:.3f}s")
+        else:
+            print(f"\n[{mode}] build {build:.2f}s")
+        batch = TfidfIndex(mode=mode)
+        batch.add(base)
+        appended = timed(batch.add, added)
+        one_by_one = timed(lambda: [index.add([text]) for text in added])
+        print(f"  append {args.add} courses in one add {appended:.3f}s, "
+              f"as {args.add} adds {one_by_one:.3f}s ({index.stats()['blocks']} blocks)")
+
+        scores = index.scores(queries[:1]).toarray()[0]
+        for name, select in (("argsort", argsort_top_k), ("argpartition", top_k)):
+            per_query = min(timed(select, scores, args.k) for _ in range(20))
+            print(f"  top-{args.k} {name:>12} (dense row): {per_query * 1000:8.3f} ms")
+
+        single = timed(lambda: [index.top_k([q], args.k) for q in queries])
+        batched = timed(lambda: [
+            index.top_k(queries[i:i + args.batch_size], args.k) for i in range(0, len(queries), args.batch_size)
+        ])
+        print(f"  {'one query per product':>24}: {single / len(queries) * 1000:8.3f} ms/query")
+        print(f"  {f'batches of {args.batch_size}':>24}: {batched / len(queries) * 1000:8.3f} ms/query")
+
+if __name__ == "__main__":
+    main()
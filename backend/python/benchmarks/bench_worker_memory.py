@@ -0,0 +1,211 @@
+"""
+Memory of a multi-worker study_along_chatbot: `uvicorn --workers N` (every
+worker imports the app and loads its own catalog, keyword index, embedding
+model and vibe profiler) vs. prefork.py (loaded once, then forked).
+
+Run from backend/python:
+    python -m benchmarks.bench_worker_memory [--workers 4] [--catalog-size 100000]
+        [--modes spawn prefork] [--requests 300] [--fake-models] [--mmap]
+
+Reported for every process of the service, after warmup and --requests
+requests: RSS, PSS (each shared page divided among the processes mapping
+it), shared and private memory, read from /proc/<pid>/smaps_rollup. The sum
+of PSS is what the service costs; summed RSS counts shared pages once per
+worker. Linux only.
+
+The real embedding model is loaded by default, so it has to be in the
+Hugging Face cache; --fake-models uses benchmarks/fakes.py instead, which
+leaves the model weights out of the comparison.
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+from catalog_stream import process_memory_mb
+from benchmarks.synthetic_catalog import iter_synthetic_courses, synthetic_queries, synthetic_vibe_descriptions
+
+MODES = ("spawn", "prefork")
+
+
+def __getattr__(name: str):
+    # `benchmarks.bench_worker_memory:app` is the import string uvicorn's spawned workers load
+    if name == "app":
+        return load_study_app().app
+    raise AttributeError(name)
+
+
+def load_study_app():
+    if os.getenv("BENCH_FAKE_MODELS") == "1":
+        from benchmarks.fakes import install_fakes
+
+        install_fakes()
+    import study_along_chatbot
+
+    return study_along_chatbot
+
+
+def serve(mode: str, workers: int, port: int):
+    if mode == "spawn":
+        import uvicorn
+
+        uvicorn.run("benchmarks.bench_worker_memory:app", host="127.0.0.1", port=port, workers=workers, log_level="warning")
+        return
+    from prefork import serve as prefork_serve
+
+    service = load_study_app()
+    prefork_serve(service.app, "127.0.0.1", port, workers, preload=service.warm_vibe_profiler, log_level="warning")
+
+
+def process_tree(pid: int) -> List[int]:
+    """`pid` and all of its descendants"""
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except OSError:
+        return pids
+    for child in children:
+        pids.extend(process_tree(child))
+    return pids
+
+
+def get_json(url: str, body: Optional[dict] = None) -> Optional[dict]:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read() or b"null")
+    except (urllib.error.URLError, ConnectionError, json.JSONDecodeError):
+        return None
+
+
+def wait_for_workers(url: str, workers: int, timeout: float) -> Dict[int, dict]:
+    """Poll readiness until `workers` distinct workers report the vibe profiler loaded (or failed)"""
+    warm: Dict[int, dict] = {}
+    deadline = time.monotonic() + timeout
+    while len(warm) < workers:
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Only {len(warm)} of {workers} workers warmed up within {timeout:.0f}s")
+        ready = get_json(url + "/health/ready")
+        if ready and ready.get("engines", {}).get("vibe_profiler", {}).get("status") in ("ready", "failed"):
+            warm[ready["process"]["pid"]] = ready["engines"]["vibe_profiler"]
+        else:
+            time.sleep(0.2)
+    return warm
+
+
+def send_traffic(url: str, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    queries = synthetic_queries(50, seed=seed)
+    descriptions = synthetic_vibe_descriptions(50, seed=seed)
+    for i in range(count):
+        if i % 2:
+            get_json(url + "/get-study-vibe-profile", {"user_id": f"bench-{i}", "description": rng.choice(descriptions)})
+        else:
+            get_json(url + "/courserecommendations", {"query": rng.choice(queries), "level": rng.choice([None, "beginner"])})
+
+
+def measure_mode(mode: str, args, env: dict, port: int) -> dict:
+    command = [sys.executable, "-m", "benchmarks.bench_worker_memory", "--serve", mode, str(args.workers), str(port)]
+    log_path = os.path.join(os.path.dirname(env["INDEX_CACHE_DIR"]), f"{mode}.log")
+    url = f"http://127.0.0.1:{port}"
+    started = time.monotonic()
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        warm = wait_for_workers(url, args.workers, args.timeout)
+        warmup_seconds = time.monotonic() - started
+        send_traffic(url, args.requests)
+        processes = []
+        for pid in process_tree(server.pid):
+            memory = process_memory_mb(pid)
+            if memory is not None:
+                role = "worker" if pid in warm else ("launcher" if pid == server.pid else "helper")
+                processes.append({"pid": pid, "role": role, **memory})
+    except BaseException:
+        with open(log_path) as log:
+            print(log.read()[-4000:])
+        raise
+    finally:
+        server.send_signal(signal.SIGTERM)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "warmup_seconds": round(warmup_seconds, 2),
+        "vibe_profiler": sorted({engine["status"] for engine in warm.values()}),
+        "processes": processes,
+        "total_rss_mb": round(sum(p["rss_mb"] for p in processes), 1),
+        "total_pss_mb": round(sum(p["pss_mb"] for p in processes), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--catalog-size", type=int, default=100_000, help="synthetic courses; 0 for the bundled catalog")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--requests", type=int, default=300, help="requests sent before measuring")
+    parser.add_argument("--fake-models", action="store_true")
+    parser.add_argument("--mmap", action="store_true", help="memory-map cached FAISS indexes (INDEX_MMAP=1)")
+    parser.add_argument("--port", type=int, default=8711)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", help="JSON results path")
+    parser.add_argument("--serve", nargs=3, metavar=("MODE", "WORKERS", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        mode, workers, port = args.serve
+        serve(mode, int(workers), int(port))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        # Indexes built here (possibly from fake embeddings) must not land in the real index cache
+        env["INDEX_CACHE_DIR"] = os.path.join(directory, "index_cache")
+        env["LOG_LEVEL"] = env.get("LOG_LEVEL", "WARNING")
+        if args.fake_models:
+            env["BENCH_FAKE_MODELS"] = "1"
+        if args.mmap:
+            env["INDEX_MMAP"] = "1"
+        if args.catalog_size:
+            path = os.path.join(directory, "catalog.ndjson")
+            with open(path, "w", encoding="utf-8") as f:
+                for course in iter_synthetic_courses(args.catalog_size):
+                    f.write(json.dumps(course))
+                    f.write("\n")
+            env["CATALOG_NDJSON_PATH"] = path
+
+        for offset, mode in enumerate(args.modes):
+            result = measure_mode(mode, args, env, args.port + offset)
+            results.append(result)
+            print(f"\n{mode}: {args.workers} workers, warm after {result['warmup_seconds']:.1f}s, "
+                  f"vibe profiler {'/'.join(result['vibe_profiler'])}")
+            print(f"{'role':>9} {'pid':>8} {'RSS MB':>8} {'PSS MB':>8} {'shared MB':>10} {'private MB':>11}")
+            for p in result["processes"]:
+                print(f"{p['role']:>9} {p['pid']:>8} {p['rss_mb']:>8.1f} {p['pss_mb']:>8.1f} {p['shared_mb']:>10.1f} {p['private_mb']:>11.1f}")
+            print(f"{'total':>9} {'':>8} {result['total_rss_mb']:>8.1f} {result['total_pss_mb']:>8.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"catalog_size": args.catalog_size, "fake_models": args.fake_models, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
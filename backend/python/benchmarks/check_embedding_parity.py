@@ -0,0 +1,111 @@
+"""
+Top-k agreement between the fp32 (torch) and int8 (onnx-int8) embedding backends.
+
+Run from backend/python:
+    python -m benchmarks.check_embedding_parity [--k 3] [--min-top1 0.95] [--min-overlap 0.9]
+
+Embeds the course catalog (as the RAG retriever does) and the study vibe set
+with both backends, ranks each by cosine similarity for a fixed set of
+queries, and reports top-1 agreement and mean top-k overlap. Exits with
+status 1 when agreement falls below the thresholds.
+"""
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from catalog import course_document_text
+from course_database import COURSE_DATABASE
+from embedding_backends import load_embeddings
+from benchmarks.synthetic_catalog import synthetic_queries
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+COURSE_QUERIES = [
+    "I want to learn blockchain",
+    "web3 design for beginners",
+    "smart contracts with solidity",
+    "how does decentralized finance work",
+    "create and sell NFTs",
+    "blockchain for my company supply chain",
+    "user interface design",
+    "cryptography basics",
+]
+
+VIBE_QUERIES = [
+    "I study late at night with lofi music in short sprints",
+    "early riser, long sessions, classical music",
+    "I like relaxed afternoon study with ambient sounds",
+    "total silence, deep work until 2am",
+    "mornings with rain sounds and regular breaks",
+    "evening sessions with electronic music, flexible schedule",
+    "I get distracted easily and need breaks",
+    "I work best after dinner",
+]
+
+
+def vibe_documents() -> List[str]:
+    # Imported here: the service module is only needed for its vibe data
+    from study_along_chatbot import STUDY_VIBES_DATABASE
+
+    return [vibe["description"] for vibe in STUDY_VIBES_DATABASE]
+
+
+def normalized(vectors: List[List[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+
+def top_k(embeddings, documents: List[str], queries: List[str], k: int) -> np.ndarray:
+    docs = normalized(embeddings.embed_documents(documents))
+    qs = normalized([embeddings.embed_query(q) for q in queries])
+    return np.argsort(-(qs @ docs.T), axis=1, kind="stable")[:, :k]
+
+
+def compare(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    k = reference.shape[1]
+    top1 = float(np.mean(reference[:, 0] == candidate[:, 0]))
+    overlap = float(np.mean([len(set(r) & set(c)) / k for r, c in zip(reference, candidate)]))
+    return {"top1_agreement": top1, "topk_overlap": overlap}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--extra-queries", type=int, default=200, help="synthetic queries added to the course set")
+    parser.add_argument("--min-top1", type=float, default=0.95)
+    parser.add_argument("--min-overlap", type=float, default=0.9)
+    args = parser.parse_args()
+
+    corpora = {
+        "courses": ([course_document_text(c) for c in COURSE_DATABASE], COURSE_QUERIES + synthetic_queries(args.extra_queries)),
+        "vibes": (vibe_documents(), VIBE_QUERIES),
+    }
+
+    backends = {}
+    for backend in ("torch", "onnx-int8"):
+        start = time.perf_counter()
+        backends[backend] = load_embeddings(MODEL_NAME, backend=backend)
+        print(f"loaded {backend} in {time.perf_counter() - start:.2f}s")
+
+    failed = False
+    for name, (documents, queries) in corpora.items():
+        k = min(args.k, len(documents))
+        ranks = {}
+        for backend, embeddings in backends.items():
+            start = time.perf_counter()
+            ranks[backend] = top_k(embeddings, documents, queries, k)
+            print(f"{name}: {backend} embedded {len(documents)} docs + {len(queries)} queries in {time.perf_counter() - start:.2f}s")
+
+        result = compare(ranks["torch"], ranks["onnx-int8"])
+        ok = result["top1_agreement"] >= args.min_top1 and result["topk_overlap"] >= args.min_overlap
+        failed = failed or not ok
+        print(f"{name}: top-1 agreement {result['top1_agreement']:.3f}, top-{k} overlap {result['topk_overlap']:.3f} -> {'OK' if ok else 'FAIL'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Deterministic local stand-ins for the model dependencies, for load tests and
+benchmarks that must run offline:
+
+- FakeEmbeddings replaces HuggingFaceEmbeddings (sentence-transformers)
+- FakeChatModel replaces ChatGoogleGenerativeAI (Gemini)
+
+install_fakes() swaps them in before the services are imported.
+"""
+import asyncio
+import hashlib
+import re
+import threading
+import time
+from typing import Any, Iterator, AsyncIterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+ANSWER_WORDS = (
+    "this course covers the fundamentals you asked about and builds up to hands-on projects "
+    "start with the beginner material then move on to the advanced modules when ready"
+).split()
+
+
+def _stable_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Hashed bag-of-words vectors: texts sharing words are similar, so retrieval
+    and the semantic caches behave plausibly. Each call costs `fixed_ms` plus
+    `per_item_ms` per text and calls are serialized, like one CPU inference engine.
+    """
+
+    def __init__(self, dimensions: int = 384, fixed_ms: float = 5.0, per_item_ms: float = 0.5):
+        self.dimensions = dimensions
+        self.fixed = fixed_ms / 1000.0
+        self.per_item = per_item_ms / 1000.0
+        self._device = threading.Lock()
+
+    def _vector(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[_stable_hash(word) % self.dimensions] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._device:
+            time.sleep(self.fixed + self.per_item * len(texts))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that answers with `tokens` words picked deterministically from
+    the prompt, after `first_token_ms` and then `token_ms` per token. Calls run
+    concurrently, as requests to a remote API would.
+    """
+    first_token_ms: float = 400.0
+    token_ms: float = 15.0
+    tokens: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self, messages: List[BaseMessage]) -> List[str]:
+        seed = _stable_hash("".join(str(message.content) for message in messages))
+        words = [ANSWER_WORDS[(seed + i * 7) % len(ANSWER_WORDS)] for i in range(self.tokens)]
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep((self.first_token_ms + self.token_ms * self.tokens) / 1000.0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens(messages))))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep((self.first_token_ms + self.token_ms * self.tokens) / 1000.0)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens(messages))))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token_ms / 1000.0)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                time.sleep(self.token_ms / 1000.0)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token_ms / 1000.0)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                await asyncio.sleep(self.token_ms / 1000.0)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+def install_fakes(
+    embedding_ms: float = 5.0,
+    embedding_item_ms: float = 0.5,
+    llm_first_token_ms: float = 400.0,
+    llm_token_ms: float = 15.0,
+    llm_tokens: int = 40,
+):
+    """
+    Make embedding_backends.load_embeddings and langchain_google_genai.ChatGoogleGenerativeAI
+    return the fakes. Call before importing the services: the RAG service binds
+    load_embeddings at import time.
+    """
+    import embedding_backends
+    import langchain_google_genai
+
+    embeddings = FakeEmbeddings(fixed_ms=embedding_ms, per_item_ms=embedding_item_ms)
+    embedding_backends.load_embeddings = lambda model_name, backend=None: embeddings
+    langchain_google_genai.ChatGoogleGenerativeAI = lambda **kwargs: FakeChatModel(
+        first_token_ms=llm_first_token_ms, token_ms=llm_token_ms, tokens=llm_tokens
+    )
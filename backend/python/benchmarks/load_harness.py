@@ -0,0 +1,315 @@
+"""
+End-to-end load test of the RAG service (backend/onboarding_chat.py) and the
+study vibe service (study_along_chatbot.py) with the models replaced by the
+deterministic fakes in benchmarks/fakes.py, so it runs offline.
+
+Run from backend/python:
+    python -m benchmarks.load_harness [--concurrency 1 8 32] [--duration 20]
+        [--mix rag_recommend=4,rag_summary=1,rag_stream=1,vibe_profile=3,keyword_recommend=2]
+        [--llm-first-token-ms 400] [--llm-token-ms 15] [--embedding-ms 5] [--catalog-size 0]
+        [--mode uvicorn|inprocess] [--output results.json]
+
+--mode uvicorn (default) starts each app in its own uvicorn process and
+drives it over HTTP; --mode inprocess calls the ASGI apps directly, which is
+quicker to start but shares one event loop with the load generator (and
+buffers streamed responses, so time to first byte equals total latency).
+
+Each concurrency level runs `--duration` seconds of closed-loop traffic:
+every worker sends its next request as soon as the previous one finishes,
+picking the endpoint at random by --mix weight. Reports throughput, latency
+percentiles, time to first byte and error rate per endpoint.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic_catalog import iter_synthetic_courses, synthetic_queries, synthetic_vibe_descriptions
+
+# kind -> (app, path, whether the response is an SSE stream)
+REQUEST_KINDS: Dict[str, Tuple[str, str, bool]] = {
+    "rag_recommend": ("rag", "/courserecommendations", False),
+    "rag_summary": ("rag", "/courserecommendations", False),
+    "rag_stream": ("rag", "/courserecommendations/stream", True),
+    "vibe_profile": ("study", "/get-study-vibe-profile", False),
+    "keyword_recommend": ("study", "/courserecommendations", False),
+}
+DEFAULT_MIX = "rag_recommend=4,rag_summary=1,rag_stream=1,vibe_profile=3,keyword_recommend=2"
+APPS = ("rag", "study")
+
+# Engines each app warms in the background; traffic starts once they finished loading
+WARM_ENGINES = {"rag": ("retriever", "llm"), "study": ("keyword", "vibe_profiler")}
+
+COURSE_QUERIES = [
+    "I want to learn blockchain", "web3 design for beginners", "smart contracts with solidity",
+    "how does decentralized finance work", "create and sell NFTs", "user interface design",
+]
+LEVELS = [None, None, None, "beginner", "advanced"]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in REQUEST_KINDS:
+            raise SystemExit(f"Unknown request kind {kind!r}; expected one of {sorted(REQUEST_KINDS)}")
+        weights[kind.strip()] = float(weight or 1)
+    return weights
+
+
+def request_body(kind: str, rng: random.Random, queries: List[str], descriptions: List[str]) -> dict:
+    if kind == "vibe_profile":
+        return {"user_id": f"load-{rng.randrange(10_000)}", "description": rng.choice(descriptions)}
+    body = {"query": rng.choice(queries), "level": rng.choice(LEVELS)}
+    if kind == "rag_summary":
+        body["summary"] = "inline"
+    return body
+
+
+# --- Serving ---
+def fake_settings(args) -> dict:
+    return {
+        "embedding_ms": args.embedding_ms,
+        "embedding_item_ms": args.embedding_item_ms,
+        "llm_first_token_ms": args.llm_first_token_ms,
+        "llm_token_ms": args.llm_token_ms,
+        "llm_tokens": args.llm_tokens,
+    }
+
+
+def load_app(name: str, settings: dict):
+    """Install the fakes, then import the app; lifespan/warmup is left to the caller"""
+    from benchmarks.fakes import install_fakes
+
+    install_fakes(**settings)
+    if name == "rag":
+        from benchmarks.services import load_rag_service
+
+        return load_rag_service()
+    import study_along_chatbot
+
+    return study_along_chatbot
+
+
+def serve(name: str, port: int, settings: dict):
+    import uvicorn
+
+    uvicorn.run(load_app(name, settings).app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def service_env(args, directory: str) -> dict:
+    env = dict(os.environ)
+    # Indexes built from fake embeddings must never land in the real index cache
+    env["INDEX_CACHE_DIR"] = os.path.join(directory, "index_cache")
+    env.setdefault("GOOGLE_API_KEY", "load-harness")
+    if args.catalog_size:
+        path = os.path.join(directory, "catalog.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            for course in iter_synthetic_courses(args.catalog_size):
+                f.write(json.dumps(course))
+                f.write("\n")
+        env["CATALOG_NDJSON_PATH"] = path
+    return env
+
+
+def server_log(env: dict, name: str) -> str:
+    return env["INDEX_CACHE_DIR"] + f"-{name}.log"
+
+
+def start_servers(args, env: dict) -> Tuple[Dict[str, str], List[subprocess.Popen]]:
+    urls, processes = {}, []
+    for offset, name in enumerate(APPS):
+        port = args.port + offset
+        command = [sys.executable, "-m", "benchmarks.load_harness", "--serve", name, str(port)]
+        for key, value in fake_settings(args).items():
+            command += [f"--{key.replace('_', '-')}", str(value)]
+        with open(server_log(env, name), "w") as log:
+            processes.append(subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT))
+        urls[name] = f"http://127.0.0.1:{port}"
+    return urls, processes
+
+
+async def wait_until_warm(client, name: str, timeout: float = 180.0):
+    """Ready, and the optional engines (LLM, vibe profiler) finished loading, so no request hits a fallback"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get("/health/ready")
+            engines = response.json().get("engines", {})
+            warm = all(engines.get(engine, {}).get("status") in ("ready", "failed") for engine in WARM_ENGINES[name])
+            if response.status_code == 200 and warm:
+                return engines
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+    raise SystemExit(f"{name} did not become ready within {timeout:.0f}s")
+
+
+# --- Load generation ---
+async def send(client, kind: str, body: dict) -> Tuple[bool, float, float, int]:
+    """(ok, seconds to first byte, total seconds, status)"""
+    _, path, streamed = REQUEST_KINDS[kind]
+    started = time.perf_counter()
+    first_byte, last_chunk = None, b""
+    try:
+        async with client.stream("POST", path, json=body) as response:
+            async for last_chunk in response.aiter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+            status = response.status_code
+        total = time.perf_counter() - started
+        # A stream that ends with an error event failed even though it started with 200
+        ok = status < 400 and not (streamed and b"event: error" in last_chunk)
+        return ok, first_byte if first_byte is not None else total, total, status
+    except Exception:
+        return False, time.perf_counter() - started, time.perf_counter() - started, 0
+
+
+async def run_stage(clients: dict, weights: Dict[str, float], concurrency: int, duration: float, seed: int) -> dict:
+    kinds, kind_weights = list(weights), list(weights.values())
+    queries = COURSE_QUERIES + synthetic_queries(200)
+    descriptions = synthetic_vibe_descriptions(200)
+    samples: Dict[str, list] = {kind: [] for kind in kinds}
+    deadline = time.perf_counter() + duration
+
+    async def worker(worker_id: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        while time.perf_counter() < deadline:
+            kind = rng.choices(kinds, kind_weights)[0]
+            result = await send(clients[REQUEST_KINDS[kind][0]], kind, request_body(kind, rng, queries, descriptions))
+            samples[kind].append(result)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    report = {"concurrency": concurrency, "seconds": round(elapsed, 2), "endpoints": {}}
+    everything = [sample for kind in kinds for sample in samples[kind]]
+    for kind, kind_samples in list(samples.items()) + [("all", everything)]:
+        if kind_samples:
+            report["endpoints"][kind] = summarize(kind_samples, elapsed)
+    return report
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    ok = [s for s in samples if s[0]]
+    totals = np.asarray([s[2] for s in samples]) * 1000
+    first_bytes = np.asarray([s[1] for s in samples]) * 1000
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[str(sample[3])] = statuses.get(str(sample[3]), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "error_rate": round((len(samples) - len(ok)) / len(samples), 4),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(totals, 50)), 1),
+        "p90_ms": round(float(np.percentile(totals, 90)), 1),
+        "p99_ms": round(float(np.percentile(totals, 99)), 1),
+        "max_ms": round(float(totals.max()), 1),
+        "ttfb_p50_ms": round(float(np.percentile(first_bytes, 50)), 1),
+        "ttfb_p99_ms": round(float(np.percentile(first_bytes, 99)), 1),
+        "statuses": statuses,
+    }
+
+
+def print_stage(report: dict):
+    print(f"\nconcurrency {report['concurrency']} ({report['seconds']}s)")
+    print(f"{'endpoint':>18} {'reqs':>6} {'rps':>8} {'err %':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'ttfb p50':>9}")
+    for kind, r in report["endpoints"].items():
+        print(
+            f"{kind:>18} {r['requests']:>6} {r['throughput_rps']:>8.1f} {r['error_rate'] * 100:>6.1f} "
+            f"{r['p50_ms']:>8.1f} {r['p90_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['ttfb_p50_ms']:>9.1f}"
+        )
+
+
+async def drive(args, urls: Optional[Dict[str, str]], apps: Optional[dict]) -> List[dict]:
+    import httpx
+
+    weights = parse_mix(args.mix)
+    timeout = httpx.Timeout(args.timeout)
+    if apps is not None:
+        clients = {name: httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=timeout) for name, app in apps.items()}
+    else:
+        limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+        clients = {name: httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) for name, url in urls.items()}
+    try:
+        for name, client in clients.items():
+            engines = await wait_until_warm(client, name)
+            print(f"{name}: " + ", ".join(f"{engine} {e['status']}" for engine, e in engines.items()))
+        reports = []
+        for stage, concurrency in enumerate(args.concurrency):
+            report = await run_stage(clients, weights, concurrency, args.duration, args.seed + stage)
+            print_stage(report)
+            reports.append(report)
+        return reports
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="comma separated kind=weight")
+    parser.add_argument("--mode", choices=("uvicorn", "inprocess"), default="uvicorn")
+    parser.add_argument("--port", type=int, default=8701, help="first of two ports in uvicorn mode")
+    parser.add_argument("--catalog-size", type=int, default=0, help="serve a synthetic catalog of this many courses (0: bundled)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument("--embedding-ms", type=float, default=5.0, help="fake embedding cost per call")
+    parser.add_argument("--embedding-item-ms", type=float, default=0.5, help="fake embedding cost per text")
+    parser.add_argument("--llm-first-token-ms", type=float, default=400.0)
+    parser.add_argument("--llm-token-ms", type=float, default=15.0)
+    parser.add_argument("--llm-tokens", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the reports as JSON")
+    parser.add_argument("--serve", nargs=2, metavar=("APP", "PORT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        name, port = args.serve
+        serve(name, int(port), fake_settings(args))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = service_env(args, directory)
+        processes = []
+        try:
+            if args.mode == "uvicorn":
+                urls, processes = start_servers(args, env)
+                try:
+                    reports = asyncio.run(drive(args, urls, None))
+                except SystemExit:
+                    for name in APPS:
+                        with open(server_log(env, name)) as log:
+                            print(f"--- {name} server log ---\n" + "".join(log.readlines()[-20:]))
+                    raise
+            else:
+                os.environ.update(env)
+                modules = {name: load_app(name, fake_settings(args)) for name in APPS}
+                # No lifespan without a server: warm up as the background warmup threads would
+                modules["rag"].warm_rag_pipeline()
+                modules["study"].warm_vibe_profiler()
+                reports = asyncio.run(drive(args, None, {name: module.app for name, module in modules.items()}))
+        finally:
+            for process in processes:
+                process.terminate()
+                process.wait(timeout=10)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"settings": {k: v for k, v in vars(args).items() if k != "serve"}, "stages": reports}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import importlib.util
+import os
+import sys
+
+# The RAG service (backend/onboarding_chat.py) shares its module name with the
+# keyword service in backend/python, so it is loaded from its path
+RAG_SERVICE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "onboarding_chat.py"
+)
+
+
+def load_rag_service():
+    """Import backend/onboarding_chat.py as the module `rag_onboarding_chat`"""
+    spec = importlib.util.spec_from_file_location("rag_onboarding_chat", RAG_SERVICE_PATH)
+    service = importlib.util.module_from_spec(spec)
+    # Registered first so its classes can be pickled (e.g. into the index cache)
+    sys.modules[spec.name] = service
+    spec.loader.exec_module(service)
+    return service
@@ -0,0 +1,298 @@
+"""
+Micro-benchmark suite for the recommendation and vibe profiling hot paths.
+
+Run from backend/python:
+    python -m benchmarks.suite [--sizes 100 10000 100000 1000000] [--cases simple_search faiss_search]
+    python -m benchmarks.suite --compare benchmarks/results/baseline.json [--tolerance 1.2]
+
+Cases (catalogs are synthetic, generated from the COURSE_DATABASE schema):
+    simple_search           study_along_chatbot.simple_search, loaded from an NDJSON catalog
+    vibe_keyword_retriever  SimpleRetriever.get_relevant_documents over as many synthetic vibes
+    tfidf_retriever         SimpleTfidfRetriever.filtered_search (RAG service fallback)
+    faiss_search            FilteredVectorSearch over random unit vectors (query embedding excluded;
+                            see bench_embedding_batcher.py); honours VECTOR_INDEX and friends
+    vibe_profiler           VibeProfiler scoring and blending a batch of 256 descriptions against as many
+                            synthetic vibes (random unit vectors; query embedding excluded)
+    study_recommendations   generate_study_recommendations (independent of catalog size)
+
+Every case runs in a fresh subprocess, so setup time, RSS after setup and
+peak RSS belong to that case alone. Results are written as JSON (default
+benchmarks/results/suite-<timestamp>.json); --compare prints the ratio to a
+previous run and exits with status 1 when p50 latency or peak RSS grew by
+more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from catalog_stream import current_rss_mb, peak_rss_mb
+from benchmarks.synthetic_catalog import (
+    iter_synthetic_courses,
+    synthetic_queries,
+    synthetic_vibe_descriptions,
+    synthetic_vibes,
+)
+from benchmarks.services import load_rag_service
+
+DEFAULT_SIZES = [100, 10_000, 100_000, 1_000_000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Each measurement runs at least this many operations, even past the time budget
+MIN_OPS = 5
+
+# Descriptions per vibe_profiler operation, the service's default VIBE_BATCH_SIZE
+VIBE_BATCH = 256
+
+Case = Tuple[Callable, List]
+
+
+def _filters(count: int) -> List[Optional[str]]:
+    # Every third request filters by level, like the Recommendations page's level picker
+    levels = [None, None, "beginner"]
+    return [levels[i % len(levels)] for i in range(count)]
+
+
+def setup_simple_search(size: int, args) -> Case:
+    os.environ["CATALOG_NDJSON_PATH"] = args.ndjson
+    import study_along_chatbot
+
+    inputs = list(zip(synthetic_queries(args.queries), _filters(args.queries)))
+    return (lambda item: study_along_chatbot.simple_search(item[0], level=item[1])), inputs
+
+
+def setup_vibe_keyword_retriever(size: int, args) -> Case:
+    from study_along_chatbot import SimpleRetriever
+
+    retriever = SimpleRetriever(synthetic_vibes(size))
+    return retriever.get_relevant_documents, synthetic_vibe_descriptions(args.queries)
+
+
+def setup_tfidf_retriever(size: int, args) -> Case:
+    from catalog import CompiledCatalog
+
+    service = load_rag_service()
+    catalog = CompiledCatalog(iter_synthetic_courses(size))
+    retriever = service.SimpleTfidfRetriever(catalog, k=3)
+    inputs = [
+        (query, catalog.filter_bitmap(level=level) if level else None)
+        for query, level in zip(synthetic_queries(args.queries), _filters(args.queries))
+    ]
+    return (lambda item: retriever.filtered_search(*item)), inputs
+
+
+def setup_faiss_search(size: int, args) -> Case:
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.vectorstores import FAISS
+
+    from ann_index import VectorIndexConfig
+    from catalog import CompiledCatalog
+    from vector_search import FilteredVectorSearch
+
+    catalog = CompiledCatalog(iter_synthetic_courses(size))
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((size, args.dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = VectorIndexConfig.from_env().build(vectors)
+    del vectors
+    store = FAISS(
+        embedding_function=None,
+        index=index,
+        docstore=InMemoryDocstore({}),
+        index_to_docstore_id=dict(enumerate(catalog.ids)),
+    )
+    searcher = FilteredVectorSearch(store, catalog)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    inputs = [
+        (query, catalog.filter_bitmap(level=level) if level else None)
+        for query, level in zip(queries, _filters(args.queries))
+    ]
+    return (lambda item: searcher.search(item[0], 3, item[1])), inputs
+
+
+def setup_vibe_profiler(size: int, args) -> Case:
+    from vibe_profiler import VibeProfiler, normalize_rows
+
+    rng = np.random.default_rng(42)
+    profiler = VibeProfiler(synthetic_vibes(size), rng.standard_normal((size, args.dim), dtype=np.float32), embeddings=None)
+    batches = [
+        normalize_rows(rng.standard_normal((VIBE_BATCH, args.dim), dtype=np.float32))
+        for _ in range(max(1, args.queries // VIBE_BATCH))
+    ]
+    return (lambda queries: profiler.profile_scores(profiler.score(queries))), batches
+
+
+def setup_study_recommendations(size: int, args) -> Case:
+    from study_along_chatbot import STUDY_VIBES_DATABASE, generate_study_recommendations
+
+    vibes = STUDY_VIBES_DATABASE + synthetic_vibes(args.queries)
+    return (lambda vibe: generate_study_recommendations(vibe["vibe_tag"], vibe["parameters"])), vibes
+
+
+# name -> (setup, whether the case scales with catalog size)
+CASES: Dict[str, Tuple[Callable[..., Case], bool]] = {
+    "simple_search": (setup_simple_search, True),
+    "vibe_keyword_retriever": (setup_vibe_keyword_retriever, True),
+    "tfidf_retriever": (setup_tfidf_retriever, True),
+    "faiss_search": (setup_faiss_search, True),
+    "vibe_profiler": (setup_vibe_profiler, True),
+    "study_recommendations": (setup_study_recommendations, False),
+}
+
+
+def measure(case: str, size: Optional[int], args) -> dict:
+    """Set up one case and time its operation; runs inside the worker process"""
+    setup, _ = CASES[case]
+    started = time.perf_counter()
+    op, inputs = setup(size, args)
+    setup_seconds = time.perf_counter() - started
+    rss_after_setup = current_rss_mb()
+
+    op(inputs[0])
+    latencies = []
+    deadline = time.perf_counter() + args.budget_seconds
+    while len(latencies) < args.ops:
+        item = inputs[len(latencies) % len(inputs)]
+        started = time.perf_counter()
+        op(item)
+        latencies.append(time.perf_counter() - started)
+        if len(latencies) >= MIN_OPS and time.perf_counter() > deadline:
+            break
+
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "case": case,
+        "courses": size,
+        "setup_seconds": round(setup_seconds, 4),
+        "ops": len(latencies),
+        "mean_ms": round(float(latencies_ms.mean()), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "ops_per_second": round(len(latencies) / (latencies_ms.sum() / 1000), 1),
+        "rss_after_setup_mb": round(rss_after_setup, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def run_worker(case: str, size: Optional[int], ndjson: Optional[str], args) -> dict:
+    command = [
+        sys.executable, "-m", "benchmarks.suite", "--worker", case, str(size or 0),
+        "--queries", str(args.queries), "--ops", str(args.ops), "--budget-seconds", str(args.budget_seconds),
+        "--dim", str(args.dim),
+    ]
+    if ndjson:
+        command += ["--ndjson", ndjson]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def write_ndjson(path: str, size: int):
+    with open(path, "w", encoding="utf-8") as f:
+        for course in iter_synthetic_courses(size):
+            f.write(json.dumps(course))
+            f.write("\n")
+
+
+def environment() -> dict:
+    versions = {}
+    for module in ("numpy", "scipy", "sklearn", "faiss", "fastapi", "pydantic"):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versions": versions,
+        # Settings the cases read from the environment
+        "env": {key: os.environ[key] for key in sorted(os.environ) if key.startswith(("VECTOR_INDEX", "IVF_", "HNSW_", "TFIDF_", "SEARCH_"))},
+    }
+
+
+def compare(results: List[dict], baseline_path: str, tolerance: float) -> bool:
+    """Print current vs. baseline ratios; True if any case regressed beyond `tolerance`"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["case"], r["courses"]): r for r in json.load(f)["results"]}
+
+    regressed = False
+    print(f"\nvs. {baseline_path} (tolerance {tolerance:.2f}x)")
+    print(f"{'case':>24} {'courses':>9} {'p50':>7} {'peak RSS':>9}")
+    for result in results:
+        previous = baseline.get((result["case"], result["courses"]))
+        if previous is None:
+            continue
+        latency = result["p50_ms"] / previous["p50_ms"] if previous["p50_ms"] else 1.0
+        memory = result["peak_rss_mb"] / previous["peak_rss_mb"] if previous["peak_rss_mb"] else 1.0
+        flag = " REGRESSION" if latency > tolerance or memory > tolerance else ""
+        regressed = regressed or bool(flag)
+        print(f"{result['case']:>24} {result['courses'] or '-':>9} {latency:>6.2f}x {memory:>8.2f}x{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--queries", type=int, default=200, help="distinct inputs per case, cycled")
+    parser.add_argument("--ops", type=int, default=1000, help="operations timed per case")
+    parser.add_argument("--budget-seconds", type=float, default=10.0, help="stop timing a case after this long")
+    parser.add_argument("--dim", type=int, default=384, help="vector dimension for faiss_search and vibe_profiler")
+    parser.add_argument("--output", help="JSON results path")
+    parser.add_argument("--compare", metavar="BASELINE", help="previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=1.2)
+    parser.add_argument("--ndjson", help=argparse.SUPPRESS)
+    parser.add_argument("--worker", nargs=2, metavar=("CASE", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        case, size = args.worker
+        print(json.dumps(measure(case, int(size) or None, args)))
+        return
+
+    results = []
+    print(f"{'case':>24} {'courses':>9} {'setup s':>8} {'ops':>6} {'p50 ms':>9} {'p95 ms':>9} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        runs = [(case, None) for case in args.cases if not CASES[case][1]]
+        runs += [(case, size) for size in args.sizes for case in args.cases if CASES[case][1]]
+        for case, size in runs:
+            ndjson = None
+            if case == "simple_search":
+                ndjson = os.path.join(directory, f"catalog-{size}.ndjson")
+                if not os.path.exists(ndjson):
+                    write_ndjson(ndjson, size)
+            r = run_worker(case, size, ndjson, args)
+            results.append(r)
+            print(f"{case:>24} {size or '-':>9} {r['setup_seconds']:>8.2f} {r['ops']:>6} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['peak_rss_mb']:>12.1f}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": environment(),
+            "settings": {"queries": args.queries, "ops": args.ops, "budget_seconds": args.budget_seconds, "dim": args.dim},
+            "results": results,
+        }, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import random
+from typing import Iterator, List
+
+from course_database import COURSE_DATABASE
+
+LEVELS = ["BEGINNER", "INTERMEDIATE", "ADVANCED"]
+CATEGORIES = [
+    "BLOCKCHAIN", "DEVELOPMENT", "DESIGN", "FINANCE", "DIGITAL_ART", "BUSINESS",
+    "Web Development", "Data Science", "Machine Learning",
+]
+EXTRA_TERMS = [
+    "react", "javascript", "python", "figma", "solidity", "rust", "defi", "nft",
+    "analytics", "frontend", "backend", "security", "cloud", "testing", "ux", "ai",
+]
+
+# Vocabulary drawn from the real catalog so term statistics look familiar
+VOCABULARY = sorted({
+    word.strip(".,").lower()
+    for course in COURSE_DATABASE
+    for word in f"{course['title']} {course['description']}".split()
+} | set(EXTRA_TERMS))
+
+
+def iter_synthetic_courses(size: int, seed: int = 42) -> Iterator[dict]:
+    """Yield `size` courses that follow the COURSE_DATABASE schema"""
+    rng = random.Random(seed)
+    for i in range(size):
+        yield {
+            "id": f"synthetic-{i:07d}",
+            "title": " ".join(rng.choices(VOCABULARY, k=rng.randint(3, 6))).title(),
+            "description": " ".join(rng.choices(VOCABULARY, k=rng.randint(15, 30))).capitalize() + ".",
+            "price": round(rng.uniform(0, 200), 2),
+            "duration": rng.randint(1, 60),
+            "level": rng.choice(LEVELS),
+            "thumbnail": f"https://storage.ugrama.dev/courses/synthetic-{i}.jpg",
+            "category": rng.choice(CATEGORIES),
+            "educatorId": f"educator-{rng.randint(0, size // 10 + 1)}",
+            "published": rng.random() > 0.1,
+        }
+
+
+def synthetic_catalog(size: int, seed: int = 42) -> List[dict]:
+    """Build a synthetic catalog of `size` courses"""
+    return list(iter_synthetic_courses(size, seed))
+
+
+def synthetic_queries(count: int, seed: int = 7) -> List[str]:
+    """Short free-text queries in the style the Recommendations page sends"""
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(VOCABULARY, k=rng.randint(1, 4))) for _ in range(count)]
+
+
+# Study vibe parameters, as used by STUDY_VIBES_DATABASE in study_along_chatbot
+VIBE_SOUNDS = ["lofi", "classical", "ambient", "silence", "nature", "electronic"]
+VIBE_RHYTHMS = ["pomodoro", "marathon", "casual"]
+VIBE_TIMES = ["morning", "afternoon", "evening", "night"]
+VIBE_WORDS = [
+    "focused", "relaxed", "deep", "late", "early", "structured", "flexible", "sessions", "breaks",
+    "music", "learner", "studier", "coding", "review", "practice", "creative", "quiet", "sprints",
+]
+
+
+def synthetic_vibes(size: int, seed: int = 42) -> List[dict]:
+    """`size` study vibe profiles following the STUDY_VIBES_DATABASE schema"""
+    rng = random.Random(seed)
+    vibes = []
+    for i in range(size):
+        parameters = {"sound": rng.choice(VIBE_SOUNDS), "rhythm": rng.choice(VIBE_RHYTHMS), "time": rng.choice(VIBE_TIMES)}
+        words = rng.choices(VIBE_WORDS, k=rng.randint(12, 24)) + list(parameters.values())
+        rng.shuffle(words)
+        vibes.append({
+            "vibe_tag": f"{parameters['sound']}_{parameters['rhythm']}_{parameters['time']}_{i}",
+            "parameters": parameters,
+            "description": " ".join(words).capitalize() + ".",
+        })
+    return vibes
+
+
+def synthetic_vibe_descriptions(count: int, seed: int = 7) -> List[str]:
+    """Free-text self-descriptions in the style the onboarding vibe question collects"""
+    rng = random.Random(seed)
+    return [
+        f"I study in the {rng.choice(VIBE_TIMES)} with {rng.choice(VIBE_SOUNDS)} sounds, "
+        f"{rng.choice(VIBE_RHYTHMS)} style, {' '.join(rng.choices(VIBE_WORDS, k=3))}"
+        for _ in range(count)
+    ]
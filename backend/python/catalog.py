@@ -0,0 +1,260 @@
+import re
+from enum import Enum
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Level(str, Enum):
+    """Course levels, mirroring the Prisma `Level` enum"""
+    BEGINNER = "BEGINNER"
+    INTERMEDIATE = "INTERMEDIATE"
+    ADVANCED = "ADVANCED"
+
+
+def normalize_level(value: Optional[str]) -> Optional[Level]:
+    """Map 'Beginner', 'BEGINNER', ' beginner ' etc. to a Level, or None if unknown"""
+    if not value:
+        return None
+    try:
+        return Level(value.strip().upper())
+    except ValueError:
+        return None
+
+
+def normalize_category(value: Optional[str]) -> str:
+    """Map 'Web Development', 'web-development' and 'WEB_DEVELOPMENT' to one key"""
+    return re.sub(r"[\s\-_]+", "_", (value or "").strip()).upper()
+
+
+def course_document_text(course: dict) -> str:
+    """Text embedded for a course by the vector and TF-IDF retrievers"""
+    return (
+        f"Title: {course['title']}. Description: {course['description']}. "
+        f"Level: {course['level']}. Category: {course['category']}."
+    )
+
+
+class PreparedCourses(NamedTuple):
+    """Courses read and encoded by CompiledCatalog.prepare, not yet in the catalog"""
+    # One list per catalog column, in CompiledCatalog._columns order
+    columns: Tuple[list, ...]
+    # Bitmaps relative to the first prepared course
+    level_bits: Dict[Level, int]
+    category_bits: Dict[str, int]
+    live: int
+
+
+class CompiledCatalog:
+    """
+    Struct-of-arrays view of the course catalog.
+
+    Each course field is stored as its own column, alongside normalized
+    level/category codes. Bitmaps (Python ints, bit i = course i) per level
+    and per category let filters be combined with a single AND before any
+    scoring happens.
+
+    Positions are append-only: `append` adds a course at the end and `remove`
+    clears its bits from `live_bitmap`, so positions held by search indexes
+    stay valid while the catalog changes.
+
+    With an `encoder`, every course is also kept as the JSON fragment it
+    returns (see course_json.py), encoded once as the course is added.
+    """
+
+    def __init__(self, courses: Iterable[dict] = (), version: int = 1, encoder: Optional[Callable[[dict], bytes]] = None):
+        self.size = 0
+        # Bumped whenever the catalog contents change; response caches key on it
+        self.version = version
+
+        self.ids: List[str] = []
+        self.titles: List[str] = []
+        self.descriptions: List[str] = []
+        self.prices: List[float] = []
+        self.durations: List[int] = []
+        self.levels: List[str] = []
+        self.thumbnails: List[str] = []
+        self.categories: List[str] = []
+        self.educator_ids: List[str] = []
+        self.published: List[bool] = []
+        self.encoder = encoder
+        self.json_fragments: List[bytes] = []
+
+        # Normalized enums (None = level outside the Prisma enum)
+        self.level_codes: List[Optional[Level]] = []
+        self.category_codes: List[str] = []
+
+        self.level_bitmaps: Dict[Level, int] = {level: 0 for level in Level}
+        self.category_bitmaps: Dict[str, int] = {}
+        self.live_bitmap = 0
+        # Course id -> position of its live copy
+        self.positions: Dict[str, int] = {}
+
+        self.extend(courses)
+
+        self.members = lru_cache(maxsize=64)(self._members)
+
+    @property
+    def live_count(self) -> int:
+        return len(self.positions)
+
+    def is_live(self, i: int) -> bool:
+        return self.positions.get(self.ids[i]) == i
+
+    def _columns(self) -> Tuple[list, ...]:
+        return (self.ids, self.titles, self.descriptions, self.prices, self.durations, self.levels,
+                self.thumbnails, self.categories, self.educator_ids, self.published,
+                self.json_fragments, self.level_codes, self.category_codes)
+
+    def prepare(self, courses: Iterable[dict]) -> PreparedCourses:
+        """
+        Read and encode courses into columns and chunk-relative bitmaps without
+        touching the catalog; raises on a bad course, leaving the catalog unchanged.
+        `commit` then appends them.
+        """
+        ids, titles, descriptions, prices, durations = [], [], [], [], []
+        levels, thumbnails, categories, educator_ids, published = [], [], [], [], []
+        fragments: List[bytes] = []
+        level_codes: List[Optional[Level]] = []
+        category_codes: List[str] = []
+        live = 0
+        level_bits: Dict[Level, int] = {}
+        category_bits: Dict[str, int] = {}
+        for offset, course in enumerate(courses):
+            if self.encoder is not None:
+                fragments.append(self.encoder(course))
+            ids.append(course["id"])
+            titles.append(course["title"])
+            descriptions.append(course["description"])
+            prices.append(course["price"])
+            durations.append(course["duration"])
+            levels.append(course["level"])
+            thumbnails.append(course["thumbnail"])
+            categories.append(course["category"])
+            educator_ids.append(course["educatorId"])
+            published.append(course["published"])
+
+            level = normalize_level(course["level"])
+            category = normalize_category(course["category"])
+            level_codes.append(level)
+            category_codes.append(category)
+
+            bit = 1 << offset
+            if level is not None:
+                level_bits[level] = level_bits.get(level, 0) | bit
+            category_bits[category] = category_bits.get(category, 0) | bit
+            live |= bit
+
+        columns = (ids, titles, descriptions, prices, durations, levels, thumbnails, categories,
+                   educator_ids, published, fragments, level_codes, category_codes)
+        return PreparedCourses(columns, level_bits, category_bits, live)
+
+    def commit(self, prepared: PreparedCourses) -> int:
+        """Append courses from `prepare` at the next positions; returns the first one"""
+        start = self.size
+        for column, values in zip(self._columns(), prepared.columns):
+            column.extend(values)
+        ids = prepared.columns[0]
+        # Columns are complete before the positions become visible to readers
+        self.size += len(ids)
+        for offset, course_id in enumerate(ids):
+            self.positions[course_id] = start + offset
+
+        for level, bits in prepared.level_bits.items():
+            self.level_bitmaps[level] |= bits << start
+        for category, bits in prepared.category_bits.items():
+            self.category_bitmaps[category] = self.category_bitmaps.get(category, 0) | bits << start
+        self.live_bitmap |= prepared.live << start
+        return start
+
+    def extend(self, courses: Iterable[dict]):
+        """
+        Append courses in order, e.g. one chunk of a streamed catalog at a time.
+        Bitmaps are built for the chunk alone and shifted into place once, since
+        updating a catalog-wide bitmap per course costs O(catalog size). A course
+        that fails to read or encode leaves the catalog unchanged.
+        """
+        self.commit(self.prepare(courses))
+
+    def append(self, course: dict) -> int:
+        """Add a course at the next position and return that position"""
+        self.extend((course,))
+        return self.size - 1
+
+    def remove(self, course_id: str) -> Optional[int]:
+        """Drop a course from every bitmap; returns its old position, or None if it was not live"""
+        i = self.positions.pop(course_id, None)
+        if i is None:
+            return None
+        keep = ~(1 << i)
+        self.live_bitmap &= keep
+        level = self.level_codes[i]
+        if level is not None:
+            self.level_bitmaps[level] &= keep
+        category = self.category_codes[i]
+        self.category_bitmaps[category] &= keep
+        return i
+
+    def record(self, i: int) -> dict:
+        """Rebuild the course dict at position i"""
+        return {
+            "id": self.ids[i],
+            "title": self.titles[i],
+            "description": self.descriptions[i],
+            "price": self.prices[i],
+            "duration": self.durations[i],
+            "level": self.levels[i],
+            "thumbnail": self.thumbnails[i],
+            "category": self.categories[i],
+            "educatorId": self.educator_ids[i],
+            "published": self.published[i],
+        }
+
+    def filter_bitmap(self, level: Optional[str] = None, category: Optional[str] = None) -> int:
+        """AND together the level and category bitmaps; unknown values match nothing"""
+        bitmap = self.live_bitmap
+        if level:
+            code = normalize_level(level)
+            bitmap &= self.level_bitmaps[code] if code is not None else 0
+        if category:
+            bitmap &= self.category_bitmaps.get(normalize_category(category), 0)
+        return bitmap
+
+    def _members(self, bitmap: int) -> FrozenSet[int]:
+        """Decode a bitmap into the set of course positions it contains"""
+        members = []
+        for byte_index, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")):
+            if byte:
+                base = byte_index * 8
+                for bit in range(8):
+                    if byte >> bit & 1:
+                        members.append(base + bit)
+        return frozenset(members)
+
+    def first(self, bitmap: int, n: int) -> List[int]:
+        """The n lowest course positions in a bitmap, in catalog order"""
+        positions = []
+        while bitmap and len(positions) < n:
+            lowest = bitmap & -bitmap
+            positions.append(lowest.bit_length() - 1)
+            bitmap ^= lowest
+        return positions
+
+
+def resolve_filters(catalog: CompiledCatalog, level: Optional[str] = None, category: Optional[str] = None
+                    ) -> Tuple[Optional[int], Optional[FrozenSet[int]], Optional[str]]:
+    """
+    Turn level/category filters into (bitmap, candidate set, warning) for the
+    keyword services. Filters no live course matches are dropped, with a
+    warning naming the filter that emptied the set.
+    """
+    if not (level or category):
+        return None, None, None
+
+    bitmap = catalog.filter_bitmap(level=level, category=category)
+    if bitmap:
+        return bitmap, catalog.members(bitmap), None
+    if level and not catalog.filter_bitmap(level=level):
+        return None, None, f"No courses found for level '{level}'. Showing best matches instead."
+    if category and not catalog.filter_bitmap(category=category):
+        return None, None, f"No courses found in category '{category}'. Showing best matches instead."
+    return None, None, f"No courses found for level '{level}' in category '{category}'. Showing best matches instead."
@@ -0,0 +1,234 @@
+"""
+Streaming catalog ingestion.
+
+Courses are read one NDJSON line at a time, validated in fixed-size chunks and
+handed chunk by chunk to consumers (CompiledCatalog.extend,
+CourseSearchIndex.extend, ...), so a catalog never has to exist as one list
+of dicts. Resident memory is checked after every chunk against an optional
+budget, and peak RSS is reported.
+
+CATALOG_NDJSON_PATH: NDJSON/JSONL file with one Course object per line
+CATALOG_CHUNK_SIZE: records validated and consumed per chunk (default 1000)
+CATALOG_RSS_BUDGET_MB: fail the load once resident memory passes this many MB
+"""
+import json
+import os
+import resource
+import sys
+import time
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from catalog import normalize_level
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Validation errors kept (with line numbers) for the load report
+MAX_ERROR_SAMPLES = 20
+
+STRING_FIELDS = ("id", "title", "description", "category", "educatorId")
+
+
+class CourseValidationError(ValueError):
+    pass
+
+
+class RssBudgetExceeded(RuntimeError):
+    pass
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process right now"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Highest resident set size this process has reached"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def process_memory_mb(pid: Any = "self") -> Optional[dict]:
+    """
+    RSS of a process split into pages shared with other processes (e.g. forked
+    workers) and private ones, plus PSS (shared pages divided among their users).
+    Linux only: None where /proc/<pid>/smaps_rollup is unavailable.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                parts = value.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    fields[name] = int(parts[0]) / 1024
+    except (OSError, ValueError):
+        return None
+    return {
+        "rss_mb": round(fields.get("Rss", 0.0), 1),
+        "pss_mb": round(fields.get("Pss", 0.0), 1),
+        "shared_mb": round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1),
+        "private_mb": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1),
+    }
+
+
+def validate_course(record: Any) -> dict:
+    """
+    Check one decoded NDJSON record against the Course model and return it in
+    the COURSE_DATABASE shape. Levels are normalized to the Prisma enum.
+    """
+    if not isinstance(record, dict):
+        raise CourseValidationError("record is not a JSON object")
+
+    for field in STRING_FIELDS:
+        value = record.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise CourseValidationError(f"'{field}' must be a non-empty string")
+
+    price = record.get("price")
+    if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+        raise CourseValidationError("'price' must be a non-negative number")
+    duration = record.get("duration")
+    if isinstance(duration, bool) or not isinstance(duration, int) or duration < 0:
+        raise CourseValidationError("'duration' must be a non-negative integer")
+    level = normalize_level(record.get("level") if isinstance(record.get("level"), str) else None)
+    if level is None:
+        raise CourseValidationError(f"'level' must be one of BEGINNER, INTERMEDIATE, ADVANCED, got {record.get('level')!r}")
+    thumbnail = record.get("thumbnail")
+    if thumbnail is not None and not isinstance(thumbnail, str):
+        raise CourseValidationError("'thumbnail' must be a string or null")
+    published = record.get("published", False)
+    if not isinstance(published, bool):
+        raise CourseValidationError("'published' must be a boolean")
+
+    return {
+        "id": record["id"],
+        "title": record["title"],
+        "description": record["description"],
+        "price": float(price),
+        "duration": duration,
+        "level": level.value,
+        "thumbnail": thumbnail or "",
+        "category": record["category"],
+        "educatorId": record["educatorId"],
+        "published": published,
+    }
+
+
+def iter_ndjson_lines(path: str) -> Iterator[Tuple[int, str]]:
+    """(line number, line) for every non-blank line of an NDJSON file"""
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if line.strip():
+                yield number, line
+
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CatalogIngest:
+    """
+    Feeds course chunks to consumers and records what the load cost.
+
+    `ndjson_chunks` parses and validates a file chunk by chunk; invalid lines
+    and repeated ids are counted and sampled in the report rather than
+    failing the load. Valid but unpublished courses are counted and skipped,
+    as the database source only reads published rows.
+    `run` hands each chunk to every consumer in turn, then checks RSS.
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, rss_budget_mb: Optional[float] = None):
+        self.chunk_size = chunk_size
+        self.rss_budget_mb = rss_budget_mb
+        self.source: Optional[str] = None
+        self.records = 0
+        self.courses = 0
+        self.invalid = 0
+        self.unpublished = 0
+        self.chunks = 0
+        self.errors: List[str] = []
+        self.seconds: Optional[float] = None
+        self.start_rss_mb: Optional[float] = None
+        self.max_rss_mb: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "CatalogIngest":
+        budget = os.getenv("CATALOG_RSS_BUDGET_MB")
+        return cls(
+            chunk_size=int(os.getenv("CATALOG_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE))),
+            rss_budget_mb=float(budget) if budget else None,
+        )
+
+    def ndjson_chunks(self, path: str) -> Iterator[List[dict]]:
+        """Validated courses from an NDJSON file, `chunk_size` lines at a time"""
+        self.source = path
+        seen_ids = set()
+        for lines in chunked(iter_ndjson_lines(path), self.chunk_size):
+            courses = []
+            for number, line in lines:
+                self.records += 1
+                try:
+                    course = validate_course(json.loads(line))
+                    if course["id"] in seen_ids:
+                        raise CourseValidationError(f"duplicate id {course['id']!r}")
+                    seen_ids.add(course["id"])
+                    if not course["published"]:
+                        self.unpublished += 1
+                        continue
+                    courses.append(course)
+                except (ValueError, CourseValidationError) as e:
+                    # json.JSONDecodeError is a ValueError too
+                    self.invalid += 1
+                    if len(self.errors) < MAX_ERROR_SAMPLES:
+                        self.errors.append(f"line {number}: {e}")
+            yield courses
+
+    def run(self, chunks: Iterable[List[dict]], consumers: List[Callable[[List[dict]], Any]]) -> dict:
+        started = time.perf_counter()
+        self.start_rss_mb = current_rss_mb()
+        self.max_rss_mb = self.start_rss_mb
+        for chunk in chunks:
+            for consume in consumers:
+                consume(chunk)
+            self.chunks += 1
+            self.courses += len(chunk)
+
+            rss = current_rss_mb()
+            self.max_rss_mb = max(self.max_rss_mb, rss)
+            if self.rss_budget_mb is not None and rss > self.rss_budget_mb:
+                raise RssBudgetExceeded(
+                    f"Catalog load used {rss:.0f} MB RSS after {self.courses} courses, "
+                    f"over the {self.rss_budget_mb:.0f} MB budget (CATALOG_RSS_BUDGET_MB)"
+                )
+        self.seconds = time.perf_counter() - started
+        return self.report()
+
+    def report(self) -> dict:
+        return {
+            "source": self.source,
+            "courses": self.courses,
+            # Only NDJSON loads can see records that fail validation
+            "records": self.records or self.courses,
+            "invalid": self.invalid,
+            "unpublished": self.unpublished,
+            "errors": list(self.errors),
+            "chunks": self.chunks,
+            "chunk_size": self.chunk_size,
+            "seconds": round(self.seconds, 3) if self.seconds is not None else None,
+            "start_rss_mb": round(self.start_rss_mb, 1) if self.start_rss_mb is not None else None,
+            "max_rss_mb": round(self.max_rss_mb, 1) if self.max_rss_mb is not None else None,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "rss_budget_mb": self.rss_budget_mb,
+        }
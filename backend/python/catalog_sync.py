@@ -0,0 +1,249 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Tuple
+
+from ann_index import prepare_deletion
+from catalog import CompiledCatalog, course_document_text
+from catalog_source import CatalogChanges, PrismaCatalogSource
+from catalog_stream import CatalogIngest, chunked
+from search_index import CourseSearchIndex
+from structured_logging import get_logger
+
+logger = get_logger("catalog_sync")
+
+# CATALOG_POLL_SECONDS: how often the Course table is checked for changes
+DEFAULT_POLL_SECONDS = 30.0
+
+
+class ReadWriteLock:
+    """Many concurrent readers or one writer; a waiting writer holds back new readers"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+def _database_chunks(source: PrismaCatalogSource, fallback: Sequence[dict], chunk_size: int) -> Iterator[List[dict]]:
+    chunks = source.iter_all(chunk_size)
+    try:
+        first = next(chunks, None)
+    except Exception as e:
+        logger.warning("Could not load the course catalog from the database; serving the bundled catalog until the next successful poll", extra={"error": str(e)})
+        # The first poll then re-reads every row, and reconciliation drops bundled courses the database lacks
+        source.watermark = None
+        source.known_ids = {course["id"] for course in fallback}
+        yield from chunked(fallback, chunk_size)
+        return
+    if first is not None:
+        yield first
+        yield from chunks
+
+
+def load_catalog(
+    consumers: List[Callable[[List[dict]], Any]],
+    source: Optional[PrismaCatalogSource],
+    fallback: Sequence[dict],
+    ingest: Optional[CatalogIngest] = None,
+) -> dict:
+    """
+    Stream the initial catalog into `consumers` chunk by chunk and return the
+    load report. Courses come from CATALOG_NDJSON_PATH when set, else the
+    database when a source is configured, otherwise (or if the database is
+    unreachable) the bundled COURSE_DATABASE.
+    """
+    ingest = ingest or CatalogIngest.from_env()
+    ndjson_path = os.getenv("CATALOG_NDJSON_PATH")
+    if ndjson_path:
+        chunks = ingest.ndjson_chunks(ndjson_path)
+    elif source is not None:
+        ingest.source = "database"
+        chunks = _database_chunks(source, fallback, ingest.chunk_size)
+    else:
+        ingest.source = "bundled"
+        chunks = chunked(fallback, ingest.chunk_size)
+
+    report = ingest.run(chunks, consumers)
+    logger.info("Loaded the course catalog", extra={
+        "courses": report["courses"],
+        "source": report["source"],
+        "unpublished": report["unpublished"],
+        "chunks": report["chunks"],
+        "seconds": report["seconds"],
+        "peak_rss_mb": report["peak_rss_mb"],
+    })
+    if report["invalid"]:
+        logger.warning("Skipped invalid catalog records", extra={"invalid": report["invalid"], "example": report["errors"][0]})
+    return report
+
+
+def apply_to_catalog(catalog: CompiledCatalog, changes: CatalogChanges) -> Tuple[List[Tuple[int, dict]], List[Tuple[int, dict]]]:
+    """
+    Apply catalog changes to a CompiledCatalog. An edited course is removed and
+    re-added at a new position. Returns the (position, course) pairs added and
+    removed, for the indexes built over the catalog.
+
+    Every upsert is read and encoded before the catalog changes, so a bad
+    course raises with the catalog untouched and the same changes can be
+    applied again.
+    """
+    prepared = catalog.prepare(changes.upserted)
+    removed = []
+    for course_id in list(changes.removed_ids) + [course["id"] for course in changes.upserted]:
+        position = catalog.remove(course_id)
+        if position is not None:
+            removed.append((position, catalog.record(position)))
+    start = catalog.commit(prepared)
+    added = list(zip(range(start, start + len(changes.upserted)), changes.upserted))
+    return added, removed
+
+
+def apply_to_keyword_index(catalog: CompiledCatalog, index: CourseSearchIndex, changes: CatalogChanges):
+    """Apply catalog changes to a CompiledCatalog and its CourseSearchIndex"""
+    # Checked before the catalog changes: the index would reject the new positions anyway
+    if index.size != catalog.size:
+        raise RuntimeError(f"Keyword index covers {index.size} positions but the catalog has {catalog.size}")
+    # Catalog columns first: a position returned by the index must already resolve to a record
+    added, removed = apply_to_catalog(catalog, changes)
+    index.apply_changes(added=added, removed=removed)
+    catalog.version += 1
+
+
+def apply_to_vector_store(vector_store, lock: ReadWriteLock, changes: CatalogChanges, catalog: Optional[CompiledCatalog] = None):
+    """
+    Apply catalog changes to a LangChain FAISS store whose docstore ids are course ids.
+    New documents are embedded, and an HNSW graph without the stale vectors is
+    rebuilt, before taking the write lock, so searches only wait for the swap
+    and the appends. This poller is the store's only writer, so reading it
+    outside the lock is safe. When the docstore reads from `catalog`, the
+    catalog is updated under the same lock.
+    """
+    texts = [course_document_text(course) for course in changes.upserted]
+    vectors = vector_store.embeddings.embed_documents(texts) if texts else []
+
+    present = set(vector_store.index_to_docstore_id.values())
+    stale = [
+        course_id
+        for course_id in list(changes.removed_ids) + [course["id"] for course in changes.upserted]
+        if course_id in present
+    ]
+    delete_stale = prepare_deletion(vector_store, stale) if stale else None
+
+    with lock.write():
+        if catalog is not None:
+            apply_to_catalog(catalog, changes)
+            catalog.version += 1
+        if delete_stale is not None:
+            delete_stale()
+        if texts:
+            vector_store.add_embeddings(
+                list(zip(texts, vectors)),
+                metadatas=[dict(course) for course in changes.upserted],
+                ids=[course["id"] for course in changes.upserted],
+            )
+
+
+class CatalogSync:
+    """
+    Background poller that pushes Course table changes into the serving indexes.
+
+    Each subscriber is a callable taking CatalogChanges; they run in
+    subscription order on the poller thread while requests keep being served.
+    Subscribers must tolerate seeing the same changes again: when one raises,
+    none of the changes are committed and the next poll repeats them.
+    """
+
+    def __init__(self, source: PrismaCatalogSource, interval_seconds: float = DEFAULT_POLL_SECONDS):
+        self.source = source
+        self.interval_seconds = interval_seconds
+        self._subscribers: List[Callable[[CatalogChanges], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.polls = 0
+        self.upserted = 0
+        self.removed = 0
+        self.errors = 0
+        self.last_poll_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def from_env(cls, source: PrismaCatalogSource) -> "CatalogSync":
+        return cls(source, interval_seconds=float(os.getenv("CATALOG_POLL_SECONDS", str(DEFAULT_POLL_SECONDS))))
+
+    def subscribe(self, apply: Callable[[CatalogChanges], None]):
+        self._subscribers.append(apply)
+
+    def poll_once(self) -> CatalogChanges:
+        changes = self.source.fetch_changes()
+        if changes:
+            for apply in self._subscribers:
+                apply(changes)
+            logger.info("Catalog sync applied changes", extra={"upserted": len(changes.upserted), "removed": len(changes.removed_ids)})
+        # Only now does the source move past these changes; if a subscriber raised, the next poll fetches them again
+        self.source.commit(changes)
+        self.polls += 1
+        self.upserted += len(changes.upserted)
+        self.removed += len(changes.removed_ids)
+        self.last_poll_at = time.time()
+        return changes
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                logger.warning("Catalog sync poll failed", extra={"error": str(e)})
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="catalog-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "polls": self.polls,
+            "upserted": self.upserted,
+            "removed": self.removed,
+            "errors": self.errors,
+            "last_poll_at": self.last_poll_at,
+            "last_error": self.last_error,
+            "interval_seconds": self.interval_seconds,
+        }
@@ -0,0 +1,43 @@
+"""
+Pre-encoded course JSON for the recommendation endpoints.
+
+Each course is validated against the service's Course model once, when it
+enters the CompiledCatalog, and its JSON is kept as a byte fragment. Responses
+are joined from those fragments instead of rebuilding and re-serializing
+Pydantic models per request; the bytes match model_dump_json exactly.
+"""
+import json
+from typing import Callable, Iterable, Optional, Sequence, Type
+
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+class RawJSONResponse(Response):
+    """JSON response whose content is already-encoded bytes; the endpoint's response_model only documents it"""
+    media_type = "application/json"
+
+
+def course_encoder(model: Type[BaseModel]) -> Callable[[dict], bytes]:
+    """Validate a course dict with `model` and return its compact JSON"""
+    def encode(course: dict) -> bytes:
+        return model.model_validate(course).model_dump_json().encode("utf-8")
+
+    return encode
+
+
+def encode_json(value) -> bytes:
+    # Same compact, non-ASCII-escaping output as Pydantic
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def recommendations_json(fragments: Sequence[bytes], warning: Optional[str], extra: Optional[dict] = None) -> bytes:
+    """RAGResponse body from course fragments; `extra` adds trailing fields in model order"""
+    warning_json = b"null" if warning is None else encode_json(warning)
+    tail = b"".join(b',"' + key.encode("utf-8") + b'":' + encode_json(value) for key, value in (extra or {}).items())
+    return b'{"courses":[' + b",".join(fragments) + b'],"warning":' + warning_json + tail + b"}"
+
+
+def batch_json(results: Iterable[bytes]) -> bytes:
+    """A batch response body ({"results": [...]}) from the per-request JSON bodies"""
+    return b'{"results":[' + b",".join(results) + b"]}"
@@ -0,0 +1,64 @@
+import os
+import platform
+from typing import Optional
+
+# EMBEDDING_BACKEND selects how the sentence-transformers model runs:
+# - "torch": fp32 PyTorch (default)
+# - "onnx-int8": dynamically quantized int8 ONNX graph on ONNX Runtime's CPU provider
+#   (pip install "sentence-transformers[onnx]")
+EMBEDDING_BACKENDS = ("torch", "onnx-int8")
+
+
+def embedding_backend() -> str:
+    backend = os.getenv("EMBEDDING_BACKEND", "torch")
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Expected one of {EMBEDDING_BACKENDS}.")
+    return backend
+
+
+def onnx_int8_file() -> str:
+    """
+    Quantized graph shipped in the model repo that best fits this CPU;
+    EMBEDDING_ONNX_FILE overrides the choice.
+    """
+    override = os.getenv("EMBEDDING_ONNX_FILE")
+    if override:
+        return override
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+
+    flags = ""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        pass
+    if "avx512_vnni" in flags:
+        return "onnx/model_qint8_avx512_vnni.onnx"
+    if "avx512" in flags:
+        return "onnx/model_qint8_avx512.onnx"
+    return "onnx/model_quint8_avx2.onnx"
+
+
+def load_embeddings(model_name: str, backend: Optional[str] = None):
+    """
+    HuggingFaceEmbeddings for the selected backend. Both backends expose the
+    same LangChain Embeddings interface, so retrievers need no other changes.
+    """
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    backend = backend or embedding_backend()
+    if backend == "torch":
+        return HuggingFaceEmbeddings(model_name=model_name)
+    if backend == "onnx-int8":
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={"backend": "onnx", "model_kwargs": {"file_name": onnx_int8_file()}},
+        )
+    raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of {EMBEDDING_BACKENDS}.")
+
+
+def embedding_key(model_name: str, backend: Optional[str] = None) -> str:
+    """Identifies the vectors a model/backend pair produces, for index cache fingerprints"""
+    backend = backend or embedding_backend()
+    return model_name if backend == "torch" else f"{model_name}@{backend}:{onnx_int8_file()}"
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+
+class MicroBatchingEmbeddings(Embeddings):
+    """
+    Gathers concurrent embed_query calls into one batched forward pass.
+
+    A worker thread takes the first waiting query, then keeps collecting until
+    `max_batch_size` queries are queued or `max_wait_ms` has passed since the
+    first one arrived. The batch goes through the base model's embed_documents
+    and each caller's future receives its own vector. Document embedding (index
+    builds) is already batched and calls the base model directly.
+
+    Under light load (the previous batch had one query and nothing else is
+    queued) a query is dispatched at once, so a lone caller never pays the wait.
+    """
+
+    def __init__(self, base: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.base = base
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.batches = 0
+        self.items = 0
+        self.max_observed_batch = 0
+        self._start_worker()
+
+        # Processes forked after loading (prefork.py) inherit this object but not its thread
+        restart = weakref.WeakMethod(self._start_worker)
+        os.register_at_fork(after_in_child=lambda: restart() and restart()())
+
+    def _start_worker(self):
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._last_batch_size = 0
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def _collect(self) -> List[tuple]:
+        batch = [self._queue.get()]
+        if self._last_batch_size <= 1 and self._queue.empty():
+            return batch
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                vectors = self.base.embed_documents(texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                # A caller may have given up (cancelled) while the batch was running
+                if not future.done():
+                    future.set_result(vector)
+
+            self._last_batch_size = len(batch)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.max_observed_batch = max(self.max_observed_batch, len(batch))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "max_batch_size": self.max_observed_batch,
+                "queued": self._queue.qsize(),
+            }
+
+
+def batched_embeddings_from_env(base: Embeddings) -> Embeddings:
+    """
+    Wrap `base` in a MicroBatchingEmbeddings scheduler unless EMBEDDING_BATCHING=0.
+    EMBEDDING_BATCH_MAX_SIZE and EMBEDDING_BATCH_MAX_WAIT_MS tune the batching window.
+    """
+    if os.getenv("EMBEDDING_BATCHING", "1") == "0":
+        return base
+    return MicroBatchingEmbeddings(
+        base,
+        max_batch_size=int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32")),
+        max_wait_ms=float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5")),
+    )
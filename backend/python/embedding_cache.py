@@ -0,0 +1,152 @@
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_text(text: str) -> str:
+    """
+    Cache key for a query. MiniLM's tokenizer is uncased and ignores runs of
+    whitespace, so lowercasing and collapsing whitespace does not change the
+    embedding but does merge near-identical inputs.
+    """
+    return " ".join((text or "").lower().split())
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of embedding vectors with a TTL and a memory cap.
+
+    Vectors are stored as packed float64 arrays; the memory cap counts the
+    vector payload plus the key, which dominates for MiniLM's 384 dimensions.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_seconds: float = 3600.0, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls) -> "EmbeddingCache":
+        """
+        EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_CACHE_TTL_SECONDS and
+        EMBEDDING_CACHE_MAX_MB configure the cache; max entries of 0 disables it.
+        """
+        return cls(
+            max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", "3600")),
+            max_bytes=int(float(os.getenv("EMBEDDING_CACHE_MAX_MB", "64")) * 1024 * 1024),
+        )
+
+    @staticmethod
+    def _size_of(key: str, vector: array) -> int:
+        return sys.getsizeof(key) + vector.itemsize * len(vector)
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            vector, expires_at, size = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector.tolist()
+
+    def put(self, key: str, vector: List[float]):
+        if self.max_entries <= 0:
+            return
+        packed = array("d", vector)
+        size = self._size_of(key, packed)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+
+            self._entries[key] = (packed, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings backend so repeated queries skip the model forward pass.
+    Document embedding (index builds) passes straight through.
+    """
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache):
+        self.base = base
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_text(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = self.base.embed_query(text)
+            self.cache.put(key, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """embed_query for many texts: cache misses are embedded together in one batch"""
+        keys = [normalize_text(text) for text in texts]
+        vectors = [self.cache.get(key) for key in keys]
+        missing: dict = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], texts[i])
+        if missing:
+            fresh = dict(zip(missing, self.base.embed_documents(list(missing.values()))))
+            for key, vector in fresh.items():
+                self.cache.put(key, vector)
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+        return vectors
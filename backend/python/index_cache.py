@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, Optional, Sequence
+
+from structured_logging import get_logger
+
+logger = get_logger("index_cache")
+
+# INDEX_CACHE_DIR: where built indexes are persisted between process starts
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".index_cache")
+
+
+def documents_fingerprint(documents: Sequence[Any], *parts: str) -> str:
+    """
+    Content hash of LangChain documents (page content + metadata) plus any
+    extra key parts such as the embedding model name.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for doc in documents:
+        digest.update(doc.page_content.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(json.dumps(doc.metadata, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+class IndexArtifactCache:
+    """
+    Persists built indexes (FAISS stores, fitted TF-IDF models) under
+    <root>/<namespace>/<fingerprint>/. Entries are written to a temp directory
+    and renamed into place, so a crashed build never leaves a half-written entry.
+    Older fingerprints in the same namespace are removed after a successful save.
+
+    With INDEX_MMAP=1, FAISS stores loaded read-only are memory-mapped from the
+    cache instead of copied onto the heap: their vectors live in the page cache,
+    shared by every worker process serving them.
+    """
+
+    def __init__(self, root: Optional[str] = None, mmap: Optional[bool] = None):
+        self.root = root or os.getenv("INDEX_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.mmap = os.getenv("INDEX_MMAP", "0") == "1" if mmap is None else mmap
+
+    def entry_path(self, namespace: str, fingerprint: str) -> str:
+        return os.path.join(self.root, namespace, fingerprint)
+
+    def load_faiss(self, namespace: str, fingerprint: str, embeddings, read_only: bool = False):
+        """
+        Load a cached FAISS store, or None if there is no entry for this fingerprint.
+        Pass read_only=True only for stores that are never added to or deleted from:
+        a memory-mapped index cannot be modified.
+        """
+        path = self.entry_path(namespace, fingerprint)
+        if not os.path.isdir(path):
+            return None
+        from langchain_community.vectorstores import FAISS
+
+        try:
+            if read_only and self.mmap:
+                return self._mmap_faiss(path, embeddings)
+            # The pickle was written by save_faiss in this cache directory, not user supplied
+            return FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        except Exception as e:
+            logger.warning("Ignoring unreadable index cache entry", extra={"path": path, "error": str(e)})
+            return None
+
+    @staticmethod
+    def _mmap_faiss(path: str, embeddings):
+        """FAISS.load_local, with the vectors mapped from index.faiss rather than read into memory"""
+        import faiss
+        from langchain_community.vectorstores import FAISS
+
+        index = faiss.read_index(os.path.join(path, "index.faiss"), faiss.IO_FLAG_MMAP_IFC)
+        with open(os.path.join(path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+    def save_faiss(self, namespace: str, fingerprint: str, vector_store):
+        self._write(namespace, fingerprint, vector_store.save_local)
+
+    def load_pickle(self, namespace: str, fingerprint: str) -> Optional[Any]:
+        """Load a cached pickled artifact, or None if there is no entry for this fingerprint"""
+        path = os.path.join(self.entry_path(namespace, fingerprint), "artifact.pkl")
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning("Ignoring unreadable index cache entry", extra={"path": path, "error": str(e)})
+            return None
+
+    def save_pickle(self, namespace: str, fingerprint: str, artifact: Any):
+        def write(directory: str):
+            with open(os.path.join(directory, "artifact.pkl"), "wb") as f:
+                pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        self._write(namespace, fingerprint, write)
+
+    def _write(self, namespace: str, fingerprint: str, writer):
+        namespace_dir = os.path.join(self.root, namespace)
+        try:
+            os.makedirs(namespace_dir, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=namespace_dir)
+            writer(staging)
+            target = self.entry_path(namespace, fingerprint)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+        except Exception as e:
+            # Caching is best effort; the in-memory index is still usable
+            logger.warning("Could not write index cache entry", extra={"namespace": namespace, "fingerprint": fingerprint, "error": str(e)})
+            return
+
+        for name in os.listdir(namespace_dir):
+            if name != fingerprint and not name.startswith(".staging-"):
+                shutil.rmtree(os.path.join(namespace_dir, name), ignore_errors=True)
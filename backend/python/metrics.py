@@ -0,0 +1,279 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Prometheus text exposition format, served from each service's /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; fine below 10 ms for the in-process stages, up to 30 s for LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], Sequence[str], float]]:
+        return ()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield "", self.labelnames, key, value
+
+
+class Gauge(_Metric):
+    """
+    A value read when /metrics is scraped. `function` returns a number, or a
+    dict of label-value tuples to numbers when the gauge has labels; None
+    (e.g. an index that has not loaded yet) leaves the sample out.
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], Union[None, float, Dict[LabelValues, float]]]] = None):
+        super().__init__(name, help, labelnames)
+        self.function = function
+
+    def samples(self):
+        try:
+            value = self.function() if self.function else None
+        except Exception:
+            # A gauge must never break the scrape
+            value = None
+        if value is None:
+            return
+        if isinstance(value, dict):
+            for key, sample in sorted(value.items()):
+                if sample is not None:
+                    yield "", self.labelnames, key, sample
+        else:
+            yield "", (), (), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        """Observe how long the block took, in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        names = self.labelnames + ("le",)
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield "_bucket", names, key + (_format_value(bound),), cumulative
+            yield "_sum", self.labelnames, key, total
+            yield "_count", self.labelnames, key, cumulative
+
+
+class MetricsRegistry:
+    """
+    A minimal in-process registry rendering the Prometheus text format, so the
+    services expose /metrics without a client library. Values are per process:
+    with several uvicorn workers, each worker's /metrics reports its own.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, function: Callable, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, function))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ServiceMetrics:
+    """
+    The metrics every service exposes:
+
+    - ugrama_request_duration_seconds{method,endpoint,status}: whole request,
+      including a streamed body, keyed by route template (not the raw path)
+    - ugrama_stage_duration_seconds{stage}: embedding, vector search, keyword
+      scoring, LLM calls, response serialization, ...
+    - ugrama_fallback_total{fallback}: requests served by a fallback path
+    - gauges added with `gauge`, read at scrape time (catalog and index sizes)
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        self.registry = registry or MetricsRegistry()
+        self.requests = self.registry.histogram(
+            "ugrama_request_duration_seconds", "Request latency by endpoint, until the last body byte is sent.",
+            ("method", "endpoint", "status"),
+        )
+        self.stages = self.registry.histogram(
+            "ugrama_stage_duration_seconds", "Latency of each serving stage.", ("stage",),
+        )
+        self.fallbacks = self.registry.counter(
+            "ugrama_fallback_total", "Requests answered by a fallback path.", ("fallback",),
+        )
+
+    def stage(self, name: str):
+        """Context manager timing one stage into ugrama_stage_duration_seconds"""
+        return self.stages.time(stage=name)
+
+    def fallback(self, name: str):
+        self.fallbacks.inc(fallback=name)
+
+    def gauge(self, name: str, help: str, function: Callable, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.registry.gauge(name, help, function, labelnames)
+
+    def track_engines(self, engines) -> Gauge:
+        """ugrama_engine_ready{engine}: 1 once an EngineRegistry engine is loaded"""
+        from readiness import READY
+
+        return self.gauge(
+            "ugrama_engine_ready", "1 when the engine is loaded and serving.",
+            lambda: {(name,): int(engine["status"] == READY) for name, engine in engines.snapshot()["engines"].items()},
+            labelnames=("engine",),
+        )
+
+    def render(self) -> str:
+        return self.registry.render()
+
+    def install(self, app):
+        """Time every request on `app` and serve GET /metrics"""
+        from starlette.responses import Response
+
+        app.add_middleware(RequestMetricsMiddleware, metrics=self)
+
+        @app.get("/metrics", include_in_schema=False)
+        def metrics_endpoint():
+            return Response(content=self.render(), media_type=CONTENT_TYPE)
+
+
+class RequestMetricsMiddleware:
+    """
+    Plain ASGI middleware (not BaseHTTPMiddleware) so streamed responses are
+    passed through untouched and timed until their final chunk.
+    """
+
+    def __init__(self, app, metrics: ServiceMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; unmatched paths
+            # share one label so scanners cannot grow the series without bound
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            self.metrics.requests.observe(
+                time.perf_counter() - start, method=scope["method"], endpoint=endpoint, status=status[0],
+            )
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -5,6 +6,15 @@ from typing import List, Optional
 from dotenv import load_dotenv
 import os
 
+from catalog import CompiledCatalog, resolve_filters
+from catalog_source import catalog_source_from_env
+from catalog_sync import CatalogSync, apply_to_keyword_index, load_catalog
+from course_json import RawJSONResponse, course_encoder, recommendations_json
+from metrics import ServiceMetrics
+from request_profiling import RequestProfiler
+from search_index import CourseSearchIndex
+from structured_logging import endpoint_logger, get_logger
+
 # --- Database Import ---
 try:
     from course_database import COURSE_DATABASE
@@ -55,6 +65,7 @@ load_dotenv()
 class RAGRequest(BaseModel):
     query: str
     level: Optional[str] = None
+    category: Optional[str] = None
 
 class Course(BaseModel):
     id: str
@@ -72,8 +83,16 @@ class RAGResponse(BaseModel):
     courses: List[Course]
     warning: Optional[str] = None
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if catalog_sync is not None:
+        catalog_sync.start()
+    yield
+    if catalog_sync is not None:
+        catalog_sync.stop()
+
 # --- FastAPI App ---
-app = FastAPI(title="Course Recommender", version="1.0.0")
+app = FastAPI(title="Course Recommender", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -84,74 +103,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def simple_search(query: str, level: Optional[str] = None):
-    """Simple keyword-based search algorithm"""
-    if not query.strip():
-        return COURSE_DATABASE[:3], None
-    
-    query_lower = query.lower()
-    keywords = query_lower.split()
-    
-    scored_courses = []
-    
-    for course in COURSE_DATABASE:
-        score = 0
-        course_text = f"{course['title']} {course['description']} {course['category']}".lower()
-        
-        # Score based on keyword matches
-        for keyword in keywords:
-            if keyword in course_text:
-                score += course_text.count(keyword)
-        
-        # Bonus scoring
-        if any(keyword in course['category'].lower() for keyword in keywords):
-            score += 10  # Category match bonus
-        
-        if any(keyword in course['title'].lower() for keyword in keywords):
-            score += 5   # Title match bonus
-        
-        # Web development related keywords
-        web_keywords = ['web', 'react', 'javascript', 'html', 'css', 'frontend', 'backend', 'fullstack', 'full-stack']
-        if any(keyword in web_keywords for keyword in keywords):
-            if 'web development' in course['category'].lower():
-                score += 15
-        
-        # Data science related keywords
-        data_keywords = ['data', 'science', 'python', 'machine', 'learning', 'ai', 'analytics']
-        if any(keyword in data_keywords for keyword in keywords):
-            if 'data science' in course['category'].lower() or 'machine learning' in course['category'].lower():
-                score += 15
-        
-        # Design related keywords
-        design_keywords = ['design', 'ui', 'ux', 'figma', 'prototype', 'wireframe']
-        if any(keyword in design_keywords for keyword in keywords):
-            if 'design' in course['category'].lower():
-                score += 15
-        
-        if score > 0:
-            scored_courses.append((course, score))
-    
-    # Sort by score and take top courses
-    scored_courses.sort(key=lambda x: x[1], reverse=True)
-    recommended_courses = [course for course, score in scored_courses[:6]]
+# Per-stage and per-endpoint latency, fallback counters and index sizes, served at /metrics
+metrics = ServiceMetrics()
+metrics.install(app)
+
+# PROFILING_ENABLED=1: profile single requests sent with an X-Profile header (see request_profiling.py)
+profiler = RequestProfiler.from_env()
+profiler.install(app)
+
+# JSON log records, written to stdout by a background thread (see structured_logging.py)
+logger = get_logger("course_recommendations")
+recommendations_log = endpoint_logger(logger, "courserecommendations")
+
+# --- Search Index ---
+# SEARCH_RANKING_MODE: "bm25" (default) or "legacy" for the original substring-count ranking
+SEARCH_RANKING_MODE = os.getenv("SEARCH_RANKING_MODE", "bm25")
+
+# CATALOG_DATABASE_URL: serve published courses from the Prisma Course table, polled for changes
+# CATALOG_NDJSON_PATH: stream the initial catalog from an NDJSON export instead
+catalog_source = catalog_source_from_env()
+# Courses are validated and JSON-encoded once here; responses join the stored fragments
+compiled_catalog = CompiledCatalog(encoder=course_encoder(Course))
+course_index = CourseSearchIndex()
+catalog_load_report = load_catalog([compiled_catalog.extend, course_index.extend], catalog_source, COURSE_DATABASE)
+course_index.finalize()
+
+catalog_sync = None
+if catalog_source is not None:
+    catalog_sync = CatalogSync.from_env(catalog_source)
+    catalog_sync.subscribe(lambda changes: apply_to_keyword_index(compiled_catalog, course_index, changes))
+
+def simple_search(query: str, level: Optional[str] = None, category: Optional[str] = None):
+    """Keyword search over the prebuilt course index, with level/category filters applied first"""
+    # Narrow the candidate set with the catalog bitmaps before any scoring
+    bitmap, candidates, warning = resolve_filters(compiled_catalog, level, category)
     
-    # If no matches, return default popular courses
-    if not recommended_courses:
-        recommended_courses = COURSE_DATABASE[:3]
+    positions = []
+    if query.strip():
+        # Only the postings for the query terms are scored
+        with metrics.stage("keyword_search"):
+            ranked = course_index.search(query, limit=3, mode=SEARCH_RANKING_MODE, candidates=candidates)
+        positions = [doc_id for doc_id, score in ranked]
     
-    # Filter by level if specified
-    warning = None
-    if level:
-        level_filtered = [c for c in recommended_courses if c['level'].lower() == level.lower()]
-        if level_filtered:
-            recommended_courses = level_filtered[:3]
-        else:
-            warning = f"No courses found for level '{level}'. Showing best matches instead."
-            recommended_courses = recommended_courses[:3]
-    else:
-        recommended_courses = recommended_courses[:3]
+    # If no matches, return default popular courses (within the filters when possible)
+    if not positions:
+        metrics.fallback("default_courses")
+        positions = compiled_catalog.first(bitmap if bitmap is not None else compiled_catalog.live_bitmap, 3)
     
-    return recommended_courses, warning
+    return positions, warning
 
 @app.get("/")
 def root():
@@ -159,7 +158,7 @@ def root():
         "message": "Course Recommendation API is running!", 
         "version": "1.0.0",
         "status": "healthy",
-        "total_courses": len(COURSE_DATABASE)
+        "total_courses": compiled_catalog.live_count
     }
 
 @app.get("/health")
@@ -167,31 +166,36 @@ def health_check():
     return {
         "status": "healthy", 
         "service": "course-recommendations",
-        "courses_loaded": len(COURSE_DATABASE)
+        "courses_loaded": compiled_catalog.live_count,
+        "catalog_load": catalog_load_report,
     }
 
 @app.get("/courses")
 def get_all_courses():
     """Get all available courses"""
-    return {"courses": COURSE_DATABASE, "total": len(COURSE_DATABASE)}
+    courses = [compiled_catalog.record(i) for i in sorted(compiled_catalog.members(compiled_catalog.live_bitmap))]
+    return {"courses": courses, "total": len(courses)}
 
 @app.post("/courserecommendations", response_model=RAGResponse)
+@profiler.endpoint
 def get_recommendations_endpoint(request: RAGRequest):
     try:
-        print(f"Received query: '{request.query}' with level: '{request.level}'")
-        
-        courses, warning = simple_search(request.query, request.level)
-        
-        print(f"Found {len(courses)} courses")
-        for course in courses:
-            print(f"  - {course['title']} ({course['level']})")
+        positions, warning = simple_search(request.query, request.level, request.category)
         
-        course_objects = [Course(**course) for course in courses]
+        recommendations_log.info("Recommended courses", extra={
+            "query": request.query,
+            "level_filter": request.level,
+            "category_filter": request.category,
+            "courses": [f"{compiled_catalog.titles[i]} ({compiled_catalog.levels[i]})" for i in positions],
+        })
         
-        return RAGResponse(courses=course_objects, warning=warning)
+        # Courses were validated at catalog load; join their pre-encoded JSON
+        with metrics.stage("serialization"):
+            body = recommendations_json([compiled_catalog.json_fragments[i] for i in positions], warning)
+        return RawJSONResponse(body)
         
-    except Exception as e:
-        print(f"Error in recommendations: {str(e)}")
+    except Exception:
+        recommendations_log.exception("Error in recommendations; serving fallback courses")
         # Return fallback courses on error
         fallback_courses = [Course(**course) for course in COURSE_DATABASE[:3]]
         return RAGResponse(
@@ -199,8 +203,14 @@ def get_recommendations_endpoint(request: RAGRequest):
             warning="Using fallback recommendations due to technical issues."
         )
 
+# Catalog and index sizes, read on each scrape
+metrics.gauge("ugrama_catalog_courses", "Live courses in the catalog.", lambda: compiled_catalog.live_count)
+metrics.gauge("ugrama_catalog_version", "Catalog version; bumps on every applied change batch.", lambda: compiled_catalog.version)
+metrics.gauge("ugrama_keyword_index_terms", "Distinct terms in the keyword search index.", lambda: len(course_index.vocabulary))
+
 if __name__ == "__main__":
-    import uvicorn
-    print("Starting Course Recommendation API...")
-    print(f"Loaded {len(COURSE_DATABASE)} courses")
-    uvicorn.run(app, host="0.0.0.0", port=8001, reload=True)
\ No newline at end of file
+    from prefork import serve_from_env
+
+    logger.info("Starting Course Recommendation API", extra={"courses": compiled_catalog.live_count})
+    # SERVER_WORKERS > 1 forks the workers after the catalog and keyword index are loaded
+    serve_from_env(app, "onboarding_chat:app", default_port=8001)
\ No newline at end of file
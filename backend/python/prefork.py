@@ -0,0 +1,168 @@
+"""
+Pre-fork launcher for the FastAPI services.
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker imports the
+app and loads its own catalog, keyword index, MiniLM model and FAISS index.
+Here the parent imports the app and runs a preload step once, freezes the
+garbage collector's view of those objects, and forks the workers from it:
+model weights, index buffers and catalog arrays stay in copy-on-write pages
+shared by every worker.
+
+Settings (environment):
+    SERVER_WORKERS   worker processes (default 1, served in this process)
+    SERVER_HOST      bind address (default 0.0.0.0)
+    SERVER_PORT      port (default: the service's own)
+    SERVER_RELOAD=1  development mode: a single auto-reloading uvicorn worker
+
+Workers that exit unexpectedly are replaced (forked again from the preloaded
+parent); SIGTERM / SIGINT stop every worker. Check per-worker memory at
+/health/ready ("process") or with benchmarks/bench_worker_memory.py.
+"""
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from structured_logging import get_logger
+
+logger = get_logger("prefork")
+
+# Workers that die sooner than this after starting are not restarted (likely a startup bug)
+MIN_WORKER_LIFETIME_SECONDS = 5.0
+
+# PyTorch's intra-op thread count before preloading, restored in each worker
+_torch_threads: Optional[int] = None
+
+
+@contextmanager
+def single_threaded_torch():
+    """
+    Run the block with PyTorch's intra-op pool at one thread. An OpenMP pool
+    created before fork() is not usable in the children; the workers restore
+    the thread count after forking (see restore_torch_threads).
+    """
+    global _torch_threads
+    try:
+        import torch
+    except ImportError:
+        yield
+        return
+    _torch_threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    yield
+
+
+def restore_torch_threads():
+    torch = sys.modules.get("torch")
+    if _torch_threads is not None and torch is not None:
+        torch.set_num_threads(_torch_threads)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """The listening socket, bound by the parent and inherited by every worker"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, log_level: str):
+    import uvicorn
+
+    # uvicorn installs its own SIGINT/SIGTERM handlers for a graceful shutdown
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    restore_torch_threads()
+    config = uvicorn.Config(app, log_level=log_level, timeout_graceful_shutdown=10)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(app, host: str, port: int, workers: int, preload: Optional[Callable[[], None]] = None,
+          log_level: str = "info"):
+    """
+    Serve `app` from `workers` processes forked after `preload` has run. A single
+    worker is served in this process and loads as the app's warmup settings say.
+    """
+    if workers <= 1:
+        import uvicorn
+
+        uvicorn.run(app, host=host, port=port, log_level=log_level)
+        return
+
+    if preload is not None:
+        with single_threaded_torch():
+            preload()
+
+    sock = bind_socket(host, port)
+    # Objects that exist now are never collected; without this the collector's
+    # first pass in each worker would write to (and un-share) every page they live on
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app, sock, log_level)
+            except BaseException:
+                traceback.print_exc()
+                os._exit(1)
+            # A normal interpreter exit, so the worker's atexit hooks (e.g. log flushing) run
+            sys.exit(0)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        code = os.waitstatus_to_exitcode(status)
+        if time.monotonic() - started < MIN_WORKER_LIFETIME_SECONDS:
+            logger.warning("Worker exited right after starting; not restarting it", extra={"pid": pid, "exit_code": code})
+            continue
+        logger.warning("Worker exited; starting a replacement", extra={"pid": pid, "exit_code": code})
+        spawn()
+    sock.close()
+
+
+def serve_from_env(app, import_string: str, default_port: int, preload: Optional[Callable[[], None]] = None):
+    """Serve `app` as configured by SERVER_WORKERS / SERVER_HOST / SERVER_PORT / SERVER_RELOAD"""
+    host = os.getenv("SERVER_HOST", "0.0.0.0")
+    port = int(os.getenv("SERVER_PORT", str(default_port)))
+    if os.getenv("SERVER_RELOAD", "0") == "1":
+        import uvicorn
+
+        # Reloading re-imports the app from its import string in a child process
+        uvicorn.run(import_string, host=host, port=port, reload=True)
+        return
+    serve(app, host, port, workers=int(os.getenv("SERVER_WORKERS", "1")), preload=preload)
@@ -0,0 +1,81 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class EngineRegistry:
+    """
+    Tracks the load state of each serving engine (keyword, FAISS, TF-IDF, LLM)
+    and named startup timings, for the liveness/readiness endpoints.
+
+    Engines registered with required=True must be ready before the service
+    reports ready; the others are reported but do not gate readiness.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self._engines: Dict[str, dict] = {}
+        self._timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, required: bool = False):
+        with self._lock:
+            self._engines[name] = {"status": PENDING, "required": required, "load_seconds": None, "error": None}
+
+    def set_status(self, name: str, status: str, load_seconds: Optional[float] = None, error: Optional[str] = None):
+        with self._lock:
+            engine = self._engines.setdefault(name, {"required": False})
+            if load_seconds is not None:
+                load_seconds = round(load_seconds, 4)
+            engine.update(status=status, load_seconds=load_seconds, error=error)
+
+    def status(self, name: str) -> Optional[str]:
+        with self._lock:
+            engine = self._engines.get(name)
+            return engine["status"] if engine else None
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """One engine's readiness, or whether every required engine is ready"""
+        with self._lock:
+            if name is not None:
+                return self._engines.get(name, {}).get("status") == READY
+            return all(e["status"] == READY for e in self._engines.values() if e["required"])
+
+    def record_timing(self, label: str, seconds: float):
+        with self._lock:
+            self._timings[label] = round(seconds, 4)
+
+    @contextmanager
+    def timed(self, label: str):
+        """Record how long the block took under `label`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(label, time.perf_counter() - start)
+
+    @contextmanager
+    def loading(self, name: str):
+        """Mark an engine loading for the duration of the block, then ready or failed"""
+        self.set_status(name, LOADING)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.set_status(name, FAILED, time.perf_counter() - start, str(e))
+            raise
+        self.set_status(name, READY, time.perf_counter() - start)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.perf_counter() - self.started_at, 3),
+                "engines": {name: dict(engine) for name, engine in self._engines.items()},
+                "timings": dict(self._timings),
+            }
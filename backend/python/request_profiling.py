@@ -0,0 +1,375 @@
+"""
+Opt-in profiling of single requests, for finding hot spots (simple_search,
+the retrievers, serialization) on a live service.
+
+Off unless PROFILING_ENABLED=1: the middleware is then not installed and
+`RequestProfiler.endpoint` returns endpoints unchanged, so there is no cost.
+When enabled, a request is profiled only if it carries
+
+    X-Profile: sample | cprofile
+    X-Profile-Token: <PROFILING_TOKEN>      (required when PROFILING_TOKEN is set)
+    X-Profile-Output: file | inline         (default PROFILING_OUTPUT, "file")
+
+- sample: a thread records the request's stacks every PROFILING_SAMPLE_INTERVAL_MS
+  (default 1) as collapsed stacks ("a;b;c 12" lines), the input format of
+  flamegraph.pl, speedscope and inferno
+- cprofile: deterministic cProfile
+
+"file" writes the profile to PROFILING_DIR (collapsed stacks, or a .prof file
+for pstats / snakeviz) and names it in the X-Profile-File response header;
+"inline" runs the request to completion and replaces its response with the
+profile as collapsed stacks in both modes (the original status is in
+X-Profile-Response-Status). For cprofile the stacks are rebuilt from the
+pstats caller graph and counted in microseconds: a function called from
+several places has its time split between them in proportion to each
+caller's share, so deep stacks are estimates, not observed paths.
+
+Profiled: the event loop thread for the whole request (routing, validation,
+async endpoints, streamed bodies) and the worker thread of sync endpoints
+decorated with `endpoint`. One request is profiled at a time; others arriving
+meanwhile are served normally with X-Profile: busy.
+
+The event loop thread is shared: while a profile is running it also records
+whatever other requests' coroutines run on the loop (cProfile traces them,
+the sampler sees their stacks). For a clean profile of one request, send it
+to an otherwise idle worker; worker-thread time of decorated sync endpoints
+is always the profiled request's own.
+"""
+import cProfile
+import hmac
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+# PROFILING_DIR: where profiles of requests sent with X-Profile-Output: file are written
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profiles")
+
+# Stacks rebuilt from cProfile stats stop below this many microseconds or this depth
+COLLAPSED_MIN_MICROSECONDS = 1
+COLLAPSED_MAX_DEPTH = 128
+
+MODES = ("sample", "cprofile")
+OUTPUTS = ("file", "inline")
+
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _pstats_label(func) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        # Built-ins, e.g. "<method 'join' of 'str' objects>"
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def collapsed_from_stats(stats: pstats.Stats, root: str) -> Counter:
+    """
+    Collapsed-stack counts (microseconds) from a cProfile run's caller graph.
+    Walks down from functions without callers; each callee's share of a path
+    is the time it spent under that caller over its total time.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, cumulative))
+
+    counts: Counter = Counter()
+
+    def walk(func, path, share: float):
+        _, _, total, cumulative, _ = stats.stats[func]
+        label = ";".join(path)
+        own = round(total * share * 1e6)
+        if own >= COLLAPSED_MIN_MICROSECONDS:
+            counts[label] += own
+        if len(path) >= COLLAPSED_MAX_DEPTH:
+            return
+        for callee, edge in callees.get(func, ()):
+            callee_cumulative = stats.stats[callee][3]
+            callee_share = share * edge / callee_cumulative if callee_cumulative else 0.0
+            name = _pstats_label(callee)
+            if name in path or edge * share * 1e6 < COLLAPSED_MIN_MICROSECONDS:
+                continue
+            walk(callee, path + [name], callee_share)
+
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            walk(func, [root, _pstats_label(func)], 1.0)
+    return counts
+
+
+class StackSampler:
+    """Samples the stacks of registered threads at a fixed interval into collapsed-stack counts"""
+
+    def __init__(self, interval_ms: float = 1.0):
+        self.interval = interval_ms / 1000.0
+        self.counts: Counter = Counter()
+        self.samples = 0
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def add_thread(self, ident: int, name: str):
+        with self._lock:
+            self._threads[ident] = name
+
+    def remove_thread(self, ident: int):
+        with self._lock:
+            self._threads.pop(ident, None)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                threads = list(self._threads.items())
+            frames = sys._current_frames()
+            for ident, name in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    stack.append(f"thread {name}")
+                    self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class RequestProfile:
+    """The profile of one request, collected from every thread that works on it"""
+
+    def __init__(self, mode: str, sample_interval_ms: float):
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        # (thread name, cProfile.Profile) per profiled thread
+        self._profiles = []
+        self._sampler = StackSampler(sample_interval_ms) if mode == "sample" else None
+        if self._sampler is not None:
+            self._sampler.start()
+
+    @contextmanager
+    def thread(self):
+        """Profile the current thread for the duration of the block"""
+        if self._sampler is not None:
+            ident = threading.get_ident()
+            self._sampler.add_thread(ident, threading.current_thread().name)
+            try:
+                yield
+            finally:
+                self._sampler.remove_thread(ident)
+        else:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                self._profiles.append((threading.current_thread().name, profile))
+
+    def finish(self):
+        if self._sampler is not None:
+            self._sampler.stop()
+        self.seconds = time.perf_counter() - self.started
+
+    def stats(self) -> Optional[pstats.Stats]:
+        if not self._profiles:
+            return None
+        stats = pstats.Stats(self._profiles[0][1])
+        for _, profile in self._profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def collapsed(self) -> str:
+        """Collapsed stacks per thread: sample counts, or microseconds for cprofile"""
+        if self._sampler is not None:
+            return self._sampler.collapsed()
+        counts: Counter = Counter()
+        for name, profile in self._profiles:
+            counts.update(collapsed_from_stats(pstats.Stats(profile), f"thread {name}"))
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    def report(self) -> bytes:
+        """The inline response body: collapsed stacks in either mode"""
+        return self.collapsed().encode("utf-8")
+
+    def write(self, path: str):
+        if self._sampler is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._sampler.collapsed())
+        else:
+            stats = self.stats()
+            if stats is not None:
+                stats.dump_stats(path)
+
+    @property
+    def extension(self) -> str:
+        return ".collapsed" if self._sampler is not None else ".prof"
+
+
+class RequestProfiler:
+    """Header-gated request profiling for one FastAPI app; see the module docstring"""
+
+    def __init__(self, enabled: bool = False, token: Optional[str] = None, directory: str = DEFAULT_PROFILE_DIR,
+                 default_output: str = "file", sample_interval_ms: float = 1.0):
+        self.enabled = enabled
+        self.token = token
+        self.directory = directory
+        self.default_output = default_output if default_output in OUTPUTS else "file"
+        self.sample_interval_ms = sample_interval_ms
+        # One profiled request at a time: cProfile allows one profiler per thread
+        self._busy = threading.Lock()
+        self.profiled = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        return cls(
+            enabled=os.getenv("PROFILING_ENABLED", "0") == "1",
+            token=os.getenv("PROFILING_TOKEN") or None,
+            directory=os.getenv("PROFILING_DIR", DEFAULT_PROFILE_DIR),
+            default_output=os.getenv("PROFILING_OUTPUT", "file"),
+            sample_interval_ms=float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "1")),
+        )
+
+    def install(self, app):
+        """Add the profiling middleware to `app` when profiling is enabled"""
+        if self.enabled:
+            app.add_middleware(RequestProfilingMiddleware, profiler=self)
+
+    def endpoint(self, func):
+        """
+        Profile a sync endpoint's worker thread as part of its request. Apply
+        below the route decorator; returns `func` itself when profiling is off.
+        """
+        if not self.enabled:
+            return func
+
+        @wraps(func)
+        def profiled(*args, **kwargs):
+            profile = _current_profile.get()
+            if profile is None:
+                return func(*args, **kwargs)
+            with profile.thread():
+                return func(*args, **kwargs)
+
+        return profiled
+
+    def authorized(self, token: Optional[str]) -> bool:
+        if self.token is None:
+            return True
+        return token is not None and hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8"))
+
+    def acquire(self) -> bool:
+        return self._busy.acquire(blocking=False)
+
+    def release(self):
+        self._busy.release()
+
+    def profile_path(self, path: str, extension: str) -> str:
+        name = path.strip("/").replace("/", "_") or "root"
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}{extension}"
+        return os.path.join(self.directory, filename)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "profiled": self.profiled, "rejected": self.rejected}
+
+
+class RequestProfilingMiddleware:
+    """Plain ASGI middleware: profiles requests that ask for it, passes the rest straight through"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]
+                   if key.lower().startswith(b"x-profile")}
+        mode = headers.get("x-profile", "").strip().lower()
+        if mode not in MODES:
+            await self.app(scope, receive, send)
+            return
+        if not self.profiler.authorized(headers.get("x-profile-token")):
+            self.profiler.rejected += 1
+            await self.app(scope, receive, send)
+            return
+        if not self.profiler.acquire():
+            await self.app(scope, receive, self._with_header(send, b"x-profile", b"busy"))
+            return
+        try:
+            await self._profile(scope, receive, send, mode, headers.get("x-profile-output", self.profiler.default_output).strip().lower())
+        finally:
+            self.profiler.release()
+
+    @staticmethod
+    def _with_header(send, name: bytes, value: bytes):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(name, value)]}
+            await send(message)
+        return send_wrapper
+
+    async def _profile(self, scope, receive, send, mode: str, output: str):
+        from starlette.concurrency import run_in_threadpool
+
+        profile = RequestProfile(mode, self.profiler.sample_interval_ms)
+        token = _current_profile.set(profile)
+        inline = output == "inline"
+        path = None if inline else self.profiler.profile_path(scope["path"], profile.extension)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            if not inline:
+                await send(message)
+
+        try:
+            with profile.thread():
+                await self.app(scope, receive, send_wrapper if inline else self._with_header(
+                    send_wrapper, b"x-profile-file", os.path.basename(path).encode("latin-1")))
+        finally:
+            _current_profile.reset(token)
+            profile.finish()
+            self.profiler.profiled += 1
+
+        if inline:
+            body = profile.report()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    (b"x-profile-response-status", str(status[0]).encode("latin-1")),
+                    (b"x-profile-seconds", f"{profile.seconds:.4f}".encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+        else:
+            os.makedirs(self.profiler.directory, exist_ok=True)
+            await run_in_threadpool(profile.write, path)
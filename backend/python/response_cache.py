@@ -0,0 +1,99 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response bytes, so it is stable across workers and restarts"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (RFC 9110): '*', or any listed tag, ignoring W/ prefixes"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses, scoped to a catalog version.
+
+    Looking up or storing with a newer version than the current one drops
+    every entry, so a catalog change invalidates the cache without any
+    explicit hook. A request that read the catalog before the change carries
+    an older version: its lookup misses and its response is not stored, so it
+    can neither clear the cache nor move it back to the old version.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.version: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version: int) -> bool:
+        """Move to `version` if it is newer; False if it is older than the current one"""
+        if self.version is not None and version < self.version:
+            return False
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+        return True
+
+    def get(self, key: Hashable, version: int) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self._entries.get(key) if self._check_version(version) else None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached
+
+    def put(self, key: Hashable, body: bytes, version: int) -> CachedResponse:
+        cached = CachedResponse(body=body, etag=make_etag(body))
+        if self.max_entries <= 0:
+            return cached
+        with self._lock:
+            if not self._check_version(version):
+                return cached
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return cached
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,562 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import AbstractSet, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+# --- Vectorized Batch Scoring Imports ---
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+# Fields covered by the keyword index, in scoring order
+SEARCHABLE_FIELDS = ("title", "description", "category")
+FIELD_COUNT = len(SEARCHABLE_FIELDS)
+
+# Term frequencies are stored as unsigned 16-bit counts
+MAX_TF = 65535
+
+# BM25F field boosts, carried over from the legacy title (+5) and category (+10) bonuses
+FIELD_BOOSTS = {"title": 5.0, "description": 1.0, "category": 10.0}
+
+# Legacy keyword groups that boost a whole category when any query keyword is in the group
+DOMAIN_BONUSES = [
+    (
+        {'web', 'react', 'javascript', 'html', 'css', 'frontend', 'backend', 'fullstack', 'full-stack'},
+        ('web development',),
+        15,
+    ),
+    (
+        {'data', 'science', 'python', 'machine', 'learning', 'ai', 'analytics'},
+        ('data science', 'machine learning'),
+        15,
+    ),
+    (
+        {'design', 'ui', 'ux', 'figma', 'prototype', 'wireframe'},
+        ('design',),
+        15,
+    ),
+]
+
+RANKING_MODES = ("bm25", "legacy")
+
+# Relative change in live course count after which average field lengths are recomputed
+STATS_REFRESH_DRIFT = 0.2
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric terms for BM25 scoring"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _drop_postings(docs: array, columns: Tuple[array, ...], removals: AbstractSet[int]) -> tuple:
+    """
+    Copies of a postings list without the removed doc ids. Doc ids are sorted,
+    so each removal is found by bisection and the rest is copied in slices.
+    """
+    width = [len(column) // max(len(docs), 1) for column in columns]
+    kept_docs = array(docs.typecode)
+    kept_columns = [array(column.typecode) for column in columns]
+    start = 0
+    for doc_id in sorted(removals):
+        i = bisect_left(docs, doc_id, start)
+        if i == len(docs) or docs[i] != doc_id:
+            continue
+        kept_docs.extend(docs[start:i])
+        for kept, column, w in zip(kept_columns, columns, width):
+            kept.extend(column[start * w:i * w])
+        start = i + 1
+    kept_docs.extend(docs[start:])
+    for kept, column, w in zip(kept_columns, columns, width):
+        kept.extend(column[start * w:])
+    return (kept_docs, *kept_columns)
+
+
+class CourseSearchIndex:
+    """
+    Inverted index over course title, description and category.
+
+    Two ranking modes are supported:
+    - "bm25": BM25F over tokenized fields, using FIELD_BOOSTS as field weights.
+    - "legacy": reproduces the original substring-count scoring of simple_search
+      exactly, but resolves keywords through the index instead of rescanning
+      every course on each request.
+
+    Both modes only touch the postings of the query terms. `search_batch` scores
+    many queries as one sparse matrix product and returns exactly what `search`
+    returns for each query. `apply_changes` adds and removes courses in place
+    while searches keep running.
+
+    Postings are parallel arrays sorted by doc id (ids, weights, per-field term
+    frequencies), about 18 bytes per posting, so million-course catalogs fit in
+    memory. Large catalogs can be built chunk by chunk with `extend` and
+    `finalize` instead of passing every course up front.
+    """
+
+    def __init__(self, courses: Iterable[dict] = (), k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # Positions handed out so far; removed positions are never reused
+        self.size = 0
+        self.live_count = 0
+        self._removed: Set[int] = set()
+        self._boosts = [FIELD_BOOSTS[field] for field in SEARCHABLE_FIELDS]
+        # Serializes writers and batch scoring; single-query search reads without it
+        self._lock = threading.RLock()
+
+        # BM25: term -> (doc ids, saturated tf weights, flattened per-field tfs)
+        self._postings: Dict[str, Tuple[array, array, array]] = {}
+        self.vocabulary: Dict[str, int] = {}
+        # Per-field token counts, FIELD_COUNT entries per position
+        self._field_lengths = array("i")
+        self._length_totals = [0] * FIELD_COUNT
+        self._stats_size = 0
+        self._avg_lengths = [1.0] * FIELD_COUNT
+
+        # Legacy: whitespace token -> (doc ids, counts) for each field
+        self._raw_postings: Dict[str, Dict[str, Tuple[array, array]]] = {field: {} for field in SEARCHABLE_FIELDS}
+        self._domain_docs: List[Set[int]] = [set() for _ in DOMAIN_BONUSES]
+        self._raw_vocabulary: Tuple[str, ...] = ()
+
+        self._bm25_matrix = None
+        self._expand_keyword = lru_cache(maxsize=4096)(self._expand_keyword_uncached)
+
+        self.extend(courses)
+        self.finalize()
+
+    def _analyze(self, course: dict):
+        field_terms = [tokenize(str(course.get(field, ""))) for field in SEARCHABLE_FIELDS]
+        lengths = tuple(len(terms) for terms in field_terms)
+
+        counts: Dict[str, List[int]] = {}
+        for f, terms in enumerate(field_terms):
+            for term in terms:
+                counts.setdefault(term, [0] * FIELD_COUNT)[f] += 1
+
+        raw_counts = {field: Counter(str(course.get(field, "")).lower().split()) for field in SEARCHABLE_FIELDS}
+
+        category = str(course.get("category", "")).lower()
+        groups = [
+            group for group, (_, categories, _) in enumerate(DOMAIN_BONUSES)
+            if any(name in category for name in categories)
+        ]
+        if max(lengths, default=0) > MAX_TF:
+            counts = {term: [min(tf, MAX_TF) for tf in tfs] for term, tfs in counts.items()}
+        return lengths, counts, raw_counts, groups
+
+    # --- Bulk Build ---
+
+    def extend(self, courses: Iterable[dict]):
+        """
+        Append courses while building the index, e.g. one chunk of a streamed
+        catalog at a time. Postings grow in place and weights are only computed
+        by `finalize`, so searches must not run until it has been called.
+        """
+        with self._lock:
+            for course in courses:
+                doc_id = self.size
+                lengths, term_tfs, raw_counts, groups = self._analyze(course)
+                self._field_lengths.extend(lengths)
+                self.size += 1
+                self.live_count += 1
+                for f, length in enumerate(lengths):
+                    self._length_totals[f] += length
+
+                for term, tfs in term_tfs.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array("i"), array("d"), array("H"))
+                    postings[0].append(doc_id)
+                    postings[1].append(0.0)
+                    postings[2].extend(tfs)
+
+                for field, counts in raw_counts.items():
+                    field_postings = self._raw_postings[field]
+                    for token, count in counts.items():
+                        postings = field_postings.get(token)
+                        if postings is None:
+                            postings = field_postings[token] = (array("i"), array("i"))
+                        postings[0].append(doc_id)
+                        postings[1].append(count)
+
+                for group in groups:
+                    self._domain_docs[group].add(doc_id)
+
+    def finalize(self):
+        """
+        Compute collection statistics and every posting weight. Weight arrays are
+        replaced, not mutated, so this is also safe while searches are running.
+        """
+        with self._lock:
+            self._stats_size = self.live_count
+            self._avg_lengths = [
+                max(total / self.live_count, 1.0) if self.live_count else 1.0 for total in self._length_totals
+            ]
+            for term, (docs, _, tfs) in list(self._postings.items()):
+                self._postings[term] = (docs, self._weights(docs, tfs), tfs)
+                if term not in self.vocabulary:
+                    self.vocabulary[term] = len(self.vocabulary)
+
+            self._raw_vocabulary = tuple(sorted(set().union(*self._raw_postings.values())))
+            self._expand_keyword = lru_cache(maxsize=4096)(self._expand_keyword_uncached)
+            self._bm25_matrix = None
+
+    def _weights(self, docs: Sequence[int], tfs: Sequence[int]) -> array:
+        return array("d", (self._weight(tfs, i * FIELD_COUNT, doc_id) for i, doc_id in enumerate(docs)))
+
+    # --- Incremental Updates ---
+
+    def apply_changes(
+        self,
+        added: Sequence[Tuple[int, dict]] = (),
+        removed: Sequence[Tuple[int, dict]] = (),
+    ):
+        """
+        Remove and add courses without rebuilding the index.
+
+        `removed` holds (doc_id, course) pairs exactly as they were indexed;
+        `added` doc ids must continue from `size`. Only the postings of terms
+        the changed courses contain are copied and updated; idf always comes
+        from the live document count. Postings are replaced rather than
+        mutated, so concurrent searches see either the old or the new postings
+        of a term, never a half-updated one.
+
+        Average field lengths stay as computed by the last `finalize`; it runs
+        again once the live course count drifts more than STATS_REFRESH_DRIFT.
+        """
+        with self._lock:
+            # Validate and analyze every course before any state changes, so a bad
+            # change raises with the index untouched
+            removals = []
+            removed_ids = set()
+            for doc_id, course in removed:
+                if doc_id >= self.size or doc_id in self._removed or doc_id in removed_ids:
+                    continue
+                removed_ids.add(doc_id)
+                removals.append((doc_id, self._analyze(course)))
+            additions = []
+            for offset, (doc_id, course) in enumerate(added):
+                if doc_id != self.size + offset:
+                    raise ValueError(f"Expected doc id {self.size + offset}, got {doc_id}; positions are append-only")
+                additions.append((doc_id, self._analyze(course)))
+
+            # term -> (added (doc, tfs) pairs, removed docs)
+            touched_terms: Dict[str, Tuple[list, Set[int]]] = defaultdict(lambda: ([], set()))
+            touched_tokens: Dict[str, Dict[str, Tuple[list, Set[int]]]] = {
+                field: defaultdict(lambda: ([], set())) for field in SEARCHABLE_FIELDS
+            }
+            domain_changes = [(set(), set()) for _ in DOMAIN_BONUSES]
+
+            for doc_id, (lengths, term_tfs, raw_counts, groups) in removals:
+                self.live_count -= 1
+                for f, length in enumerate(lengths):
+                    self._length_totals[f] -= length
+                for term in term_tfs:
+                    touched_terms[term][1].add(doc_id)
+                for field, counts in raw_counts.items():
+                    for token in counts:
+                        touched_tokens[field][token][1].add(doc_id)
+                for group in groups:
+                    domain_changes[group][1].add(doc_id)
+
+            for doc_id, (lengths, term_tfs, raw_counts, groups) in additions:
+                self._field_lengths.extend(lengths)
+                self.size += 1
+                self.live_count += 1
+                for f, length in enumerate(lengths):
+                    self._length_totals[f] += length
+                for term, tfs in term_tfs.items():
+                    touched_terms[term][0].append((doc_id, tfs))
+                for field, counts in raw_counts.items():
+                    for token, count in counts.items():
+                        touched_tokens[field][token][0].append((doc_id, count))
+                for group in groups:
+                    domain_changes[group][0].add(doc_id)
+
+            for term, (additions, removals) in touched_terms.items():
+                docs, weights, tfs = self._postings.get(term) or (array("i"), array("d"), array("H"))
+                docs, weights, tfs = _drop_postings(docs, (weights, tfs), removals)
+                for doc_id, doc_tfs in additions:
+                    docs.append(doc_id)
+                    weights.append(self._weight(doc_tfs, 0, doc_id))
+                    tfs.extend(doc_tfs)
+                # Postings before the vocabulary entry, so readers never see a term without them
+                self._postings[term] = (docs, weights, tfs)
+                if term not in self.vocabulary:
+                    self.vocabulary[term] = len(self.vocabulary)
+
+            self._update_raw_postings(touched_tokens)
+
+            for group, (added_docs, removed_docs) in enumerate(domain_changes):
+                if added_docs or removed_docs:
+                    self._domain_docs[group] = (self._domain_docs[group] - removed_docs) | added_docs
+
+            self._removed |= removed_ids
+            self._bm25_matrix = None
+
+            if abs(self.live_count - self._stats_size) > STATS_REFRESH_DRIFT * max(self._stats_size, 1):
+                self.finalize()
+
+    def _update_raw_postings(self, touched_tokens: Dict[str, Dict[str, Tuple[list, Set[int]]]]):
+        tokens = set()
+        for field, changes in touched_tokens.items():
+            field_postings = self._raw_postings[field]
+            for token, (additions, removals) in changes.items():
+                tokens.add(token)
+                docs, counts = field_postings.get(token) or (array("i"), array("i"))
+                docs, counts = _drop_postings(docs, (counts,), removals)
+                for doc_id, count in additions:
+                    docs.append(doc_id)
+                    counts.append(count)
+                if docs:
+                    field_postings[token] = (docs, counts)
+                else:
+                    field_postings.pop(token, None)
+
+        present = {token for token in tokens if any(token in self._raw_postings[field] for field in SEARCHABLE_FIELDS)}
+        vocabulary = set(self._raw_vocabulary)
+        updated = (vocabulary - tokens) | present
+        if updated != vocabulary:
+            self._raw_vocabulary = tuple(sorted(updated))
+            # Keyword expansions depend on the vocabulary; swap in a fresh cache with it
+            self._expand_keyword = lru_cache(maxsize=4096)(self._expand_keyword_uncached)
+
+    def _idf(self, df: int) -> float:
+        return math.log(1 + (self.live_count - df + 0.5) / (df + 0.5))
+
+    def _weight(self, tfs: Sequence[int], offset: int, doc_id: int) -> float:
+        # Saturated field-weighted tf of the FIELD_COUNT tfs at tfs[offset:]. idf is
+        # applied per term at query time, so a change in document frequency does
+        # not touch every posting of the term.
+        weighted_tf = 0.0
+        base = doc_id * FIELD_COUNT
+        for f in range(FIELD_COUNT):
+            tf = tfs[offset + f]
+            if tf:
+                norm = 1 - self.b + self.b * self._field_lengths[base + f] / self._avg_lengths[f]
+                weighted_tf += self._boosts[f] * tf / norm
+        return weighted_tf * (self.k1 + 1) / (weighted_tf + self.k1)
+
+    # --- Single Query ---
+
+    def search(
+        self,
+        query: str,
+        limit: int = 6,
+        mode: str = "bm25",
+        candidates: Optional[AbstractSet[int]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Return up to `limit` (doc_id, score) pairs with score > 0, best first.
+        When `candidates` is given, only those doc ids are scored.
+        """
+        if mode == "bm25":
+            scores = self._score_bm25(query, candidates)
+        elif mode == "legacy":
+            scores = self._score_legacy(query, candidates)
+        else:
+            raise ValueError(f"Unknown ranking mode '{mode}'. Expected one of {RANKING_MODES}.")
+
+        ranked = sorted(
+            ((doc_id, score) for doc_id, score in scores.items() if score > 0),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return ranked[:limit]
+
+    def _query_terms(self, query: str) -> List[Tuple[str, int]]:
+        # Known query terms with their counts, in vocabulary order. The batch
+        # path accumulates in this same order, which keeps float sums identical.
+        counts = Counter(term for term in tokenize(query) if term in self.vocabulary)
+        return sorted(counts.items(), key=lambda item: self.vocabulary[item[0]])
+
+    def _score_bm25(self, query: str, candidates: Optional[AbstractSet[int]]) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term, count in self._query_terms(query):
+            docs, weights, _ = self._postings[term]
+            query_weight = count * self._idf(len(docs))
+            for doc_id, weight in zip(docs, weights):
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                scores[doc_id] += query_weight * weight
+        return scores
+
+    def _expand_keyword_uncached(self, keyword: str) -> Tuple[str, ...]:
+        # Legacy matching is substring based, so a keyword hits every token containing it
+        return tuple(token for token in self._raw_vocabulary if keyword in token)
+
+    def _score_legacy(self, query: str, candidates: Optional[AbstractSet[int]]) -> Dict[int, float]:
+        keywords = query.lower().split()
+        scores: Dict[int, float] = defaultdict(float)
+        category_hits = set()
+        title_hits = set()
+
+        for keyword in keywords:
+            for token in self._expand_keyword(keyword):
+                occurrences = token.count(keyword)
+                for field in SEARCHABLE_FIELDS:
+                    postings = self._raw_postings[field].get(token)
+                    if not postings:
+                        continue
+                    pairs = zip(*postings)
+                    if candidates is not None:
+                        pairs = [(d, c) for d, c in pairs if d in candidates]
+                    hits = category_hits if field == "category" else title_hits if field == "title" else None
+                    for doc_id, count in pairs:
+                        scores[doc_id] += occurrences * count
+                        if hits is not None:
+                            hits.add(doc_id)
+
+        for doc_id in category_hits:
+            scores[doc_id] += 10
+        for doc_id in title_hits:
+            scores[doc_id] += 5
+
+        for group, (group_keywords, _, bonus) in enumerate(DOMAIN_BONUSES):
+            if any(keyword in group_keywords for keyword in keywords):
+                for doc_id in self._domain_docs[group]:
+                    if candidates is None or doc_id in candidates:
+                        scores[doc_id] += bonus
+
+        return scores
+
+    # --- Batch Queries ---
+
+    def search_batch(
+        self,
+        queries: Sequence[str],
+        limit: int = 6,
+        mode: str = "bm25",
+        candidates: Optional[Sequence[Optional[AbstractSet[int]]]] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Score many queries as one sparse (query x term) @ (term x course) product.
+        `candidates`, if given, holds one optional candidate set per query.
+        Falls back to calling `search` per query when NumPy/SciPy are missing.
+        """
+        if candidates is None:
+            candidates = [None] * len(queries)
+        if sparse is None:
+            return [
+                self.search(query, limit=limit, mode=mode, candidates=allowed)
+                for query, allowed in zip(queries, candidates)
+            ]
+
+        if mode not in RANKING_MODES:
+            raise ValueError(f"Unknown ranking mode '{mode}'. Expected one of {RANKING_MODES}.")
+        # The matrices are built from a consistent snapshot of the postings
+        with self._lock:
+            size = self.size
+            scores = self._score_bm25_batch(queries) if mode == "bm25" else self._score_legacy_batch(queries)
+
+        masks: Dict[int, "np.ndarray"] = {}
+        results = []
+        for row, allowed in enumerate(candidates):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            doc_ids = scores.indices[start:end]
+            values = scores.data[start:end]
+
+            if allowed is not None:
+                if id(allowed) not in masks:
+                    # Candidates may already include positions added after the snapshot
+                    mask = np.zeros(max(size, max(allowed, default=-1) + 1), dtype=bool)
+                    mask[np.fromiter(allowed, dtype=np.int64, count=len(allowed))] = True
+                    masks[id(allowed)] = mask
+                keep = masks[id(allowed)][doc_ids]
+                doc_ids, values = doc_ids[keep], values[keep]
+
+            keep = values > 0
+            doc_ids, values = doc_ids[keep], values[keep]
+            order = np.lexsort((doc_ids, -values))[:limit]
+            results.append([(int(doc_ids[i]), float(values[i])) for i in order])
+        return results
+
+    def _csr(self, rows, cols, data, shape: Tuple[int, int]):
+        matrix = sparse.csr_matrix(
+            (np.asarray(data, dtype=np.float64), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+            shape=shape,
+        )
+        matrix.sum_duplicates()
+        return matrix
+
+    def _postings_csr(self, entries, shape: Tuple[int, int]):
+        """CSR matrix from (row, doc id array, float64 value array or scalar) entries"""
+        rows, cols, data = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)], [np.zeros(0)]
+        for row, docs, values in entries:
+            doc_ids = np.frombuffer(docs, dtype=np.intc)
+            rows.append(np.full(len(doc_ids), row, dtype=np.int64))
+            cols.append(doc_ids)
+            if isinstance(values, array):
+                data.append(np.frombuffer(values, dtype=np.float64))
+            else:
+                data.append(np.full(len(doc_ids), values, dtype=np.float64))
+        return self._csr(np.concatenate(rows), np.concatenate(cols), np.concatenate(data), shape)
+
+    def _score_bm25_batch(self, queries: Sequence[str]):
+        if self._bm25_matrix is None:
+            self._bm25_matrix = self._postings_csr(
+                ((self.vocabulary[term], docs, weights) for term, (docs, weights, _) in self._postings.items()),
+                (len(self.vocabulary), self.size),
+            )
+
+        rows, cols, data = [], [], []
+        for row, query in enumerate(queries):
+            for term, count in self._query_terms(query):
+                rows.append(row)
+                cols.append(self.vocabulary[term])
+                data.append(count * self._idf(len(self._postings[term][0])))
+        query_matrix = self._csr(rows, cols, data, (len(queries), len(self.vocabulary)))
+        return (query_matrix @ self._bm25_matrix).tocsr()
+
+    def _score_legacy_batch(self, queries: Sequence[str]):
+        # Legacy scores are integers, so summation order does not matter here
+        keyword_ids: Dict[str, int] = {}
+        q_rows, q_cols, q_data = [], [], []
+        domain_rows, domain_cols = [], []
+        for row, query in enumerate(queries):
+            keywords = query.lower().split()
+            for keyword in keywords:
+                q_rows.append(row)
+                q_cols.append(keyword_ids.setdefault(keyword, len(keyword_ids)))
+                q_data.append(1)
+            for group, (group_keywords, _, _) in enumerate(DOMAIN_BONUSES):
+                if any(keyword in group_keywords for keyword in keywords):
+                    domain_rows.append(row)
+                    domain_cols.append(group)
+
+        count_entries = []
+        hit_entries = {"title": [], "category": []}
+        for keyword, k in keyword_ids.items():
+            for token in self._expand_keyword(keyword):
+                occurrences = token.count(keyword)
+                for field in SEARCHABLE_FIELDS:
+                    postings = self._raw_postings[field].get(token)
+                    if not postings:
+                        continue
+                    docs, counts = postings
+                    count_entries.append((k, docs, array("d", (occurrences * count for count in counts))))
+                    if field in hit_entries:
+                        hit_entries[field].append((k, docs, 1))
+
+        shape = (len(keyword_ids), self.size)
+        query_matrix = self._csr(q_rows, q_cols, q_data, (len(queries), len(keyword_ids)))
+        query_any = query_matrix.sign()
+
+        scores = query_matrix @ self._postings_csr(count_entries, shape)
+        scores = scores + 10 * (query_any @ self._postings_csr(hit_entries["category"], shape)).sign()
+        scores = scores + 5 * (query_any @ self._postings_csr(hit_entries["title"], shape)).sign()
+
+        domain_entries = [
+            (group, array("i", sorted(self._domain_docs[group])), bonus)
+            for group, (_, _, bonus) in enumerate(DOMAIN_BONUSES)
+        ]
+        domain_query = self._csr(domain_rows, domain_cols, [1] * len(domain_rows), (len(queries), len(DOMAIN_BONUSES)))
+        scores = scores + domain_query @ self._postings_csr(domain_entries, (len(DOMAIN_BONUSES), self.size))
+        return scores.tocsr()
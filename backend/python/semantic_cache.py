@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Hashable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Upper edges of the best-match similarity buckets reported by stats(); the
+# distribution of near matches is what the threshold gets tuned against
+SIMILARITY_BUCKETS = (0.8, 0.85, 0.9, 0.95, 0.98, 1.0)
+
+
+class CachedAnswer(NamedTuple):
+    answer: str
+    source_ids: List[str]
+    llm_seconds: float
+    expires_at: float
+    scope: Hashable = None
+    similarity: float = 1.0
+
+
+class SemanticAnswerCache:
+    """
+    LLM answers keyed by query embedding rather than query text.
+
+    A lookup returns the entry whose stored query has the highest cosine
+    similarity with the new one, if it reaches `threshold`. Embeddings live in
+    one preallocated float32 matrix, so a lookup is a single matrix-vector
+    product over at most `max_entries` rows. A `scope` (e.g. the request's
+    filters) partitions the entries: lookups only match entries stored under
+    the same scope. Entries are evicted LRU and
+    expire after `ttl_seconds`; any change of catalog version drops them all,
+    since the cached sources and answers may no longer hold.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1024, ttl_seconds: float = 3600.0):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version: Optional[int] = None
+
+        self._vectors: Optional[np.ndarray] = None
+        self._occupied = np.zeros(max(max_entries, 0), dtype=bool)
+        # Scope -> which slots hold entries stored under it
+        self._scopes: Dict[Hashable, np.ndarray] = {}
+        # Slot -> entry, least recently used first
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+        self._hit_similarity_total = 0.0
+        self._best_similarity_counts = [0] * len(SIMILARITY_BUCKETS)
+
+    @classmethod
+    def from_env(cls) -> "SemanticAnswerCache":
+        """
+        SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES and
+        SEMANTIC_CACHE_TTL_SECONDS configure the cache; max entries of 0 disables it.
+        """
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+        )
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, version: int):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._clear()
+            self.version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._occupied[:] = False
+        self._scopes.clear()
+
+    def _drop(self, slot: int):
+        entry = self._entries.pop(slot)
+        self._occupied[slot] = False
+        self._scopes[entry.scope][slot] = False
+
+    def get(self, embedding: Sequence[float], version: int, scope: Hashable = None) -> Optional[CachedAnswer]:
+        if self.max_entries <= 0:
+            return None
+        query = self._unit(embedding)
+        with self._lock:
+            self._check_version(version)
+            in_scope = self._scopes.get(scope)
+            while in_scope is not None and in_scope.any():
+                similarities = self._vectors @ query
+                similarities[~in_scope] = -np.inf
+                slot = int(np.argmax(similarities))
+                entry = self._entries[slot]
+                if entry.expires_at < time.monotonic():
+                    self._drop(slot)
+                    self.expirations += 1
+                    continue
+
+                similarity = float(similarities[slot])
+                self._best_similarity_counts[min(bisect_right(SIMILARITY_BUCKETS, similarity), len(SIMILARITY_BUCKETS) - 1)] += 1
+                if similarity < self.threshold:
+                    break
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                self.saved_seconds += entry.llm_seconds
+                self._hit_similarity_total += similarity
+                return entry._replace(similarity=similarity)
+            self.misses += 1
+            return None
+
+    def put(self, embedding: Sequence[float], answer: str, source_ids: List[str], llm_seconds: float, version: int, scope: Hashable = None):
+        if self.max_entries <= 0:
+            return
+        vector = self._unit(embedding)
+        with self._lock:
+            # Generated against a catalog that has since changed
+            if self.version is not None and version < self.version:
+                return
+            self._check_version(version)
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.max_entries, len(vector)), dtype=np.float32)
+                self._clear()
+
+            if len(self._entries) >= self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            slot = int(np.argmin(self._occupied))
+            self._vectors[slot] = vector
+            self._occupied[slot] = True
+            if scope not in self._scopes:
+                self._scopes[scope] = np.zeros(self.max_entries, dtype=bool)
+            self._scopes[scope][slot] = True
+            self._entries[slot] = CachedAnswer(
+                answer=answer,
+                source_ids=list(source_ids),
+                llm_seconds=llm_seconds,
+                expires_at=time.monotonic() + self.ttl_seconds,
+                scope=scope,
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            lower = (None,) + SIMILARITY_BUCKETS[:-1]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "saved_llm_seconds": round(self.saved_seconds, 3),
+                "mean_hit_similarity": round(self._hit_similarity_total / self.hits, 4) if self.hits else None,
+                # Best match per lookup that found any live entry, by similarity bucket
+                "best_similarity": {
+                    f"<{high}" if low is None else (f">={low}" if high == 1.0 else f"{low}-{high}"): count
+                    for low, high, count in zip(lower, SIMILARITY_BUCKETS, self._best_similarity_counts)
+                },
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,217 @@
+"""
+Structured JSON logging for the services, off the request path.
+
+Handlers only enqueue records; a QueueListener thread formats them as one
+JSON object per line and writes them to stdout, so a slow or contended
+stdout never blocks a request thread. When the queue is full, records are
+dropped and counted rather than waited on.
+
+Settings (environment):
+    LOG_LEVEL             minimum level for every logger (default INFO)
+    LOG_ENDPOINT_LEVELS   per-endpoint minimum levels, e.g. "courserecommendations=WARNING"
+    LOG_SAMPLE_RATE       fraction of sub-WARNING endpoint records kept (default 1.0)
+    LOG_SAMPLE_RATES      per-endpoint overrides, e.g. "courserecommendations=0.01,get-study-vibe-profile=0.5"
+    LOG_QUEUE_SIZE        records buffered for the writer thread (default 10000)
+
+Warnings and errors are never sampled out.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+LOGGER_NAME = "ugrama"
+
+# LogRecord attributes; anything else on a record came from `extra` and is emitted as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def _parse_mapping(value: str) -> Dict[str, str]:
+    """"a=1,b=2" -> {"a": "1", "b": "2"}; malformed entries are ignored"""
+    mapping = {}
+    for item in value.split(","):
+        key, sep, setting = item.partition("=")
+        if sep and key.strip():
+            mapping[key.strip()] = setting.strip()
+    return mapping
+
+
+def _level(name: str, default: int = logging.INFO) -> int:
+    level = logging.getLevelName(name.strip().upper()) if name else default
+    return level if isinstance(level, int) else default
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per record: ts, level, logger, message, then the record's extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: a full queue drops the record and counts it"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now (the arguments may change later)
+        # but leave the JSON encoding to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EndpointLogger(logging.LoggerAdapter):
+    """
+    Logger for one endpoint: adds `endpoint` to every record, applies the
+    endpoint's level and keeps only `sample_rate` of its sub-WARNING records.
+    """
+
+    def __init__(self, logger: logging.Logger, endpoint: str, level: int = logging.NOTSET, sample_rate: float = 1.0):
+        super().__init__(logger, {"endpoint": endpoint})
+        self.level = level
+        self.sample_rate = sample_rate
+
+    def isEnabledFor(self, level: int) -> bool:
+        return level >= self.level and self.logger.isEnabledFor(level)
+
+    def _sampled(self, level: int) -> bool:
+        if not self.isEnabledFor(level):
+            return False
+        return level >= logging.WARNING or self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def log(self, level: int, msg, *args, **kwargs):
+        if self._sampled(level):
+            msg, kwargs = self.process(msg, kwargs)
+            self.logger.log(level, msg, *args, **kwargs)
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **(kwargs.get("extra") or {})}
+        return msg, kwargs
+
+
+class LoggingSetup:
+    """The queue, its writer thread and the per-endpoint settings, read from the environment once"""
+
+    def __init__(self, level: int, endpoint_levels: Dict[str, int], sample_rate: float,
+                 sample_rates: Dict[str, float], queue_size: int, stream=None):
+        self.endpoint_levels = endpoint_levels
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates
+
+        self.queue_size = queue_size
+        self.handler = logging.StreamHandler(stream or sys.stdout)
+        self.handler.setFormatter(JsonFormatter())
+        self.queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+
+        root = logging.getLogger(LOGGER_NAME)
+        root.setLevel(level)
+        root.addHandler(self.queue_handler)
+        root.propagate = False
+        self._start_listener()
+        atexit.register(self.stop)
+        # Worker processes forked from a preloaded parent (prefork.py) need their own writer thread
+        os.register_at_fork(after_in_child=self._restart_after_fork)
+
+    def _start_listener(self):
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, self.handler, respect_handler_level=True)
+        self.listener.start()
+        self._running = True
+
+    def _restart_after_fork(self):
+        # The parent's records are its own to write; start the child with an empty queue
+        self.queue_handler.queue = queue.Queue(maxsize=self.queue_size)
+        self.queue_handler.dropped = 0
+        self._start_listener()
+
+    @classmethod
+    def from_env(cls) -> "LoggingSetup":
+        sample_rates = {}
+        for endpoint, rate in _parse_mapping(os.getenv("LOG_SAMPLE_RATES", "")).items():
+            try:
+                sample_rates[endpoint] = float(rate)
+            except ValueError:
+                pass
+        return cls(
+            level=_level(os.getenv("LOG_LEVEL", "INFO")),
+            endpoint_levels={endpoint: _level(name) for endpoint, name in _parse_mapping(os.getenv("LOG_ENDPOINT_LEVELS", "")).items()},
+            sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "1.0")),
+            sample_rates=sample_rates,
+            queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+        )
+
+    def stop(self):
+        """Flush the queued records; safe to call more than once"""
+        if self._running:
+            self._running = False
+            self.listener.stop()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue_handler.queue.qsize(),
+            "dropped": self.queue_handler.dropped,
+        }
+
+
+_setup: Optional[LoggingSetup] = None
+_setup_lock = threading.Lock()
+
+
+def logging_setup() -> LoggingSetup:
+    """The process-wide LoggingSetup, created from the environment on first use"""
+    global _setup
+    if _setup is None:
+        with _setup_lock:
+            if _setup is None:
+                _setup = LoggingSetup.from_env()
+    return _setup
+
+
+def get_logger(name: str) -> logging.Logger:
+    """A logger under the queued JSON handler, e.g. get_logger("study_along")"""
+    logging_setup()
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def endpoint_logger(logger: logging.Logger, endpoint: str) -> EndpointLogger:
+    """`logger` with the level and sample rate configured for `endpoint`"""
+    setup = logging_setup()
+    return EndpointLogger(
+        logger,
+        endpoint,
+        level=setup.endpoint_levels.get(endpoint, logging.NOTSET),
+        sample_rate=setup.sample_rates.get(endpoint, setup.sample_rate),
+    )
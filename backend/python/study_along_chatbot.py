@@ -1,14 +1,32 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+_module_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from dotenv import load_dotenv
 import os
-
-# Import the study vibe functionality
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.docstore.document import Document
+import threading
+
+# The study vibe embedding stack (langchain, sentence-transformers, torch) is
+# imported lazily by initialize_vibe_profiler, off the startup path.
+
+from catalog import CompiledCatalog, resolve_filters
+from catalog_source import catalog_source_from_env
+from catalog_stream import process_memory_mb
+from catalog_sync import CatalogSync, apply_to_keyword_index, load_catalog
+from course_json import RawJSONResponse, batch_json, course_encoder, recommendations_json
+from metrics import ServiceMetrics
+from readiness import PENDING, EngineRegistry
+from request_profiling import RequestProfiler
+from response_cache import ResponseCache, etag_matches
+from search_index import CourseSearchIndex
+from structured_logging import endpoint_logger, get_logger, logging_setup
+from vibe_profiler import VibeProfiler, single_vibe_profile
 
 # ... existing course database import ...
 try:
@@ -70,10 +88,16 @@ load_dotenv()
 class RAGRequest(BaseModel):
     query: str
     level: Optional[str] = None
+    category: Optional[str] = None
 
 class VibeRequest(BaseModel):
     user_id: str
     description: str
+    top_k: Optional[int] = None
+
+class VibeMatch(BaseModel):
+    vibe_tag: str
+    score: Optional[float] = None
 
 class UserProfileResponse(BaseModel):
     user_id: str
@@ -81,6 +105,15 @@ class UserProfileResponse(BaseModel):
     parameters: Dict[str, str]
     description: str
     recommendations: List[str] = []
+    matches: List[VibeMatch] = []
+    blended_parameters: Dict[str, str] = {}
+    parameter_weights: Dict[str, Dict[str, float]] = {}
+
+class VibeBatchRequest(BaseModel):
+    requests: List[VibeRequest]
+
+class VibeBatchResponse(BaseModel):
+    results: List[UserProfileResponse]
 
 class Course(BaseModel):
     id: str
@@ -98,8 +131,37 @@ class RAGResponse(BaseModel):
     courses: List[Course]
     warning: Optional[str] = None
 
+class RAGBatchRequest(BaseModel):
+    requests: List[RAGRequest]
+
+class RAGBatchResponse(BaseModel):
+    results: List[RAGResponse]
+
+# Engine readiness: keyword search gates readiness, the embedding vibe profiler warms up behind it
+engines = EngineRegistry()
+engines.register("keyword", required=True)
+engines.register("vibe_profiler")
+
+# WARMUP_MODE: "background" (default) serves keyword endpoints immediately and
+# loads the embedding vibe profiler in a thread; "eager" loads it before serving.
+WARMUP_MODE = os.getenv("WARMUP_MODE", "background")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers forked by prefork.py start with the profiler the parent preloaded (or failed to)
+    warmed = engines.status("vibe_profiler") != PENDING
+    if not warmed and WARMUP_MODE == "eager":
+        warm_vibe_profiler()
+    elif not warmed:
+        threading.Thread(target=warm_vibe_profiler, name="vibe-warmup", daemon=True).start()
+    if catalog_sync is not None:
+        catalog_sync.start()
+    yield
+    if catalog_sync is not None:
+        catalog_sync.stop()
+
 # FastAPI App
-app = FastAPI(title="Enhanced Course Recommender with Study Vibe Profiler", version="2.0.0")
+app = FastAPI(title="Enhanced Course Recommender with Study Vibe Profiler", version="2.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -107,64 +169,114 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-# Initialize Study Vibe Retriever
-def initialize_vibe_retriever():
+# Per-stage and per-endpoint latency, fallback counters and index sizes, served at /metrics
+metrics = ServiceMetrics()
+metrics.install(app)
+
+# PROFILING_ENABLED=1: profile single requests sent with an X-Profile header (see request_profiling.py)
+profiler = RequestProfiler.from_env()
+profiler.install(app)
+
+# JSON log records, written to stdout by a background thread (see structured_logging.py)
+logger = get_logger("study_along")
+recommendations_log = endpoint_logger(logger, "courserecommendations")
+batch_log = endpoint_logger(logger, "courserecommendations/batch")
+vibe_log = endpoint_logger(logger, "get-study-vibe-profile")
+vibe_batch_log = endpoint_logger(logger, "get-study-vibe-profile/batch")
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Descriptions embedded and scored together per chunk of a bulk profiling request
+VIBE_BATCH_SIZE = int(os.getenv("VIBE_BATCH_SIZE", "256"))
+
+# Query embedding cache, created along with the embedding stack during warmup
+embedding_cache = None
+
+# Simple keyword retriever: serves vibe profiles while the embedding profiler warms up,
+# and replaces it if the embedding stack cannot be loaded
+class SimpleRetriever:
+    def __init__(self, db):
+        self.db = db
+
+    def get_relevant_documents(self, query: str):
+        from langchain_core.documents import Document
+
+        q = (query or "").lower()
+        best = None
+        best_score = -1
+        
+        for vibe in self.db:
+            score = 0
+            # Parameter keywords match (higher weight)
+            for v in vibe.get('parameters', {}).values():
+                if v and v.lower() in q:
+                    score += 3
+            
+            # Description keyword overlap
+            for token in vibe.get('description', '').split():
+                t = token.lower().strip('.,')
+                if t and t in q:
+                    score += 1
+            
+            if score > best_score:
+                best_score = score
+                best = vibe
+
+        # If nothing matched, return the first profile as default
+        if best is None:
+            best = self.db[0]
+
+        return [Document(page_content=best['description'], metadata=best)]
+
+# Initialize Study Vibe Profiler
+def initialize_vibe_profiler():
     """
     Creates the core components of our vibe matching system once.
+    Imports the embedding stack on first call and records each step's timing.
     """
     try:
-        # Convert vibe data into LangChain Document objects
-        documents = []
-        for vibe in STUDY_VIBES_DATABASE:
-            doc = Document(page_content=vibe["description"], metadata=vibe)
-            documents.append(doc)
-        
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vector_store = FAISS.from_documents(documents, embeddings)
-        return vector_store.as_retriever(search_kwargs={"k": 1})
+        with engines.loading("vibe_profiler"):
+            with engines.timed("import_embedding_stack"):
+                from embedding_backends import load_embeddings
+                from embedding_batcher import batched_embeddings_from_env
+                from embedding_cache import CachedEmbeddings, EmbeddingCache
+            
+            with engines.timed("load_embedding_model"):
+                # Repeated descriptions (e.g. canned onboarding answers) skip the forward pass;
+                # concurrent cache misses are micro-batched into one forward pass
+                global embedding_cache
+                embedding_cache = EmbeddingCache.from_env()
+                embeddings = CachedEmbeddings(
+                    batched_embeddings_from_env(load_embeddings(EMBEDDING_MODEL_NAME)),
+                    embedding_cache,
+                )
+            
+            # A handful of vibes: a normalized matrix scored with one product beats any index
+            with engines.timed("build_vibe_matrix"):
+                profiler = VibeProfiler.from_env(STUDY_VIBES_DATABASE, embeddings)
+            
+            # The first forward pass is much slower than steady state; pay it here, not on a request
+            with engines.timed("warmup_embedding"):
+                embeddings.embed_query("warmup")
+            
+            return profiler
 
     except Exception as e:
-        print(f"WARNING: Could not initialize vector retriever; falling back to simple keyword retriever: {e}")
-
-        # Simple fallback retriever
-        class SimpleRetriever:
-            def __init__(self, db):
-                self.db = db
-
-            def get_relevant_documents(self, query: str):
-                q = (query or "").lower()
-                best = None
-                best_score = -1
-                
-                for vibe in self.db:
-                    score = 0
-                    # Parameter keywords match (higher weight)
-                    for v in vibe.get('parameters', {}).values():
-                        if v and v.lower() in q:
-                            score += 3
-                    
-                    # Description keyword overlap
-                    for token in vibe.get('description', '').split():
-                        t = token.lower().strip('.,')
-                        if t and t in q:
-                            score += 1
-                    
-                    if score > best_score:
-                        best_score = score
-                        best = vibe
-
-                # If nothing matched, return the first profile as default
-                if best is None:
-                    best = self.db[0]
-
-                return [Document(page_content=best['description'], metadata=best)]
-
-        return SimpleRetriever(STUDY_VIBES_DATABASE)
-
-# Initialize the vibe retriever
-vibe_retriever = initialize_vibe_retriever()
+        logger.warning("Could not initialize vibe profiler; falling back to simple keyword retriever", extra={"error": str(e)})
+        return None
+
+def warm_vibe_profiler():
+    """Load the embedding profiler and swap it in once ready"""
+    global vibe_profiler
+    vibe_profiler = initialize_vibe_profiler()
+    engines.record_timing("boot_to_vibe_ready", time.perf_counter() - engines.started_at)
+
+# Keyword retriever is available immediately; the embedding profiler replaces it after warmup
+keyword_vibe_retriever = SimpleRetriever(STUDY_VIBES_DATABASE)
+vibe_profiler = None
 
 # Helper function to generate study recommendations based on vibe
 def generate_study_recommendations(vibe_tag: str, parameters: Dict[str, str]) -> List[str]:
@@ -240,73 +352,73 @@ def generate_study_recommendations(vibe_tag: str, parameters: Dict[str, str]) ->
 
     return recommendations[:6]  # Return top 6 recommendations
 
-# Course recommendation function (existing)
-def simple_search(query: str, level: Optional[str] = None):
-    """Simple keyword-based search algorithm"""
-    if not query.strip():
-        return COURSE_DATABASE[:3], None
+# Compiled catalog and course recommendation index, built once at load
+# SEARCH_RANKING_MODE: "bm25" (default) or "legacy" for the original substring-count ranking
+SEARCH_RANKING_MODE = os.getenv("SEARCH_RANKING_MODE", "bm25")
+
+# CATALOG_DATABASE_URL: read published courses from the Prisma Course table instead of
+# COURSE_DATABASE, and keep polling it so new and edited courses are served without a redeploy.
+# CATALOG_NDJSON_PATH streams the initial catalog from an NDJSON export instead (see catalog_stream.py)
+catalog_source = catalog_source_from_env()
+with engines.loading("keyword"):
+    # Courses are validated and JSON-encoded once here; responses join the stored fragments
+    compiled_catalog = CompiledCatalog(encoder=course_encoder(Course))
+    course_index = CourseSearchIndex()
+    catalog_load_report = load_catalog([compiled_catalog.extend, course_index.extend], catalog_source, COURSE_DATABASE)
+    course_index.finalize()
+
+catalog_sync = None
+if catalog_source is not None:
+    catalog_sync = CatalogSync.from_env(catalog_source)
+    catalog_sync.subscribe(lambda changes: apply_to_keyword_index(compiled_catalog, course_index, changes))
+
+# Serialized /courserecommendations responses, invalidated when the catalog version changes
+# RESPONSE_CACHE_MAX_ENTRIES: 0 disables the cache
+response_cache = ResponseCache(max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")))
+
+def _select_courses(ranked, bitmap: Optional[int]):
+    """Catalog positions of the ranked courses, falling back to default popular courses"""
+    positions = [doc_id for doc_id, score in ranked]
     
-    query_lower = query.lower()
-    keywords = query_lower.split()
+    # If no matches, return default popular courses (within the filters when possible)
+    if not positions:
+        metrics.fallback("default_courses")
+        positions = compiled_catalog.first(bitmap if bitmap is not None else compiled_catalog.live_bitmap, 3)
     
-    scored_courses = []
-    
-    for course in COURSE_DATABASE:
-        score = 0
-        course_text = f"{course['title']} {course['description']} {course['category']}".lower()
-        
-        # Score based on keyword matches
-        for keyword in keywords:
-            if keyword in course_text:
-                score += course_text.count(keyword)
-        
-        # Bonus scoring
-        if any(keyword in course['category'].lower() for keyword in keywords):
-            score += 10
-        
-        if any(keyword in course['title'].lower() for keyword in keywords):
-            score += 5
-        
-        # Category-specific bonuses
-        web_keywords = ['web', 'react', 'javascript', 'html', 'css', 'frontend', 'backend', 'fullstack', 'full-stack']
-        if any(keyword in web_keywords for keyword in keywords):
-            if 'web development' in course['category'].lower():
-                score += 15
-        
-        data_keywords = ['data', 'science', 'python', 'machine', 'learning', 'ai', 'analytics']
-        if any(keyword in data_keywords for keyword in keywords):
-            if 'data science' in course['category'].lower() or 'machine learning' in course['category'].lower():
-                score += 15
-        
-        design_keywords = ['design', 'ui', 'ux', 'figma', 'prototype', 'wireframe']
-        if any(keyword in design_keywords for keyword in keywords):
-            if 'design' in course['category'].lower():
-                score += 15
-        
-        if score > 0:
-            scored_courses.append((course, score))
+    return positions
+
+# Course recommendation function (existing)
+def simple_search(query: str, level: Optional[str] = None, category: Optional[str] = None):
+    """Keyword search over the prebuilt course index, with level/category filters applied first"""
+    # Narrow the candidate set with the catalog bitmaps before any scoring
+    bitmap, candidates, warning = resolve_filters(compiled_catalog, level, category)
     
-    # Sort by score and take top courses
-    scored_courses.sort(key=lambda x: x[1], reverse=True)
-    recommended_courses = [course for course, score in scored_courses[:6]]
+    ranked = []
+    if query.strip():
+        # Only the postings for the query terms are scored
+        with metrics.stage("keyword_search"):
+            ranked = course_index.search(query, limit=3, mode=SEARCH_RANKING_MODE, candidates=candidates)
     
-    # If no matches, return default popular courses
-    if not recommended_courses:
-        recommended_courses = COURSE_DATABASE[:3]
+    return _select_courses(ranked, bitmap), warning
+
+def simple_search_batch(requests: List["RAGRequest"]):
+    """Batch version of simple_search: one sparse matrix product for all queries, same results"""
+    filters = [resolve_filters(compiled_catalog, r.level, r.category) for r in requests]
     
-    # Filter by level if specified
-    warning = None
-    if level:
-        level_filtered = [c for c in recommended_courses if c['level'].lower() == level.lower()]
-        if level_filtered:
-            recommended_courses = level_filtered[:3]
-        else:
-            warning = f"No courses found for level '{level}'. Showing best matches instead."
-            recommended_courses = recommended_courses[:3]
-    else:
-        recommended_courses = recommended_courses[:3]
+    with metrics.stage("keyword_search_batch"):
+        ranked_lists = course_index.search_batch(
+            [r.query for r in requests],
+            limit=3,
+            mode=SEARCH_RANKING_MODE,
+            candidates=[candidates for _, candidates, _ in filters],
+        )
     
-    return recommended_courses, warning
+    results = []
+    for request, (bitmap, _, warning), ranked in zip(requests, filters, ranked_lists):
+        if not request.query.strip():
+            ranked = []
+        results.append((_select_courses(ranked, bitmap), warning))
+    return results
 
 # API Endpoints
 @app.get("/")
@@ -315,96 +427,201 @@ def root():
         "message": "Enhanced Course Recommendation API with Study Vibe Profiler!", 
         "version": "2.0.0",
         "status": "healthy",
-        "total_courses": len(COURSE_DATABASE),
+        "total_courses": compiled_catalog.live_count,
         "available_vibes": len(STUDY_VIBES_DATABASE)
     }
 
 @app.get("/health")
 def health_check():
     return {
-        "status": "healthy", 
+        "status": "healthy" if engines.is_ready() else "starting", 
         "service": "enhanced-course-recommendations",
-        "courses_loaded": len(COURSE_DATABASE),
-        "vibes_loaded": len(STUDY_VIBES_DATABASE)
+        "courses_loaded": compiled_catalog.live_count,
+        "vibes_loaded": len(STUDY_VIBES_DATABASE),
+        "engines": {name: engine["status"] for name, engine in engines.snapshot()["engines"].items()}
     }
 
+@app.get("/health/live")
+def liveness_check():
+    """The process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness_check():
+    """Ready once the keyword engine is loaded; reports every engine and startup timings"""
+    ready = engines.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "starting",
+            **engines.snapshot(),
+            "embedding_cache": embedding_cache.stats() if embedding_cache else None,
+            "vibe_profiler": vibe_profiler.stats() if vibe_profiler else None,
+            "logging": logging_setup().stats(),
+            "profiling": profiler.stats(),
+            "process": {"pid": os.getpid(), **(process_memory_mb() or {})},
+            "catalog": {
+                "version": compiled_catalog.version,
+                "courses": compiled_catalog.live_count,
+                "load": catalog_load_report,
+                "sync": catalog_sync.stats() if catalog_sync else None,
+            },
+        },
+    )
+
 @app.post("/courserecommendations", response_model=RAGResponse)
-def get_recommendations_endpoint(request: RAGRequest):
+@profiler.endpoint
+def get_recommendations_endpoint(request: RAGRequest, http_request: Request):
     try:
-        print(f"Received query: '{request.query}' with level: '{request.level}'")
+        # Level and category stay verbatim in the key: the warning message echoes them
+        cache_key = (" ".join(request.query.lower().split()), request.level, request.category)
+        cached = response_cache.get(cache_key, compiled_catalog.version)
         
-        courses, warning = simple_search(request.query, request.level)
+        if cached is None:
+            positions, warning = simple_search(request.query, request.level, request.category)
+            
+            recommendations_log.info("Recommended courses", extra={
+                "query": request.query,
+                "level_filter": request.level,
+                "category_filter": request.category,
+                "courses": [f"{compiled_catalog.titles[i]} ({compiled_catalog.levels[i]})" for i in positions],
+            })
+            
+            # Courses were validated at catalog load; join their pre-encoded JSON
+            with metrics.stage("serialization"):
+                body = recommendations_json([compiled_catalog.json_fragments[i] for i in positions], warning)
+            cached = response_cache.put(cache_key, body, compiled_catalog.version)
         
-        print(f"Found {len(courses)} courses")
-        for course in courses:
-            print(f"  - {course['title']} ({course['level']})")
+        # Let clients revalidate with If-None-Match and skip the body when nothing changed
+        if etag_matches(http_request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers={"ETag": cached.etag})
         
-        course_objects = [Course(**course) for course in courses]
+        return RawJSONResponse(content=cached.body, headers={"ETag": cached.etag})
         
-        return RAGResponse(courses=course_objects, warning=warning)
-        
-    except Exception as e:
-        print(f"Error in recommendations: {str(e)}")
+    except Exception:
+        recommendations_log.exception("Error in recommendations; serving fallback courses")
         fallback_courses = [Course(**course) for course in COURSE_DATABASE[:3]]
         return RAGResponse(
             courses=fallback_courses, 
             warning="Using fallback recommendations due to technical issues."
         )
 
+@app.post("/courserecommendations/batch", response_model=RAGBatchResponse)
+@profiler.endpoint
+def get_batch_recommendations_endpoint(request: RAGBatchRequest):
+    """
+    Score many query/level pairs together. Each result matches what
+    /courserecommendations returns for the same request.
+    """
+    try:
+        results = simple_search_batch(request.requests)
+        batch_log.info("Recommended courses for a batch", extra={"queries": len(request.requests)})
+        
+        with metrics.stage("serialization"):
+            body = batch_json(
+                recommendations_json([compiled_catalog.json_fragments[i] for i in positions], warning)
+                for positions, warning in results
+            )
+        return RawJSONResponse(body)
+        
+    except Exception:
+        batch_log.exception("Error in batch recommendations; serving fallback courses")
+        fallback = RAGResponse(
+            courses=[Course(**course) for course in COURSE_DATABASE[:3]],
+            warning="Using fallback recommendations due to technical issues."
+        )
+        return RAGBatchResponse(results=[fallback for _ in request.requests])
+
+def profile_vibes(requests: List[VibeRequest]) -> List[dict]:
+    """
+    Vibe profiles for the requests, in order: embedded and scored together once
+    the embedding profiler is warm, matched one by one by keywords until then.
+    """
+    engine = vibe_profiler
+    if engine is None:
+        metrics.fallback("keyword_vibe_retriever")
+        with metrics.stage("vibe_keyword_search"):
+            return [
+                single_vibe_profile(keyword_vibe_retriever.get_relevant_documents(request.description)[0].metadata)
+                for request in requests
+            ]
+    with metrics.stage("embedding"):
+        queries = engine.embed([request.description for request in requests])
+    with metrics.stage("vibe_scoring"):
+        return engine.profile_scores(engine.score(queries), [request.top_k for request in requests])
+
+def _profile_response(request: VibeRequest, profile: dict, recommendations: Dict[str, List[str]]) -> UserProfileResponse:
+    """The response for one profile; `recommendations` memoizes them per vibe across a batch"""
+    vibe = profile["vibe"]
+    if vibe["vibe_tag"] not in recommendations:
+        recommendations[vibe["vibe_tag"]] = generate_study_recommendations(vibe["vibe_tag"], vibe["parameters"])
+    return UserProfileResponse(
+        user_id=request.user_id,
+        vibe_tag=vibe["vibe_tag"],
+        parameters=vibe["parameters"],
+        description=vibe["description"],
+        recommendations=recommendations[vibe["vibe_tag"]],
+        matches=profile["matches"],
+        blended_parameters=profile["blended_parameters"],
+        parameter_weights=profile["parameter_weights"],
+    )
+
+def _default_profile_response(request: VibeRequest) -> UserProfileResponse:
+    return _profile_response(request, single_vibe_profile(STUDY_VIBES_DATABASE[0]), {})
+
 @app.post("/get-study-vibe-profile", response_model=UserProfileResponse)
+@profiler.endpoint
 def get_vibe_profile_endpoint(request: VibeRequest):
     """
     Receives a user's natural language description of their study habits
-    and returns the best matching structured profile with personalized recommendations.
+    and returns the best matching structured profile with personalized recommendations,
+    plus the top-k matching vibes with their scores and the blended parameters.
     """
-    if not vibe_retriever:
-        raise HTTPException(status_code=503, detail="Study vibe profiling service is currently unavailable.")
-
     try:
-        # Use the retriever to find the single best matching vibe document
-        retrieved_docs = vibe_retriever.get_relevant_documents(request.description)
-        
-        if not retrieved_docs:
-            raise HTTPException(status_code=404, detail="Could not determine a study vibe from your description. Please try rephrasing.")
-
-        # Extract the structured profile data from the document's metadata
-        best_match_profile = retrieved_docs[0].metadata
+        profile = profile_vibes([request])[0]
         
         # Generate personalized recommendations
-        recommendations = generate_study_recommendations(
-            best_match_profile["vibe_tag"], 
-            best_match_profile["parameters"]
-        )
+        with metrics.stage("study_recommendations"):
+            response = _profile_response(request, profile, {})
         
-        # Create response
-        response_data = {
-            "user_id": request.user_id,
-            "vibe_tag": best_match_profile["vibe_tag"],
-            "parameters": best_match_profile["parameters"],
-            "description": best_match_profile["description"],
-            "recommendations": recommendations
-        }
+        vibe_log.info("Generated study vibe profile", extra={"user_id": request.user_id, "vibe_tag": response.vibe_tag})
         
-        print(f"Generated study vibe profile for user {request.user_id}: {best_match_profile['vibe_tag']}")
+        with metrics.stage("serialization"):
+            body = response.model_dump_json()
+        return RawJSONResponse(body)
         
-        return UserProfileResponse(**response_data)
+    except Exception:
+        vibe_log.exception("Error in vibe profiling; serving the default profile")
+        metrics.fallback("default_vibe_profile")
+        return _default_profile_response(request)
+
+@app.post("/get-study-vibe-profile/batch", response_model=VibeBatchResponse)
+@profiler.endpoint
+def get_batch_vibe_profiles_endpoint(request: VibeBatchRequest):
+    """
+    Profile many students in one call. Descriptions are embedded and scored
+    VIBE_BATCH_SIZE at a time; each result matches what /get-study-vibe-profile
+    returns for the same request.
+    """
+    try:
+        recommendations: Dict[str, List[str]] = {}
+        bodies = []
+        for start in range(0, len(request.requests), VIBE_BATCH_SIZE):
+            chunk = request.requests[start:start + VIBE_BATCH_SIZE]
+            profiles = profile_vibes(chunk)
+            with metrics.stage("serialization"):
+                bodies.extend(
+                    _profile_response(vibe_request, profile, recommendations).model_dump_json().encode("utf-8")
+                    for vibe_request, profile in zip(chunk, profiles)
+                )
         
-    except Exception as e:
-        print(f"Error in vibe profiling: {str(e)}")
-        # Return default profile on error
-        default_profile = STUDY_VIBES_DATABASE[0]
-        recommendations = generate_study_recommendations(
-            default_profile["vibe_tag"], 
-            default_profile["parameters"]
-        )
+        vibe_batch_log.info("Generated study vibe profiles for a batch", extra={"profiles": len(bodies)})
+        return RawJSONResponse(batch_json(bodies))
         
-        return UserProfileResponse(
-            user_id=request.user_id,
-            vibe_tag=default_profile["vibe_tag"],
-            parameters=default_profile["parameters"],
-            description=default_profile["description"],
-            recommendations=recommendations
-        )
+    except Exception:
+        vibe_batch_log.exception("Error in batch vibe profiling; serving the default profile")
+        metrics.fallback("default_vibe_profile")
+        return VibeBatchResponse(results=[_default_profile_response(vibe_request) for vibe_request in request.requests])
 
 @app.get("/available-vibes")
 def get_available_vibes():
@@ -414,9 +631,22 @@ def get_available_vibes():
         "total": len(STUDY_VIBES_DATABASE)
     }
 
+# Catalog and index sizes, read on each scrape
+metrics.gauge("ugrama_catalog_courses", "Live courses in the catalog.", lambda: compiled_catalog.live_count)
+metrics.gauge("ugrama_catalog_version", "Catalog version; bumps on every applied change batch.", lambda: compiled_catalog.version)
+metrics.gauge("ugrama_keyword_index_terms", "Distinct terms in the keyword search index.", lambda: len(course_index.vocabulary))
+metrics.gauge("ugrama_vibe_profiler_vibes", "Vibes in the embedding profiler's matrix.",
+              lambda: len(vibe_profiler.vibes) if vibe_profiler else None)
+metrics.track_engines(engines)
+
+engines.record_timing("module_import", time.perf_counter() - _module_import_started)
+
 if __name__ == "__main__":
-    import uvicorn
-    print("Starting Enhanced Course Recommendation API with Study Vibe Profiler...")
-    print(f"Loaded {len(COURSE_DATABASE)} courses")
-    print(f"Loaded {len(STUDY_VIBES_DATABASE)} study vibes")
-    uvicorn.run(app, host="0.0.0.0", port=8001, reload=True)
\ No newline at end of file
+    from prefork import serve_from_env
+
+    logger.info("Starting Enhanced Course Recommendation API with Study Vibe Profiler", extra={
+        "courses": compiled_catalog.live_count,
+        "vibes": len(STUDY_VIBES_DATABASE),
+    })
+    # SERVER_WORKERS > 1 loads the embedding model and vibe profiler once, then forks the workers
+    serve_from_env(app, "study_along_chatbot:app", default_port=8001, preload=warm_vibe_profiler)
\ No newline at end of file
@@ -0,0 +1,163 @@
+import os
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+# --- TF-IDF Imports ---
+try:
+    from scipy import sparse
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+    from sklearn.preprocessing import normalize
+except ImportError:
+    sparse = None
+    HashingVectorizer = None
+    TfidfVectorizer = None
+    normalize = None
+
+VECTORIZER_MODES = ("tfidf", "hashing")
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first; argpartition keeps it O(n) instead of a full sort"""
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def sparse_rows(matrix) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(column indices, values) of each row of a CSR matrix, without building row matrices"""
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        yield matrix.indices[start:end], matrix.data[start:end]
+
+
+class TfidfIndex:
+    """
+    Sparse TF-IDF rows for the course documents, scored against queries with
+    one sparse matrix product per batch of queries.
+
+    "tfidf" mode fits a TfidfVectorizer vocabulary on the first batch of
+    documents; later rows are transformed with it, so terms new to the
+    vocabulary are ignored until the index is rebuilt. "hashing" mode maps
+    terms to `n_features` hashed columns and keeps document frequencies as
+    counts, so adds need no refit and IDF always reflects every document
+    added. Hashed rows are L2-normalized term frequencies and the IDF weight
+    (squared) is applied on the query side, which ranks like TF-IDF cosine
+    except that document length is normalized before IDF weighting.
+
+    Rows are kept column-major (CSC), i.e. as per-term postings, in blocks of
+    consecutive rows. An add appends a block and merges trailing blocks while
+    the older one is at most twice the size of the newer, so a row is copied
+    O(log n) times over all adds rather than the whole matrix once per add,
+    and a search multiplies against O(log n) blocks. Each add swaps in a new
+    tuple of blocks, so a search running on the old one still sees consistent
+    rows.
+    """
+
+    def __init__(self, mode: str = "tfidf", n_features: int = 2 ** 20, stop_words: Optional[str] = "english"):
+        if TfidfVectorizer is None:
+            raise RuntimeError("scikit-learn is required for TF-IDF retrieval. Install it with: pip install scikit-learn")
+        if mode not in VECTORIZER_MODES:
+            raise ValueError(f"Unknown TF-IDF vectorizer mode {mode!r}; expected one of {VECTORIZER_MODES}")
+        self.mode = mode
+        if mode == "hashing":
+            self.vectorizer = HashingVectorizer(
+                n_features=n_features, stop_words=stop_words, alternate_sign=False, norm=None
+            )
+            self.document_frequencies = np.zeros(n_features, dtype=np.int64)
+        else:
+            self.vectorizer = TfidfVectorizer(stop_words=stop_words)
+            self.document_frequencies = None
+        self.documents = 0
+        self.blocks: Tuple = ()
+
+    @classmethod
+    def from_env(cls) -> "TfidfIndex":
+        """TFIDF_VECTORIZER ("tfidf" or "hashing") and TFIDF_HASH_FEATURES pick the vectorizer"""
+        return cls(
+            mode=os.getenv("TFIDF_VECTORIZER", "tfidf"),
+            n_features=int(os.getenv("TFIDF_HASH_FEATURES", str(2 ** 20))),
+        )
+
+    @property
+    def key(self) -> str:
+        """Identifies the vectorizer settings, for cache fingerprints"""
+        if self.mode == "hashing":
+            return f"hashing-{len(self.document_frequencies)}"
+        return self.mode
+
+    def __setstate__(self, state: dict):
+        # Indexes cached before rows were kept in blocks hold one matrix
+        if "doc_vectors" in state:
+            matrix = state.pop("doc_vectors")
+            state["blocks"] = () if matrix is None else (matrix,)
+        self.__dict__.update(state)
+
+    @property
+    def rows(self) -> int:
+        return sum(block.shape[0] for block in self.blocks)
+
+    def add(self, texts: Iterable[str]):
+        """Append one row per text; the first call fits the vocabulary in "tfidf" mode"""
+        texts = list(texts)
+        if self.mode == "hashing":
+            counts = self.vectorizer.transform(texts).tocsr()
+            counts.sum_duplicates()
+            # Replaced rather than updated in place, like the blocks
+            self.document_frequencies = self.document_frequencies + np.bincount(
+                counts.indices, minlength=len(self.document_frequencies)
+            )
+            rows = normalize(counts)
+        elif not self.blocks:
+            rows = self.vectorizer.fit_transform(texts)
+        else:
+            rows = self.vectorizer.transform(texts)
+
+        self.documents += len(texts)
+        blocks = list(self.blocks) + [rows.tocsc()]
+        while len(blocks) > 1 and blocks[-2].shape[0] <= 2 * blocks[-1].shape[0]:
+            newer = blocks.pop()
+            blocks[-1] = sparse.vstack([blocks[-1], newer], format="csc")
+        self.blocks = tuple(blocks)
+
+    def _query_vectors(self, queries: Sequence[str]):
+        if self.mode != "hashing":
+            return self.vectorizer.transform(queries)
+        vectors = self.vectorizer.transform(queries).tocsr()
+        # Smoothed IDF, as TfidfVectorizer computes it
+        idf = np.log((1 + self.documents) / (1 + self.document_frequencies[vectors.indices])) + 1
+        vectors.data = vectors.data * idf * idf
+        return normalize(vectors)
+
+    def scores(self, queries: Sequence[str]):
+        """
+        Sparse CSR (len(queries), rows) cosine scores, one sparse product per
+        block. Only documents sharing a term with a query are stored; read the
+        rows with `sparse_rows` rather than densifying queries x catalog.
+        """
+        blocks = self.blocks
+        if not blocks:
+            return sparse.csr_matrix((len(queries), 0), dtype=np.float64)
+        vectors = self._query_vectors(queries)
+        # The transpose of a CSC matrix is a CSR view with one row of postings per term,
+        # so a query only touches the postings of its own terms
+        scores = sparse.hstack([vectors @ block.T for block in blocks], format="csr")
+        # Ascending positions within each row, so equal scores rank in catalog order
+        scores.sort_indices()
+        return scores
+
+    def top_k(self, queries: Sequence[str], k: int) -> list:
+        """Row positions of each query's k best-scoring documents, best first"""
+        return [indices[top_k(data, k)] for indices, data in sparse_rows(self.scores(queries))]
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "rows": self.rows,
+            "blocks": len(self.blocks),
+            "features": self.blocks[0].shape[1] if self.blocks else 0,
+            "nnz": sum(int(block.nnz) for block in self.blocks),
+        }
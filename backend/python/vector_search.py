@@ -0,0 +1,112 @@
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ann_index import selector_search
+from catalog import CompiledCatalog
+
+# Filtered searches first fetch enough neighbours to expect OVERFETCH_MARGIN x k
+# filtered hits, widening OVERFETCH_GROWTH-fold for up to OVERFETCH_ROUNDS rounds
+OVERFETCH_MARGIN = 2.0
+OVERFETCH_GROWTH = 4
+OVERFETCH_ROUNDS = 3
+
+# Filters matching less than this share of the catalog skip over-fetching and
+# search only the matching vectors; on a flat index that scan is cheaper than
+# a full one below roughly 20-30% (benchmarks/bench_filtered_search.py)
+SELECTOR_SELECTIVITY = 0.2
+
+
+class FilteredVectorSearch:
+    """
+    Level/category-constrained k-NN over a LangChain FAISS store whose docstore
+    ids are course ids, with the filter given as a CompiledCatalog bitmap.
+
+    Broad filters over-fetch neighbours and keep the ones inside the bitmap,
+    widening the fetch until k hits are found; narrow filters (or an
+    over-fetch that ran out of rounds) pass the matching FAISS ids to an
+    IDSelector and search them exactly (see ann_index.selector_search).
+    Over an IVF/HNSW index the over-fetch is as approximate as the index.
+
+    Callers hold the store's read lock. The course id -> FAISS id map the
+    selector needs is rebuilt once per catalog version.
+    """
+
+    def __init__(self, vector_store, catalog: CompiledCatalog):
+        self.vector_store = vector_store
+        self.catalog = catalog
+        self._faiss_ids: Tuple[Optional[int], Dict[str, int]] = (None, {})
+        self._lock = threading.Lock()
+
+        self.searches = 0
+        self.overfetch_rounds = 0
+        self.selector_searches = 0
+
+    def _query(self, embedding: Sequence[float]) -> np.ndarray:
+        query = np.asarray([embedding], dtype=np.float32)
+        if self.vector_store._normalize_L2:
+            import faiss
+
+            faiss.normalize_L2(query)
+        return query
+
+    def _course_ids(self, faiss_ids: np.ndarray) -> List[str]:
+        index_to_id = self.vector_store.index_to_docstore_id
+        return [index_to_id[i] for i in faiss_ids if i != -1]
+
+    def _faiss_id_map(self) -> Dict[str, int]:
+        with self._lock:
+            version, mapping = self._faiss_ids
+            if version != self.catalog.version:
+                mapping = {course_id: i for i, course_id in self.vector_store.index_to_docstore_id.items()}
+                self._faiss_ids = (self.catalog.version, mapping)
+            return mapping
+
+    def search(self, embedding: Sequence[float], k: int, bitmap: Optional[int] = None) -> List[str]:
+        """Course ids of the k nearest courses, restricted to the bitmap's positions when given"""
+        index = self.vector_store.index
+        total = index.ntotal
+        query = self._query(embedding)
+        self.searches += 1
+        if bitmap is None:
+            _, found = index.search(query, min(k, total))
+            return self._course_ids(found[0])
+
+        matches = bitmap.bit_count()
+        if not matches or not total:
+            return []
+
+        selectivity = matches / max(self.catalog.live_count, 1)
+        if selectivity >= SELECTOR_SELECTIVITY:
+            members = self.catalog.members(bitmap)
+            positions = self.catalog.positions
+            fetch = min(total, max(k, math.ceil(k / selectivity * OVERFETCH_MARGIN)))
+            for _ in range(OVERFETCH_ROUNDS):
+                self.overfetch_rounds += 1
+                _, found = index.search(query, fetch)
+                hits = [course_id for course_id in self._course_ids(found[0]) if positions.get(course_id) in members]
+                # The fetch is ranked, so k hits within it are the filtered top k
+                if len(hits) >= k or fetch >= total:
+                    return hits[:k]
+                fetch = min(total, fetch * OVERFETCH_GROWTH)
+
+        self.selector_searches += 1
+        return self._selector_search(query, k, bitmap)
+
+    def _selector_search(self, query: np.ndarray, k: int, bitmap: int) -> List[str]:
+        faiss_ids = self._faiss_id_map()
+        ids = self.catalog.ids
+        selected = [faiss_ids[ids[p]] for p in self.catalog.members(bitmap) if ids[p] in faiss_ids]
+        if not selected:
+            return []
+        _, found = selector_search(self.vector_store.index, query, min(k, len(selected)), selected)
+        return self._course_ids(found[0])
+
+    def stats(self) -> dict:
+        return {
+            "searches": self.searches,
+            "overfetch_rounds": self.overfetch_rounds,
+            "selector_searches": self.selector_searches,
+        }
@@ -0,0 +1,157 @@
+"""
+Study vibe profiling with one matrix product per batch of descriptions.
+
+The vibe descriptions are embedded once and kept L2-normalized as a
+(vibes x dim) float32 matrix. A batch of user descriptions is embedded
+together, normalized, and multiplied by the matrix's transpose, which gives
+the cosine similarity of every description to every vibe. Each description
+gets its top-k vibes with their scores and "blended" parameters: the
+similarities of the top k go through a softmax (VIBE_BLEND_TEMPERATURE), every
+vibe lends its weight to its parameter values, and each parameter takes the
+value with the most weight.
+
+VIBE_TOP_K: vibes returned per profile (default 3)
+VIBE_BLEND_TEMPERATURE: softmax temperature over the top-k similarities (default 0.05);
+    lower values let the best match dominate the blend
+"""
+import os
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_TOP_K = 3
+DEFAULT_BLEND_TEMPERATURE = 0.05
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def single_vibe_profile(vibe: dict) -> dict:
+    """A profile made of one unscored vibe, e.g. the keyword retriever's pick"""
+    return {
+        "vibe": vibe,
+        "matches": [{"vibe_tag": vibe["vibe_tag"], "score": None}],
+        "blended_parameters": dict(vibe["parameters"]),
+        "parameter_weights": {name: {value: 1.0} for name, value in vibe["parameters"].items()},
+    }
+
+
+class VibeProfiler:
+    """
+    Scores descriptions against every study vibe at once; see the module docstring.
+
+    Parameter values are one-hot (vibes x values) matrices per parameter, so
+    blending a batch is one product per parameter. Vibes and vectors are
+    fixed at construction; build a new profiler when the vibes change.
+    """
+
+    def __init__(self, vibes: Sequence[dict], vectors: Sequence[Sequence[float]], embeddings,
+                 top_k: int = DEFAULT_TOP_K, temperature: float = DEFAULT_BLEND_TEMPERATURE):
+        if not vibes or len(vibes) != len(vectors):
+            raise ValueError(f"Need one vector per vibe, got {len(vectors)} vectors for {len(vibes)} vibes")
+        if temperature <= 0:
+            raise ValueError(f"Blend temperature must be positive, got {temperature}")
+        self.vibes = list(vibes)
+        self.embeddings = embeddings
+        self.matrix = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        self.top_k = max(1, min(top_k, len(self.vibes)))
+        self.temperature = temperature
+
+        self.parameter_values: Dict[str, List[str]] = {}
+        for vibe in self.vibes:
+            for name, value in vibe["parameters"].items():
+                values = self.parameter_values.setdefault(name, [])
+                if value not in values:
+                    values.append(value)
+        self.parameter_matrices: Dict[str, np.ndarray] = {}
+        for name, values in self.parameter_values.items():
+            onehot = np.zeros((len(self.vibes), len(values)), dtype=np.float32)
+            for row, vibe in enumerate(self.vibes):
+                if name in vibe["parameters"]:
+                    onehot[row, values.index(vibe["parameters"][name])] = 1.0
+            self.parameter_matrices[name] = onehot
+
+        self.profiles = 0
+        self.batches = 0
+
+    @classmethod
+    def from_env(cls, vibes: Sequence[dict], embeddings) -> "VibeProfiler":
+        return cls(
+            vibes,
+            embeddings.embed_documents([vibe["description"] for vibe in vibes]),
+            embeddings,
+            top_k=int(os.getenv("VIBE_TOP_K", str(DEFAULT_TOP_K))),
+            temperature=float(os.getenv("VIBE_BLEND_TEMPERATURE", str(DEFAULT_BLEND_TEMPERATURE))),
+        )
+
+    def embed(self, descriptions: Sequence[str]) -> np.ndarray:
+        """Normalized (descriptions x dim) query matrix, embedded in one call"""
+        # CachedEmbeddings answers repeated descriptions from its cache and embeds the rest together
+        embed_queries = getattr(self.embeddings, "embed_queries", None)
+        vectors = embed_queries(list(descriptions)) if embed_queries else self.embeddings.embed_documents(list(descriptions))
+        return normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(descriptions), -1))
+
+    def score(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every query row to every vibe: (queries x vibes)"""
+        return queries @ self.matrix.T
+
+    def profile_scores(self, scores: np.ndarray, top_k: Optional[Sequence[Optional[int]]] = None) -> List[dict]:
+        """Profiles from a score matrix; `top_k` optionally overrides the profiler's k per row"""
+        rows, count = scores.shape
+        ks = np.full(rows, self.top_k, dtype=np.intp)
+        if top_k is not None:
+            ks = np.array([self.top_k if k is None else k for k in top_k], dtype=np.intp).clip(1, count)
+        width = int(ks.max()) if rows else 0
+
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :width]
+        top_scores = np.take_along_axis(scores, order, axis=1)
+        # Softmax over each row's own top k; the columns past it get no weight
+        logits = np.where(np.arange(width) < ks[:, None], top_scores / self.temperature, -np.inf)
+        weights = np.exp(logits - logits.max(axis=1, keepdims=True))
+        weights /= weights.sum(axis=1, keepdims=True)
+        vibe_weights = np.zeros_like(scores)
+        np.put_along_axis(vibe_weights, order, weights, axis=1)
+        shares = {name: vibe_weights @ onehot for name, onehot in self.parameter_matrices.items()}
+        share_orders = {name: np.argsort(-share, axis=1, kind="stable") for name, share in shares.items()}
+
+        profiles = []
+        for row in range(rows):
+            k = int(ks[row])
+            parameter_weights = {}
+            blended = {}
+            for name, values in self.parameter_values.items():
+                row_shares = shares[name][row].tolist()
+                ranked = [i for i in share_orders[name][row].tolist() if row_shares[i] > 0]
+                parameter_weights[name] = {values[i]: round(row_shares[i], 4) for i in ranked}
+                if ranked:
+                    blended[name] = values[ranked[0]]
+            profiles.append({
+                "vibe": self.vibes[order[row, 0]],
+                "matches": [
+                    {"vibe_tag": self.vibes[i]["vibe_tag"], "score": round(s, 4)}
+                    for i, s in zip(order[row, :k].tolist(), top_scores[row, :k].tolist())
+                ],
+                "blended_parameters": blended,
+                "parameter_weights": parameter_weights,
+            })
+        self.profiles += rows
+        self.batches += 1
+        return profiles
+
+    def profile(self, descriptions: Sequence[str], top_k: Optional[Sequence[Optional[int]]] = None) -> List[dict]:
+        """Profiles for a batch of descriptions, in order"""
+        if not descriptions:
+            return []
+        return self.profile_scores(self.score(self.embed(descriptions)), top_k)
+
+    def stats(self) -> dict:
+        return {
+            "vibes": len(self.vibes),
+            "top_k": self.top_k,
+            "temperature": self.temperature,
+            "profiles": self.profiles,
+            "batches": self.batches,
+        }
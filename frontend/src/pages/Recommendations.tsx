@@ -24,6 +24,19 @@ interface RAGResponse {
   warning?: string;
 }
 
+// Last response per request body, revalidated with If-None-Match (304 = unchanged).
+// A Map iterates in insertion order, so re-inserting on use keeps it an LRU.
+const RESPONSE_CACHE_SIZE = 20;
+const responseCache = new Map<string, { etag: string; data: RAGResponse }>();
+
+const cacheResponse = (body: string, entry: { etag: string; data: RAGResponse }) => {
+  responseCache.delete(body);
+  responseCache.set(body, entry);
+  while (responseCache.size > RESPONSE_CACHE_SIZE) {
+    responseCache.delete(responseCache.keys().next().value as string);
+  }
+};
+
 const Recommendations = () => {
   const [courses, setCourses] = useState<Course[]>([]);
   const [searchQuery, setSearchQuery] = useState("");
@@ -40,25 +53,37 @@ const Recommendations = () => {
   const fetchRecommendations = async (query: string, level?: string) => {
     setLoading(true);
     try {
+      const body = JSON.stringify({
+        query: query || defaultQuery,
+        level: level || undefined,
+      });
+      const cached = responseCache.get(body);
+
       const response = await fetch(
         "http://localhost:8001/courserecommendations",
         {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
+            ...(cached ? { "If-None-Match": cached.etag } : {}),
           },
-          body: JSON.stringify({
-            query: query || defaultQuery,
-            level: level || undefined,
-          }),
+          body,
         }
       );
 
-      if (!response.ok) {
+      let data: RAGResponse;
+      if (response.status === 304 && cached) {
+        data = cached.data;
+        cacheResponse(body, cached);
+      } else if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
+      } else {
+        data = await response.json();
+        const etag = response.headers.get("ETag");
+        if (etag) {
+          cacheResponse(body, { etag, data });
+        }
       }
-
-      const data: RAGResponse = await response.json();
       setCourses(data.courses);
 
       if (data.warning) {